@@ -0,0 +1,166 @@
+"""Benchmark suite for the workshop API.
+
+Generates (or reuses) a SQLite database with synthetic users and
+operations, runs the micro-benchmarks, the in-process load driver and the
+cold-start benchmark, and writes the results as JSON. A run can be stored as the baseline and later
+runs compared against it.
+
+Usage:
+    python -m benchmarks [--users 10000] [--operations 1000000]
+                         [--db bench.sqlite] [--requests 200]
+                         [--concurrency 8] [--only micro|load|startup]
+                         [--route 'GET /operations/'] [--profile-startup]
+                         [--save-baseline] [--compare] [--threshold 0.1]
+"""
+import argparse
+import asyncio
+from dataclasses import asdict
+import json
+import os
+import sys
+import tempfile
+from typing import Dict
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Metrics where a lower value is better; everything else is a rate.
+LOWER_IS_BETTER = ('_ms',)
+
+
+def flatten(results: Dict) -> Dict[str, float]:
+    flat = {}
+    for name, value in results.get('micro', {}).items():
+        flat[f'micro.{name}'] = value
+    for route, stats in results.get('load', {}).items():
+        for key in ('p50_ms', 'p99_ms', 'rps'):
+            flat[f'load.{route}.{key}'] = stats[key]
+    for phase, value in results.get('startup', {}).items():
+        flat[f'startup.{phase}'] = value
+    return flat
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> bool:
+    current, previous = flatten(results), flatten(baseline)
+    regressed = False
+    for name in sorted(current.keys() & previous.keys()):
+        before, after = previous[name], current[name]
+        if not before:
+            continue
+        change = (after - before) / before
+        if name.endswith(LOWER_IS_BETTER):
+            change = -change
+        marker = ''
+        if change < -threshold:
+            marker = '  REGRESSION'
+            regressed = True
+        print(f'{name:60} {before:12.2f} -> {after:12.2f} '
+              f'({change:+.1%}){marker}')
+    return not regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--operations', type=int, default=1_000_000)
+    parser.add_argument('--db', help='reuse or create this SQLite file')
+    parser.add_argument('--seconds', type=float, default=2.0,
+                        help='duration of each micro-benchmark')
+    parser.add_argument('--serialization-rows', type=int, default=1000)
+    parser.add_argument('--import-rows', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', choices=('micro', 'load', 'startup'))
+    parser.add_argument('--route', help='only load-test matching routes')
+    parser.add_argument('--startup-samples', type=int, default=10)
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print the import time of the slowest modules')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(
+        args.db or os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    )
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    # Settings are cached on first use and the startup samples inherit the
+    # environment, so the database is chosen before workshop is used.
+    os.environ['DB_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('IMPORT_DIR', os.path.join(
+        os.path.dirname(db_path), 'imports'
+    ))
+    # The load driver replays one client as fast as it can; rate limits
+    # would measure 429s instead of the routes.
+    for group in ('AUTH', 'READ', 'WRITE'):
+        os.environ.setdefault(f'RATE_LIMIT_{group}_RATE', '0')
+
+    from workshop.app import get_app
+    from workshop.db import get_database
+    from workshop.db.models import Base
+    from workshop.services import shutdown_import_pool
+    from workshop.services.passwords import shutdown_password_hasher
+
+    from . import data, load, micro, startup
+
+    engine = get_database().engine
+    if args.only == 'startup':
+        Base.metadata.create_all(engine)
+    elif not data.is_generated(engine):
+        data.generate(engine, args.users, args.operations)
+
+    results: Dict = {}
+    try:
+        if args.only in (None, 'micro'):
+            results['micro'] = micro.run(args.seconds,
+                                         args.serialization_rows,
+                                         args.import_rows)
+            for name, value in results['micro'].items():
+                print(f'{name:40} {value:14.1f}')
+
+        if args.only in (None, 'load'):
+            route_results = asyncio.run(load.run(
+                get_app(), args.requests, args.concurrency, only=args.route
+            ))
+            results['load'] = {
+                name: asdict(result) for name, result in route_results.items()
+            }
+            print(f'{"route":40} {"p50 ms":>9} {"p99 ms":>9} '
+                  f'{"req/s":>9} {"errors":>7}')
+            for name, result in route_results.items():
+                print(f'{name:40} {result.p50_ms:9.2f} {result.p99_ms:9.2f} '
+                      f'{result.rps:9.1f} {result.errors:7}')
+
+        if args.only in (None, 'startup'):
+            results['startup'] = startup.run(args.startup_samples)
+            for phase, value in results['startup'].items():
+                print(f'startup.{phase:32} {value:14.1f}')
+            if args.profile_startup:
+                print()
+                startup.print_profile()
+    finally:
+        shutdown_import_pool()
+        shutdown_password_hasher()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    ok = True
+    if args.compare:
+        with open(BASELINE_PATH) as file:
+            ok = compare(results, json.load(file), args.threshold)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'baseline saved to {BASELINE_PATH}')
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
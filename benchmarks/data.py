@@ -0,0 +1,76 @@
+"""Synthetic dataset for the benchmark suite."""
+from datetime import datetime, timedelta
+from decimal import Decimal
+import random
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+from workshop.db.models import Base, Operation, OperationRollup, OperationType, User
+from workshop.services.passwords import hash_password
+
+
+PASSWORD = 'benchmark-password'
+CHUNK_SIZE = 10_000
+
+
+def bench_email(index: int) -> str:
+    return f'user{index}@bench.local'
+
+
+def generate(engine: Engine, users: int, operations: int, seed: int = 0) -> None:
+    """Create the schema and fill it with ``users`` and ``operations`` rows.
+
+    Every user shares one precomputed password hash so generation is not
+    dominated by the KDF.
+    """
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    password_hash = hash_password(PASSWORD)
+    now = datetime.utcnow()
+    started_at = time.perf_counter()
+
+    with engine.begin() as connection:
+        connection.execute(sa.insert(User), [
+            {
+                'user_id': index + 1,
+                'email': bench_email(index + 1),
+                'username': f'user{index + 1}',
+                'password_hash': password_hash,
+                'created_at': now,
+                'updated_at': now
+            }
+            for index in range(users)
+        ])
+
+    for offset in range(0, operations, CHUNK_SIZE):
+        rows = []
+        for _ in range(min(CHUNK_SIZE, operations - offset)):
+            created_at = now - timedelta(seconds=rng.randrange(365 * 86400))
+            rows.append({
+                'user_id': rng.randrange(users) + 1,
+                'amount': Decimal(rng.randrange(1, 100_000)) / 100,
+                'type': rng.choice((OperationType.INCOME, OperationType.OUTCOME)),
+                'description': f'operation {offset}',
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+        with engine.begin() as connection:
+            connection.execute(sa.insert(Operation), rows)
+
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            "INSERT INTO operation_rollup (user_id, day, income, outcome) "
+            "SELECT user_id, date(created_at), "
+            "SUM(CASE WHEN type = 'INCOME' THEN amount ELSE 0 END), "
+            "SUM(CASE WHEN type = 'OUTCOME' THEN amount ELSE 0 END) "
+            "FROM operation GROUP BY user_id, date(created_at)"
+        ))
+
+    print(f'generated {users} users and {operations} operations '
+          f'in {time.perf_counter() - started_at:.1f}s')
+
+
+def is_generated(engine: Engine) -> bool:
+    return sa.inspect(engine).has_table(OperationRollup.__tablename__)
@@ -0,0 +1,219 @@
+"""In-process ASGI load driver.
+
+Requests are fed straight into the application callable, so the numbers
+cover routing, dependencies, services, the database and serialization but
+not sockets or an HTTP parser.
+"""
+import asyncio
+from dataclasses import dataclass, field
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+
+from workshop.db.models import Operation, OperationType, User
+from workshop.db.session import engine
+from workshop.services import AuthService
+
+from .data import PASSWORD, bench_email
+
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    body: Optional[Callable[[int], bytes]] = None
+    content_type: bytes = b'application/json'
+    authorized: bool = True
+
+
+@dataclass
+class RouteResult:
+    requests: int
+    errors: int
+    p50_ms: float
+    p99_ms: float
+    rps: float
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+async def call(
+    app,
+    method: str,
+    path: str,
+    headers: Headers,
+    body: bytes = b''
+) -> Tuple[int, bytes]:
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'bench'),
+                    (b'content-length', str(len(body)).encode()),
+                    *headers],
+        'client': ('127.0.0.1', 50000),
+        'server': ('bench', 80)
+    }
+    response_complete = asyncio.Event()
+    request_sent = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await response_complete.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message) -> None:
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                response_complete.set()
+
+    await app(scope, receive, send)
+    return status, b''.join(chunks)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_route(
+    app,
+    route: Route,
+    headers: Headers,
+    requests: int,
+    concurrency: int
+) -> RouteResult:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for index in counter:
+            request_headers = list(headers) if route.authorized else []
+            body = b''
+            if route.body is not None:
+                body = route.body(index)
+                request_headers.append((b'content-type', route.content_type))
+            started_at = time.perf_counter()
+            status, _ = await call(app, route.method, route.path(index),
+                                   request_headers, body)
+            latencies.append(time.perf_counter() - started_at)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    return RouteResult(
+        requests=requests,
+        errors=sum(count for status, count in statuses.items()
+                   if status >= 400),
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        rps=requests / elapsed,
+        statuses=statuses
+    )
+
+
+def multipart(index: int) -> bytes:
+    return (
+        b'--bench\r\n'
+        b'Content-Disposition: form-data; name="body"; filename="o.csv"\r\n'
+        b'Content-Type: text/csv\r\n\r\n'
+        b'amount,type,description\r\n1.00,income,bench\r\n'
+        b'\r\n--bench--\r\n'
+    )
+
+
+def build_routes(user_id: int, requests: int) -> List[Route]:
+    with engine.begin() as connection:
+        operation_ids = [
+            connection.execute(sa.insert(Operation).values(
+                user_id=user_id,
+                amount=1,
+                type=OperationType.INCOME,
+                description='to be deleted'
+            )).inserted_primary_key[0]
+            for _ in range(requests)
+        ]
+        operation_id = operation_ids[0]
+        username = connection.execute(
+            sa.select(User.username).where(User.id == user_id)
+        ).scalar()
+
+    refresh_token = AuthService.create_refresh_token(User(id=user_id))
+    credentials = json.dumps({
+        'email': bench_email(user_id),
+        'password': PASSWORD
+    }).encode()
+
+    return [
+        Route('GET /operations/', 'GET', lambda _: '/operations/'),
+        Route('GET /operations/?limit=1000', 'GET',
+              lambda _: '/operations/?limit=1000'),
+        Route('GET /operations/summary', 'GET',
+              lambda _: '/operations/summary?period=day'),
+        Route('POST /operations/', 'POST', lambda _: '/operations/',
+              lambda _: b'{"amount": "12.50", "type": "income"}'),
+        Route('GET /operations/{operationId}', 'GET',
+              lambda _: f'/operations/{operation_id}'),
+        Route('PATCH /operations/{operationId}', 'PATCH',
+              lambda _: f'/operations/{operation_id}',
+              lambda index: json.dumps({'description': str(index)}).encode()),
+        Route('DELETE /operations/{operationId}', 'DELETE',
+              lambda index: f'/operations/{operation_ids[index]}'),
+        Route('POST /operations/import', 'POST',
+              lambda _: '/operations/import', multipart,
+              content_type=b'multipart/form-data; boundary=bench'),
+        Route('GET /users/me', 'GET', lambda _: '/users/me'),
+        Route('PATCH /users/me', 'PATCH', lambda _: '/users/me',
+              lambda _: json.dumps({'username': username}).encode()),
+        Route('GET /users/{username}', 'GET',
+              lambda _: f'/users/{username}', authorized=False),
+        Route('POST /auth/sign-in', 'POST', lambda _: '/auth/sign-in',
+              lambda _: credentials, authorized=False),
+        Route('POST /auth/refresh-tokens', 'POST',
+              lambda _: '/auth/refresh-tokens',
+              lambda _: json.dumps({'refreshToken': refresh_token}).encode(),
+              authorized=False),
+        Route('GET /metrics', 'GET', lambda _: '/metrics', authorized=False)
+    ]
+
+
+async def run(
+    app,
+    requests: int,
+    concurrency: int,
+    user_id: int = 1,
+    only: Optional[str] = None
+) -> Dict[str, RouteResult]:
+    token = AuthService.create_access_token(User(id=user_id))
+    headers = [(b'authorization', f'Bearer {token}'.encode())]
+    results = {}
+    for route in build_routes(user_id, requests):
+        if only and only not in route.name:
+            continue
+        results[route.name] = await run_route(app, route, headers,
+                                              requests, concurrency)
+    return results
@@ -0,0 +1,70 @@
+"""Per-request overhead of MetricsMiddleware.
+
+Drives a trivial ASGI app directly, with and without the middleware, so
+the difference is the collection cost alone.
+
+Usage: python -m benchmarks.metrics_overhead [--requests 200000]
+"""
+import argparse
+import asyncio
+import time
+
+from workshop.middleware import MetricsMiddleware
+
+
+async def endpoint(scope, receive, send) -> None:
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+class App:
+    routes = []
+
+    async def __call__(self, scope, receive, send) -> None:
+        scope['endpoint'] = endpoint
+        await endpoint(scope, receive, send)
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b''}
+
+
+async def send(message) -> None:
+    pass
+
+
+async def drive(app, routed_app: App, requests: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'app': routed_app
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started_at) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200_000)
+    args = parser.parse_args()
+
+    bare = App()
+    instrumented = MetricsMiddleware(bare)
+    loop = asyncio.new_event_loop()
+    # Warm up route name resolution and the histogram label sets.
+    loop.run_until_complete(drive(instrumented, bare, 1000))
+
+    bare_time = loop.run_until_complete(drive(bare, bare, args.requests))
+    instrumented_time = loop.run_until_complete(
+        drive(instrumented, bare, args.requests)
+    )
+    print(f'bare:         {bare_time * 1e6:.2f} us/request')
+    print(f'instrumented: {instrumented_time * 1e6:.2f} us/request')
+    print(f'overhead:     {(instrumented_time - bare_time) * 1e6:.2f} us/request')
+
+
+if __name__ == '__main__':
+    main()
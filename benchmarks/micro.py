@@ -0,0 +1,126 @@
+"""Micro-benchmarks for the hot paths of the services and schemas."""
+import io
+import json
+import time
+from typing import Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+import sqlalchemy as sa
+
+from workshop.db.models import Operation, User
+from workshop.db.session import Session
+from workshop.schemas import OperationSchema
+from workshop.services import AuthService, OperationsService
+from workshop.services.operations import operation_encoder
+from workshop.services.auth import get_access_token_cache
+
+
+Result = Dict[str, float]
+
+
+def rate(fn: Callable[[], None], seconds: float, per_call: int = 1) -> float:
+    """Calls of ``fn`` (times ``per_call`` units) per second."""
+    fn()
+    count = 0
+    started_at = time.perf_counter()
+    while time.perf_counter() - started_at < seconds:
+        fn()
+        count += per_call
+    return count / (time.perf_counter() - started_at)
+
+
+def bench_jwt(seconds: float) -> Result:
+    user = User(id=1)
+    token = AuthService.create_access_token(user)
+
+    def decode_uncached() -> None:
+        get_access_token_cache().clear()
+        AuthService.validate_access_token(token)
+
+    return {
+        'jwt_encode_per_s': rate(
+            lambda: AuthService.create_access_token(user), seconds
+        ),
+        'jwt_decode_per_s': rate(decode_uncached, seconds),
+        'jwt_decode_cached_per_s': rate(
+            lambda: AuthService.validate_access_token(token), seconds
+        )
+    }
+
+
+def bench_serialization(seconds: float, rows: int) -> Result:
+    session = Session()
+    try:
+        operations = session.query(Operation).limit(rows).all()
+        operation_rows = session.execute(sa.select(
+            *(getattr(Operation, name) for name in operation_encoder.fields)
+        ).limit(rows)).all()
+    finally:
+        session.close()
+
+    def serialize() -> None:
+        json.dumps(jsonable_encoder(
+            [OperationSchema.from_orm(operation) for operation in operations],
+            by_alias=True
+        ))
+
+    def serialize_fast() -> None:
+        operation_encoder.encode_many(operation_rows).encode('utf-8')
+
+    return {
+        'operation_schema_rows_per_s': rate(
+            serialize, seconds, per_call=len(operations)
+        ),
+        'operation_encoder_rows_per_s': rate(
+            serialize_fast, seconds, per_call=len(operation_rows)
+        )
+    }
+
+
+def bench_operations_page(seconds: float, limit: int, user_id: int = 1) -> Result:
+    """Full service call: ORM page plus response encoding vs. fast path."""
+    session = Session()
+
+    def orm_page() -> None:
+        page = OperationsService(session).get_operations(user_id, limit=limit)
+        json.dumps(jsonable_encoder(page, by_alias=True))
+        session.rollback()
+
+    def json_page() -> None:
+        OperationsService(session).get_operations_json(user_id, limit=limit)
+        session.rollback()
+
+    try:
+        return {
+            'operations_page_orm_per_s': rate(orm_page, seconds),
+            'operations_page_json_per_s': rate(json_page, seconds)
+        }
+    finally:
+        session.close()
+
+
+def bench_csv_import(rows: int, user_id: int = 1) -> Result:
+    csv = b'amount,type,description\n' + b''.join(
+        b'%d.50,%s,imported row\n' % (index, b'income' if index % 2 else b'outcome')
+        for index in range(rows)
+    )
+    session = Session()
+    try:
+        started_at = time.perf_counter()
+        report = OperationsService(session).import_operations(
+            user_id,
+            io.BytesIO(csv)
+        )
+        elapsed = time.perf_counter() - started_at
+    finally:
+        session.close()
+    return {'csv_import_rows_per_s': report.inserted / elapsed}
+
+
+def run(seconds: float, serialization_rows: int, import_rows: int) -> Result:
+    results: Result = {}
+    results.update(bench_jwt(seconds))
+    results.update(bench_serialization(seconds, serialization_rows))
+    results.update(bench_operations_page(seconds, serialization_rows))
+    results.update(bench_csv_import(import_rows))
+    return results
@@ -0,0 +1,76 @@
+"""Sign-in throughput at the configured password hashing cost.
+
+Usage: python -m benchmarks.password_hashing [--seconds 5]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from workshop.config import settings
+from workshop.services.passwords import (
+    PasswordHasher,
+    hash_password,
+    verify_password
+)
+
+
+PASSWORD = 'correct horse battery staple'
+
+
+def measure_single_core(seconds: float) -> float:
+    password_hash = hash_password(PASSWORD)
+    count = 0
+    started_at = time.perf_counter()
+    while time.perf_counter() - started_at < seconds:
+        verify_password(PASSWORD, password_hash)
+        count += 1
+    return count / (time.perf_counter() - started_at)
+
+
+def measure_pool(seconds: float) -> float:
+    """Concurrent sign-ins competing for the bounded hashing pool."""
+    password_hash = hash_password(PASSWORD)
+    hasher = PasswordHasher(
+        settings.auth.password_hash_workers,
+        settings.auth.password_hash_queue_size,
+        settings.auth.password_hash_timeout
+    )
+    clients = hasher.workers * 2
+    deadline = time.perf_counter() + seconds
+
+    def client() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.verify(PASSWORD, password_hash)
+            count += 1
+        return count
+
+    started_at = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            count = sum(executor.map(lambda _: client(), range(clients)))
+    finally:
+        hasher.shutdown()
+    return count / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    auth = settings.auth
+    print(f'scrypt ln={auth.scrypt_ln} r={auth.scrypt_r} p={auth.scrypt_p}')
+
+    per_core = measure_single_core(args.seconds)
+    print(f'sign-ins/s per core: {per_core:.1f}')
+
+    pooled = measure_pool(args.seconds)
+    print(
+        f'sign-ins/s with {auth.password_hash_workers} hashing workers: '
+        f'{pooled:.1f} ({pooled / auth.password_hash_workers:.1f} per worker)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""HTTP throughput of ``python -m workshop`` against a single uvicorn process.
+
+Both servers run against the same new SQLite database with one user, and
+each is driven over real sockets by keep-alive clients requesting that
+user's public profile and operations list.
+
+Usage: python -m benchmarks.server [--seconds 10] [--connections 64]
+                                   [--workers N]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+
+USERNAME = 'server-bench'
+PORT = 8765
+
+
+def prepare_database(path: str) -> str:
+    """Create the schema and the user; return a bearer token for them."""
+    os.environ['DB_URL'] = f'sqlite:///{path}'
+
+    from workshop.db import get_database
+    from workshop.db.models import Base, User
+    from workshop.services.auth import AuthService
+
+    database = get_database()
+    Base.metadata.create_all(database.engine)
+    with database.Session() as session, session.begin():
+        user = User(email=f'{USERNAME}@bench.local', username=USERNAME,
+                    password_hash='-')
+        session.add(user)
+        session.flush()
+        return AuthService.create_access_token(user)
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not listen on port {port}')
+
+
+async def client(
+    port: int,
+    requests: List[bytes],
+    deadline: float
+) -> Tuple[int, int]:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    done = errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            writer.write(requests[done % len(requests)])
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                name, _, value = line.partition(b':')
+                if name.lower() == b'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            if status == 200:
+                done += 1
+            else:
+                errors += 1
+    finally:
+        writer.close()
+    return done, errors
+
+
+async def drive(
+    port: int,
+    token: str,
+    seconds: float,
+    connections: int
+) -> Dict[str, float]:
+    requests = [
+        f'GET {path} HTTP/1.1\r\nHost: bench\r\n'
+        f'Authorization: Bearer {token}\r\n\r\n'.encode()
+        for path in (f'/users/{USERNAME}', '/operations/?limit=50')
+    ]
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(
+        client(port, requests, started_at + seconds)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started_at
+    return {
+        'rps': sum(done for done, _ in results) / elapsed,
+        'errors': sum(errors for _, errors in results)
+    }
+
+
+def measure(
+    command: List[str],
+    token: str,
+    args: argparse.Namespace
+) -> Dict[str, float]:
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(PORT)
+        # A short warm-up, so every worker has started and connected.
+        asyncio.run(drive(PORT, token, 1.0, args.connections))
+        return asyncio.run(drive(PORT, token, args.seconds,
+                                 args.connections))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    token = prepare_database(
+        os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    )
+    # Keep the access log from being the bottleneck of either server.
+    os.environ['SERVER_ACCESS_LOG'] = '0'
+    # One user sends every request, which the rate limits would reject.
+    os.environ['RATE_LIMIT_READ_RATE'] = '0'
+
+    from workshop.server import cpu_count
+    workers = args.workers or cpu_count()
+
+    servers = {
+        'uvicorn': [sys.executable, '-m', 'uvicorn', 'workshop.app:get_app',
+                    '--factory', '--port', str(PORT), '--no-access-log'],
+        f'workshop x{workers}': [sys.executable, '-m', 'workshop',
+                                 '--port', str(PORT),
+                                 '--workers', str(workers)]
+    }
+    print(f'{args.connections} connections, {args.seconds:.0f}s per server')
+    print(f'{"server":16} {"req/s":>10} {"errors":>7}')
+    for name, command in servers.items():
+        result = measure(command, token, args)
+        print(f'{name:16} {result["rps"]:10.1f} {result["errors"]:7.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Concurrent read and write throughput on a SQLite file.
+
+Each mode runs in a fresh interpreter against a new database: writer
+threads create operations and reader threads page through them for the
+same user set, through the services and sessions the API uses.
+
+Usage: python -m benchmarks.sqlite_concurrency [--seconds 5] [--writers 8]
+                                               [--readers 8] [--users 100]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Tuple
+
+
+MODES = {'default': '0', 'performance': '1'}
+
+
+def measure(
+    seconds: float,
+    writers: int,
+    readers: int,
+    users: int
+) -> Dict[str, float]:
+    from sqlalchemy.exc import OperationalError
+
+    from workshop.db import get_database
+    from workshop.db.models import Base, OperationType, User
+    from workshop.schemas import OperationCreateSchema
+    from workshop.services import OperationsService
+
+    database = get_database()
+    Base.metadata.create_all(database.engine)
+    with database.Session() as session, session.begin():
+        session.add_all([
+            User(email=f'user{index}@bench.local', username=f'user{index}',
+                 password_hash='-')
+            for index in range(users)
+        ])
+    with database.Session() as session:
+        user_ids = [user_id for user_id, in session.query(User.id)]
+    payload = OperationCreateSchema(
+        amount=Decimal('9.99'),
+        type=OperationType.OUTCOME,
+        description='benchmark'
+    )
+    deadline = time.perf_counter() + seconds
+
+    def client(index: int, write: bool) -> Tuple[int, int]:
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            user_id = user_ids[(index + done + errors) % len(user_ids)]
+            with database.Session() as session:
+                service = OperationsService(session)
+                try:
+                    if write:
+                        service.create_operation(user_id, payload)
+                    else:
+                        service.get_operations(user_id, limit=50)
+                except OperationalError:
+                    errors += 1
+                else:
+                    done += 1
+        return done, errors
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers + readers) as executor:
+        write_results = [executor.submit(client, index, True)
+                         for index in range(writers)]
+        read_results = [executor.submit(client, index, False)
+                        for index in range(readers)]
+        writes = [future.result() for future in write_results]
+        reads = [future.result() for future in read_results]
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'writes_per_s': sum(done for done, _ in writes) / elapsed,
+        'reads_per_s': sum(done for done, _ in reads) / elapsed,
+        'write_errors': sum(errors for _, errors in writes),
+        'read_errors': sum(errors for _, errors in reads)
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    directory = tempfile.mkdtemp()
+    env = os.environ.copy()
+    env['DB_URL'] = f'sqlite:///{os.path.join(directory, "bench.sqlite")}'
+    env['DB_SQLITE_PERFORMANCE_MODE'] = MODES[mode]
+    env.pop('DB_REPLICA_URLS', None)
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.sqlite_concurrency', '--child',
+         '--seconds', str(args.seconds), '--writers', str(args.writers),
+         '--readers', str(args.readers), '--users', str(args.users)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.seconds, args.writers, args.readers,
+                                 args.users)))
+        return
+
+    print(f'{args.writers} writers, {args.readers} readers, '
+          f'{args.seconds:.0f}s per mode')
+    print(f'{"mode":12} {"writes/s":>10} {"reads/s":>10} '
+          f'{"w errors":>9} {"r errors":>9}')
+    for mode in MODES:
+        result = run_mode(mode, args)
+        print(f'{mode:12} {result["writes_per_s"]:10.1f} '
+              f'{result["reads_per_s"]:10.1f} '
+              f'{result["write_errors"]:9.0f} {result["read_errors"]:9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Cold-start benchmark and import-time profile.
+
+Every sample runs in a fresh interpreter, so nothing is shared through
+``sys.modules`` or warmed caches between runs. A sample measures:
+
+* ``import_ms`` - ``import workshop.app``;
+* ``get_app_ms`` - building the application;
+* ``first_request_ms`` - the startup and shutdown handlers around the
+  first request that reaches the database, sent straight over ASGI;
+* ``total_ms`` - all of the above, i.e. process start to first response.
+
+``profile_imports`` runs the same steps under ``python -X importtime`` and
+breaks the import time down by package and by workshop module.
+"""
+from collections import defaultdict
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+SAMPLE = '''
+import json, time
+started_at = time.perf_counter()
+import workshop.app
+imported_at = time.perf_counter()
+app = workshop.app.get_app()
+built_at = time.perf_counter()
+import asyncio
+
+async def first_request():
+    await app.router.startup()
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/users/startup-benchmark',
+        'raw_path': b'/users/startup-benchmark', 'query_string': b'',
+        'root_path': '', 'headers': [(b'host', b'bench')],
+        'client': ('127.0.0.1', 1), 'server': ('bench', 80)
+    }, receive, send)
+    await app.router.shutdown()
+    return messages[0]['status']
+
+status = asyncio.run(first_request())
+served_at = time.perf_counter()
+assert status == 404, status
+print(json.dumps({
+    'import_ms': (imported_at - started_at) * 1000,
+    'get_app_ms': (built_at - imported_at) * 1000,
+    'first_request_ms': (served_at - built_at) * 1000,
+    'total_ms': (served_at - started_at) * 1000
+}))
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def run(samples: int = 10) -> Dict[str, float]:
+    """Median of each phase over ``samples`` fresh interpreters."""
+    phases: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(samples):
+        result = json.loads(_python('-c', SAMPLE).stdout.splitlines()[-1])
+        for name, value in result.items():
+            phases[name].append(value)
+    return {name: statistics.median(values) for name, values in phases.items()}
+
+
+def profile_imports(top: int = 15) -> Tuple[Dict[str, float],
+                                             List[Tuple[str, float]]]:
+    """Self import time in ms per top-level package and per workshop module."""
+    stderr = _python('-X', 'importtime', '-c', SAMPLE).stderr
+    packages: Dict[str, float] = defaultdict(float)
+    modules: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        self_ms = int(self_us) / 1000
+        packages[name.split('.')[0]] += self_ms
+        if name.startswith('workshop'):
+            modules.append((name, self_ms))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    ranked = dict(sorted(packages.items(), key=lambda item: item[1],
+                         reverse=True)[:top])
+    return ranked, modules[:top]
+
+
+def print_profile(top: int = 15) -> None:
+    packages, modules = profile_imports(top)
+    print(f'{"package":40} {"self ms":>9}')
+    for name, value in packages.items():
+        print(f'{name:40} {value:9.1f}')
+    print(f'\n{"workshop module":40} {"self ms":>9}')
+    for name, value in modules:
+        print(f'{name:40} {value:9.1f}')
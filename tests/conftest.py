@@ -0,0 +1,85 @@
+import asyncio
+from typing import Callable, Dict, Iterator
+
+from fastapi.testclient import TestClient
+import pytest
+
+from workshop.app import get_app
+from workshop.config import get_settings
+from workshop.db import dispose_database, get_database
+from workshop.db.models import Base
+from workshop.services.auth import get_access_token_cache
+from workshop.services.operations import get_operations_cache
+from workshop.services.passwords import (
+    get_password_hasher,
+    shutdown_password_hasher
+)
+from workshop.services.rate_limit import get_rate_limiter
+from workshop.services.routing import get_pinned_users
+from workshop.services.sweeper import get_sweeper
+from workshop.services.users import get_profile_cache
+
+
+# Everything built from the settings, so each test can configure its own.
+LAZY = (
+    get_settings,
+    get_database,
+    get_access_token_cache,
+    get_operations_cache,
+    get_password_hasher,
+    get_pinned_users,
+    get_profile_cache,
+    get_rate_limiter,
+    get_sweeper
+)
+
+DEFAULT_ENV = {
+    'RATE_LIMIT_AUTH_RATE': '0',
+    'RATE_LIMIT_READ_RATE': '0',
+    'RATE_LIMIT_WRITE_RATE': '0',
+    # The cheapest scrypt cost, sign-ups are not what is tested here.
+    'SCRYPT_LN': '1'
+}
+
+
+def reset() -> None:
+    shutdown_password_hasher()
+    asyncio.run(dispose_database())
+    for accessor in LAZY:
+        accessor.cache_clear()
+
+
+@pytest.fixture
+def configure(
+    tmp_path,
+    monkeypatch
+) -> Iterator[Callable[..., TestClient]]:
+    """Build the app for a primary SQLite file and the given environment."""
+    def configure(**env: str) -> TestClient:
+        defaults = {
+            **DEFAULT_ENV,
+            'DB_URL': f'sqlite:///{tmp_path / "primary.sqlite"}',
+            'IMPORT_DIR': str(tmp_path / 'imports')
+        }
+        for name, value in {**defaults, **env}.items():
+            monkeypatch.setenv(name, value)
+        reset()
+        Base.metadata.create_all(get_database().engine)
+        return TestClient(get_app())
+
+    yield configure
+    reset()
+
+
+@pytest.fixture
+def sign_up() -> Callable[..., Dict[str, str]]:
+    """Register a user; return the Authorization header for them."""
+    def sign_up(client: TestClient, email: str = 'user@example.com'):
+        response = client.post(
+            '/auth/sign-up',
+            json={'email': email, 'password': 'password'}
+        )
+        assert response.status_code == 201, response.text
+        return {'Authorization': f'Bearer {response.json()["accessToken"]}'}
+
+    return sign_up
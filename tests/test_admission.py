@@ -0,0 +1,30 @@
+import pytest
+
+from workshop.app import default_max_concurrency
+
+
+@pytest.mark.parametrize('env, expected', [
+    # SQLite files get a NullPool: nothing to wait for, nothing shed.
+    ({}, None),
+    # The writer plus the read pool.
+    ({'DB_SQLITE_PERFORMANCE_MODE': '1'}, 5),
+    ({'DB_SQLITE_PERFORMANCE_MODE': '1',
+      'DB_SQLITE_READ_POOL_SIZE': '8',
+      'SERVER_THREADPOOL_SIZE': '6'}, 6)
+])
+def test_default_follows_built_pools(configure, env, expected):
+    configure(**env)
+    assert default_max_concurrency() == expected
+
+
+def test_async_routes_are_not_capped_by_threads(configure, tmp_path):
+    configure(DB_URL=f'sqlite+aiosqlite:///{tmp_path / "primary.sqlite"}',
+              DB_SQLITE_PERFORMANCE_MODE='1',
+              SERVER_THREADPOOL_SIZE='2')
+    assert default_max_concurrency() == 5
+
+
+def test_requests_pass_without_a_limit(configure, sign_up):
+    client = configure()
+    headers = sign_up(client)
+    assert client.get('/operations/', headers=headers).status_code == 200
@@ -0,0 +1,42 @@
+import pytest
+
+from workshop.db import get_database
+from workshop.db.models import User
+from workshop.services.passwords import PasswordHasher
+
+
+CREDENTIALS = {'email': 'user@example.com', 'password': 'password'}
+
+
+@pytest.fixture(autouse=True)
+def no_blocking_hasher(monkeypatch):
+    """Fail if a request thread waits for the hasher pool."""
+    def blocking(*args, **kwargs):
+        raise AssertionError('a request thread waited for the hasher')
+
+    monkeypatch.setattr(PasswordHasher, 'hash', blocking)
+    monkeypatch.setattr(PasswordHasher, 'verify', blocking)
+
+
+def sign_in(client, password='password'):
+    return client.post('/auth/sign-in',
+                       json={**CREDENTIALS, 'password': password})
+
+
+@pytest.mark.parametrize('db_url', ['sqlite', 'sqlite+aiosqlite'])
+def test_sign_up_and_sign_in(configure, sign_up, tmp_path, db_url):
+    client = configure(DB_URL=f'{db_url}:///{tmp_path / "primary.sqlite"}')
+    sign_up(client)
+
+    assert sign_in(client).status_code == 200
+    assert sign_in(client, 'wrong').status_code == 400
+
+
+def test_sign_in_rehashes(configure, sign_up):
+    sign_up(configure())
+    client = configure(SCRYPT_LN='2')
+
+    assert sign_in(client).status_code == 200
+    with get_database().Session() as session:
+        password_hash = session.query(User.password_hash).scalar()
+    assert password_hash.startswith('scrypt$ln=2,')
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from workshop.db import get_database
+from workshop.db.models import OperationTombstone
+from workshop.services.operations import add_tombstones, encode_keyset
+from workshop.services.sweeper import get_sweeper
+
+
+@pytest.fixture
+def client(configure):
+    return configure(PURGE_TOMBSTONE_RETENTION='3600')
+
+
+@pytest.fixture
+def headers(client, sign_up):
+    return sign_up(client)
+
+
+@pytest.fixture
+def user_id(client, headers):
+    return client.get('/users/me', headers=headers).json()['id']
+
+
+def get_changes(client, headers, **params):
+    return client.get('/operations/changes', params=params, headers=headers)
+
+
+def test_old_tombstones_are_purged(client, user_id):
+    now = datetime.utcnow()
+    with get_database().Session() as session, session.begin():
+        add_tombstones(session, user_id, [1, 2], now - timedelta(hours=2))
+        add_tombstones(session, user_id, [3], now)
+
+    assert get_sweeper().sweep('old tombstones') == 2
+
+    with get_database().Session() as session:
+        kept = session.query(OperationTombstone.operation_id).all()
+    assert kept == [(3,)]
+
+
+def test_positions_past_retention_are_gone(client, headers):
+    old = datetime.utcnow() - timedelta(hours=2)
+
+    response = get_changes(client, headers, since=old.isoformat())
+    assert response.status_code == 410
+    response = get_changes(client, headers, cursor=encode_keyset(old, 0))
+    assert response.status_code == 410
+
+
+def test_positions_within_retention_are_served(client, headers, user_id):
+    recent = datetime.utcnow() - timedelta(minutes=30)
+    with get_database().Session() as session, session.begin():
+        add_tombstones(session, user_id, [1])
+
+    response = get_changes(client, headers, since=recent.isoformat())
+    assert response.status_code == 200, response.text
+    assert response.json()['deleted'] == [1]
+    cursor = response.json()['nextCursor']
+
+    response = get_changes(client, headers, cursor=cursor)
+    assert response.status_code == 200, response.text
+    assert response.json()['deleted'] == []
+
+
+def test_aware_cursor_is_paged(client, headers, user_id):
+    recent = datetime.now(timezone.utc) - timedelta(minutes=30)
+    with get_database().Session() as session, session.begin():
+        add_tombstones(session, user_id, [1])
+        add_tombstones(session, user_id, [2])
+
+    # As the feed hands out cursors on Postgres, where the column is aware.
+    response = get_changes(client, headers, limit=1,
+                           cursor=encode_keyset(recent, 0))
+    assert response.status_code == 200, response.text
+    assert response.json()['deleted'] == [1]
+
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+    response = get_changes(client, headers, cursor=encode_keyset(old, 0))
+    assert response.status_code == 410
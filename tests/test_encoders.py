@@ -0,0 +1,43 @@
+from datetime import datetime
+from decimal import Decimal
+import json
+
+import pytest
+
+from workshop.schemas import OperationSchema
+from workshop.schemas.encoders import RowEncoder
+
+
+def numbers_as_text(text):
+    return json.loads(text, parse_float=str, parse_int=str)
+
+
+@pytest.mark.parametrize('amount', ['10.50', '10', '0.01', '1234567.89'])
+def test_row_encoder_matches_pydantic(amount):
+    operation = OperationSchema(
+        id=1,
+        amount=Decimal(amount),
+        type='income',
+        description=None,
+        created_at=datetime(2026, 10, 18, 12, 30),
+        updated_at=datetime(2026, 10, 18, 12, 30, 15, 250)
+    )
+    encoder = RowEncoder(OperationSchema, OperationSchema.__fields__)
+    row = [getattr(operation, name) for name in encoder.fields]
+
+    assert (numbers_as_text(encoder.encode(row))
+            == numbers_as_text(operation.json(by_alias=True)))
+
+
+def test_list_matches_create_response(configure, sign_up):
+    client = configure()
+    headers = sign_up(client)
+    created = client.post(
+        '/operations/',
+        json={'amount': '10.50', 'type': 'income', 'description': 'salary'},
+        headers=headers
+    )
+    listed = client.get('/operations/', headers=headers)
+
+    assert (numbers_as_text(listed.text)['items']
+            == [numbers_as_text(created.text)])
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+from workshop.db import get_database
+from workshop.db.models import IdempotencyKey, Operation
+from workshop.services import IdempotencyService
+from workshop.services.idempotency import REPLAYED_HEADER
+
+
+BODY = {'amount': '10.5', 'type': 'income', 'description': 'salary'}
+
+
+@pytest.fixture
+def client(configure):
+    return configure()
+
+
+@pytest.fixture
+def headers(client, sign_up):
+    return sign_up(client)
+
+
+def post(client, headers, key, body=BODY):
+    return client.post('/operations/', json=body,
+                       headers={**headers, 'Idempotency-Key': key})
+
+
+def count(model):
+    with get_database().Session() as session:
+        return session.query(model).count()
+
+
+def test_replays_stored_response(client, headers):
+    first = post(client, headers, 'key')
+    second = post(client, headers, 'key')
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert REPLAYED_HEADER not in first.headers
+    assert second.headers[REPLAYED_HEADER] == 'true'
+    assert count(Operation) == 1
+
+
+def test_keys_are_per_user(client, headers, sign_up):
+    other_headers = sign_up(client, 'other@example.com')
+    first = post(client, headers, 'key')
+    second = post(client, other_headers, 'key')
+
+    assert first.json()['id'] != second.json()['id']
+    assert REPLAYED_HEADER not in second.headers
+
+
+def test_other_request_with_same_key_is_rejected(client, headers):
+    post(client, headers, 'key')
+    response = post(client, headers, 'key', {**BODY, 'amount': '11'})
+
+    assert response.status_code == 422
+    assert count(Operation) == 1
+
+
+def test_concurrent_duplicates_run_once(client, headers):
+    with ThreadPoolExecutor(8) as executor:
+        responses = list(executor.map(
+            lambda _: post(client, headers, 'key'),
+            range(8)
+        ))
+
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()['id'] for response in responses}) == 1
+    assert sum(REPLAYED_HEADER in response.headers
+               for response in responses) == 7
+    assert count(Operation) == 1
+
+
+def test_response_is_stored_with_the_operation(client, headers, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('crashed before commit')
+
+    with monkeypatch.context() as patch, pytest.raises(RuntimeError):
+        patch.setattr(IdempotencyService, 'complete', fail)
+        post(client, headers, 'key')
+
+    # Neither the operation nor a response was kept, and the key was
+    # released, so the retry runs the request.
+    assert count(Operation) == 0
+    assert count(IdempotencyKey) == 0
+    response = post(client, headers, 'key')
+    assert response.status_code == 200
+    assert REPLAYED_HEADER not in response.headers
+    assert count(Operation) == 1
+
+
+def test_abandoned_key_is_taken_over(configure, sign_up, monkeypatch):
+    client = configure(IDEMPOTENCY_LOCK_TIMEOUT='0')
+    headers = sign_up(client)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError('worker died')
+
+    # A worker that died mid-request kept its key but committed nothing.
+    with monkeypatch.context() as patch, pytest.raises(RuntimeError):
+        patch.setattr(IdempotencyService, 'complete', crash)
+        patch.setattr(IdempotencyService, 'release', lambda *args: None)
+        post(client, headers, 'key')
+    assert count(IdempotencyKey) == 1
+    assert count(Operation) == 0
+
+    response = post(client, headers, 'key')
+    assert response.status_code == 200
+    assert REPLAYED_HEADER not in response.headers
+    assert count(Operation) == 1
@@ -0,0 +1,135 @@
+"""Import jobs across worker restarts, run in this process."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from workshop.db import get_database
+from workshop.db.models import ImportJob, ImportJobStatus, Operation
+from workshop.services import import_jobs
+from workshop.services.import_jobs import (
+    FAILED_ERROR,
+    INTERRUPTED_ERROR,
+    ImportJobsService,
+    recover_import_jobs
+)
+
+
+CSV = b'amount,type,description\n1,income,first\n2,outcome,second\n'
+
+
+@pytest.fixture
+def client(configure):
+    return configure()
+
+
+@pytest.fixture
+def headers(client, sign_up):
+    return sign_up(client)
+
+
+@pytest.fixture
+def user_id(client, headers):
+    return client.get('/users/me', headers=headers).json()['id']
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Jobs queued for the pool, which is not started."""
+    jobs = []
+    monkeypatch.setattr(import_jobs, 'submit_import_job',
+                        lambda user_id, job_id: jobs.append(job_id))
+    return jobs
+
+
+def add_job(user_id, tmp_path, status=ImportJobStatus.PENDING, age=0):
+    path = tmp_path / f'{status.value}-{age}.csv'
+    path.write_bytes(CSV)
+    updated_at = datetime.utcnow() - timedelta(minutes=age)
+    with get_database().Session() as session, session.begin():
+        job = ImportJob(user_id=user_id, file_path=str(path), status=status,
+                        updated_at=updated_at)
+        session.add(job)
+        session.flush()
+        return job.id
+
+
+def get_job(job_id):
+    with get_database().Session() as session:
+        return session.query(ImportJob).get(job_id)
+
+
+def run_job(job_id):
+    with get_database().Session() as session:
+        ImportJobsService(session).run_job(job_id)
+
+
+def count_operations():
+    with get_database().Session() as session:
+        return session.query(Operation).count()
+
+
+def test_recovery_queues_pending_and_fails_interrupted(
+    user_id,
+    tmp_path,
+    submitted
+):
+    pending = add_job(user_id, tmp_path)
+    interrupted = add_job(user_id, tmp_path, ImportJobStatus.RUNNING, age=10)
+    running = add_job(user_id, tmp_path, ImportJobStatus.RUNNING)
+
+    recover_import_jobs()
+
+    assert submitted == [pending]
+    job = get_job(interrupted)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.error == INTERRUPTED_ERROR
+    assert get_job(running).status == ImportJobStatus.RUNNING
+
+
+def test_job_queued_twice_runs_once(user_id, tmp_path):
+    job_id = add_job(user_id, tmp_path)
+
+    run_job(job_id)
+    run_job(job_id)
+
+    job = get_job(job_id)
+    assert job.status == ImportJobStatus.DONE
+    assert job.inserted == 2
+    assert count_operations() == 2
+
+
+def test_failure_is_not_shown_to_client(user_id, tmp_path, caplog):
+    job_id = add_job(user_id, tmp_path)
+    (tmp_path / 'pending-0.csv').write_bytes(b'\xff\xfe')
+
+    with pytest.raises(UnicodeDecodeError):
+        run_job(job_id)
+
+    job = get_job(job_id)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.error == FAILED_ERROR
+    assert 'UnicodeDecodeError' in caplog.text
+
+
+def test_running_job_is_served(client, headers, user_id, tmp_path):
+    job_id = add_job(user_id, tmp_path, ImportJobStatus.RUNNING)
+    with get_database().Session() as session, session.begin():
+        session.query(ImportJob).filter_by(id=job_id).update({
+            'started_at': datetime.utcnow() - timedelta(seconds=10),
+            'processed': 100
+        })
+
+    response = client.get(f'/operations/import/{job_id}', headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()['status'] == 'running'
+    assert 0 < response.json()['throughput'] <= 10
+
+
+def test_throughput_of_aware_timestamps():
+    # As Postgres returns timestamptz columns.
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=10)
+    job = ImportJob(id=1, status=ImportJobStatus.RUNNING, processed=100,
+                    inserted=0, rejected=0, started_at=started_at,
+                    created_at=started_at)
+
+    assert 0 < ImportJobsService._to_schema(job).throughput <= 10
@@ -0,0 +1,139 @@
+"""The operations cache next to writers it does not see.
+
+The other writer is a second session on the same database that changes
+rows directly, as another server worker or an import process would.
+"""
+from datetime import datetime
+import time
+
+import pytest
+import sqlalchemy as sa
+
+from workshop.db import get_database
+from workshop.db.models import Operation, OperationType
+from workshop.services.operations import (
+    OperationsService,
+    add_tombstones,
+    get_operations_cache
+)
+
+
+@pytest.fixture
+def client(configure):
+    # Every hit checks its version, so other writes show at once.
+    return configure(OPERATIONS_CACHE_VERSION_CHECK_INTERVAL='0')
+
+
+@pytest.fixture
+def headers(client, sign_up):
+    return sign_up(client)
+
+
+@pytest.fixture
+def user_id(client, headers):
+    return client.get('/users/me', headers=headers).json()['id']
+
+
+def create_operation(client, headers, description):
+    response = client.post(
+        '/operations/',
+        json={'amount': '1', 'type': 'income', 'description': description},
+        headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def descriptions(client, headers):
+    response = client.get('/operations/', headers=headers)
+    assert response.status_code == 200, response.text
+    return [item['description'] for item in response.json()['items']]
+
+
+def test_sees_insert_by_other_session(client, headers, user_id):
+    create_operation(client, headers, 'mine')
+    assert descriptions(client, headers) == ['mine']
+
+    with get_database().Session() as session, session.begin():
+        session.add(Operation(user_id=user_id, amount=2,
+                              type=OperationType.OUTCOME,
+                              description='theirs'))
+
+    assert sorted(descriptions(client, headers)) == ['mine', 'theirs']
+    assert get_operations_cache().stats()['stale'] == 1
+
+
+def test_sees_update_and_delete_by_other_session(client, headers, user_id):
+    kept = create_operation(client, headers, 'kept')
+    deleted = create_operation(client, headers, 'deleted')
+    assert sorted(descriptions(client, headers)) == ['deleted', 'kept']
+
+    with get_database().Session() as session, session.begin():
+        session.execute(
+            sa.update(Operation)
+            .where(Operation.id == kept['id'])
+            .values(description='changed', updated_at=datetime.utcnow())
+        )
+    assert sorted(descriptions(client, headers)) == ['changed', 'deleted']
+
+    with get_database().Session() as session, session.begin():
+        session.execute(
+            sa.delete(Operation).where(Operation.id == deleted['id'])
+        )
+        add_tombstones(session, user_id, [deleted['id']])
+    assert descriptions(client, headers) == ['changed']
+    assert client.get(f'/operations/{deleted["id"]}',
+                      headers=headers).status_code == 404
+
+
+def test_no_stale_not_modified(client, headers):
+    operation = create_operation(client, headers, 'before')
+    first = client.get('/operations/', headers=headers)
+    etag = first.headers['ETag']
+    assert client.get('/operations/', headers={
+        **headers, 'If-None-Match': etag
+    }).status_code == 304
+
+    with get_database().Session() as session, session.begin():
+        session.execute(
+            sa.update(Operation)
+            .where(Operation.id == operation['id'])
+            .values(description='after', updated_at=datetime.utcnow())
+        )
+
+    response = client.get('/operations/', headers={
+        **headers, 'If-None-Match': etag
+    })
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json()['items'][0]['description'] == 'after'
+
+
+def test_version_checked_once_per_interval(
+    configure,
+    sign_up,
+    monkeypatch
+):
+    client = configure(OPERATIONS_CACHE_VERSION_CHECK_INTERVAL='0.5')
+    headers = sign_up(client)
+    user_id = client.get('/users/me', headers=headers).json()['id']
+    create_operation(client, headers, 'mine')
+
+    checks = []
+    check = OperationsService._operations_version
+    monkeypatch.setattr(
+        OperationsService, '_operations_version',
+        lambda self, user_id: checks.append(user_id) or check(self, user_id)
+    )
+
+    assert descriptions(client, headers) == ['mine']
+    with get_database().Session() as session, session.begin():
+        session.add(Operation(user_id=user_id, amount=2,
+                              type=OperationType.OUTCOME,
+                              description='theirs'))
+    # Within the interval the verified entry is served as it is.
+    assert descriptions(client, headers) == ['mine']
+    assert checks == []
+
+    time.sleep(0.5)
+    assert sorted(descriptions(client, headers)) == ['mine', 'theirs']
@@ -0,0 +1,116 @@
+"""Read routing against a primary and a replica SQLite file.
+
+The replica is a separate file that only changes when a test copies the
+primary into it, so a read shows which of the two served it.
+"""
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from workshop.db.models import Base
+from workshop.services.routing import get_pinned_users
+
+
+@pytest.fixture(params=['sqlite', 'sqlite+aiosqlite'])
+def paths(request, tmp_path):
+    if request.param == 'sqlite+aiosqlite':
+        pytest.importorskip('aiosqlite')
+    primary = tmp_path / 'primary.sqlite'
+    replica = tmp_path / 'replica.sqlite'
+    engine = create_engine(f'sqlite:///{replica}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return request.param, primary, replica
+
+
+@pytest.fixture
+def client(configure, paths):
+    driver, primary, replica = paths
+    return configure(
+        DB_URL=f'{driver}:///{primary}',
+        DB_REPLICA_URLS=json.dumps([f'{driver}:///{replica}']),
+        # Operation lists would be answered from memory.
+        OPERATIONS_CACHE_MAX_BYTES='0'
+    )
+
+
+@pytest.fixture
+def replicate(paths):
+    """Bring the replica up to date with the primary."""
+    _, primary, replica = paths
+
+    def replicate():
+        source = sqlite3.connect(primary)
+        target = sqlite3.connect(replica)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    return replicate
+
+
+def create_operation(client, headers, description='coffee'):
+    response = client.post(
+        '/operations/',
+        json={'amount': '10.5', 'type': 'outcome',
+              'description': description},
+        headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_read_only_methods_use_replica(client, sign_up, replicate):
+    headers = sign_up(client)
+
+    # Signing up pins nobody, and the replica has not seen the user yet.
+    assert client.get('/users/me', headers=headers).status_code == 404
+
+    replicate()
+    assert client.get('/users/me', headers=headers).status_code == 200
+
+
+def test_writes_pin_user_to_primary(client, sign_up, replicate):
+    headers = sign_up(client)
+    other_headers = sign_up(client, 'other@example.com')
+    replicate()
+
+    operation = create_operation(client, headers)
+    create_operation(client, other_headers)
+    page = client.get('/operations/', headers=headers).json()
+    assert [item['id'] for item in page['items']] == [operation['id']]
+    assert client.get(f'/operations/{operation["id"]}',
+                      headers=headers).status_code == 200
+
+    # Once the pins are gone, reads see the lagging replica again.
+    get_pinned_users().clear()
+    assert client.get('/operations/', headers=headers).json()['items'] == []
+
+
+def test_pin_is_per_user(client, sign_up, replicate):
+    headers = sign_up(client)
+    other_headers = sign_up(client, 'other@example.com')
+    replicate()
+
+    create_operation(client, headers)
+    assert client.get('/operations/',
+                      headers=other_headers).json()['items'] == []
+
+
+def test_export_follows_pinning(client, sign_up, replicate):
+    headers = sign_up(client)
+    replicate()
+
+    create_operation(client, headers, 'exported')
+    lines = client.get('/operations/export',
+                       headers=headers).text.splitlines()
+    assert [json.loads(line)['description'] for line in lines] == [
+        'exported'
+    ]
+
+    get_pinned_users().clear()
+    assert client.get('/operations/export', headers=headers).text == ''
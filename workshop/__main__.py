@@ -0,0 +1,5 @@
+from workshop.server import main
+
+
+if __name__ == '__main__':
+    main()
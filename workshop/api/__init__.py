@@ -1,12 +1,13 @@
-from fastapi import APIRouter
-
-from .auth import router as auth_router
-from .operations import router as operations_router
-from .users import router as users_router
+from typing import List
 
+from fastapi import APIRouter
 
-router = APIRouter()
 
-router.include_router(operations_router)
-router.include_router(auth_router)
-router.include_router(users_router)
+def get_routers(use_async: bool) -> List[APIRouter]:
+    # Only the flavour that is served gets imported; the app includes the
+    # routers directly so their routes are copied once.
+    if use_async:
+        from .aio import auth, operations, users
+    else:
+        from . import auth, operations, users
+    return [operations.router, auth.router, users.router]
@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends
+
+from workshop.services.aio import AsyncAuthService
+from workshop.services.rate_limit import limit_by_address
+from workshop.schemas import UserCredentials, JsonWebTokens, RefreshToken
+
+
+router = APIRouter(
+    prefix='/auth',
+    tags=['Auth'],
+    dependencies=[Depends(limit_by_address)]
+)
+
+
+@router.post('/sign-up', response_model=JsonWebTokens, status_code=HTTPStatus.CREATED)
+async def sign_up(
+    payload: UserCredentials,
+    service: AsyncAuthService = Depends()
+):
+    return await service.register_user(payload)
+
+
+@router.post('/sign-in', response_model=JsonWebTokens)
+async def sign_in(
+    payload: UserCredentials,
+    service: AsyncAuthService = Depends()
+):
+    return await service.authenticate_user(payload)
+
+
+@router.post('/refresh-tokens', response_model=JsonWebTokens)
+async def refresh_tokens(
+    payload: RefreshToken,
+    service: AsyncAuthService = Depends()
+):
+    return await service.refresh_tokens(payload)
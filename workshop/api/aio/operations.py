@@ -0,0 +1,235 @@
+from datetime import date, datetime
+from decimal import Decimal
+from http import HTTPStatus
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    Query,
+    Path,
+    Response,
+    UploadFile
+)
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from workshop.db.models import OperationType
+from workshop.services.idempotency import (
+    StoredResponse,
+    request_fingerprint
+)
+from workshop.services.operations import EXPORT_MEDIA_TYPES
+from workshop.services.rate_limit import limit_by_user
+from workshop.services import strict_authorizer
+from workshop.services.aio import (
+    AsyncIdempotencyService,
+    AsyncImportJobsService,
+    AsyncOperationsService,
+    AsyncSummaryService
+)
+from workshop.schemas import (
+    ExportFormat,
+    ImportJobSchema,
+    OperationChangesSchema,
+    OperationSchema,
+    OperationCreateSchema,
+    OperationUpdateSchema,
+    OperationsFilterSchema,
+    OperationsPageSchema,
+    OperationsBatchSchema,
+    OperationsBatchResultSchema,
+    OperationsSummarySchema,
+    SummaryPeriod
+)
+
+
+router = APIRouter(
+    prefix='/operations',
+    tags=['Operations'],
+    dependencies=[Depends(limit_by_user)]
+)
+
+
+@router.get('/', response_model=OperationsPageSchema)
+async def get_operations(
+    service: AsyncOperationsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    type_: Optional[OperationType] = Query(None, alias='type'),
+    created_from: Optional[datetime] = Query(None, alias='createdFrom'),
+    created_to: Optional[datetime] = Query(None, alias='createdTo'),
+    min_amount: Optional[Decimal] = Query(None, alias='minAmount'),
+    max_amount: Optional[Decimal] = Query(None, alias='maxAmount'),
+    q: Optional[str] = Query(None, max_length=256),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None)
+):
+    filters = OperationsFilterSchema(
+        type=type_,
+        created_from=created_from,
+        created_to=created_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        q=q
+    )
+    etag, content = await service.get_operations_json_if_changed(
+        user_id,
+        filters,
+        cursor=cursor,
+        limit=limit,
+        if_none_match=if_none_match
+    )
+    if content is None:
+        return Response(status_code=HTTPStatus.NOT_MODIFIED,
+                        headers={'ETag': etag})
+    return Response(content, media_type='application/json',
+                    headers={'ETag': etag})
+
+
+@router.get('/changes', response_model=OperationChangesSchema)
+async def get_changes(
+    service: AsyncOperationsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    since: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(1000, ge=1, le=1000)
+):
+    return await service.get_changes(
+        user_id,
+        since=since,
+        cursor=cursor,
+        limit=limit
+    )
+
+
+@router.get('/summary', response_model=OperationsSummarySchema)
+async def get_summary(
+    service: AsyncSummaryService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    period: SummaryPeriod = Query(SummaryPeriod.MONTH),
+    date_from: Optional[date] = Query(None, alias='dateFrom'),
+    date_to: Optional[date] = Query(None, alias='dateTo')
+):
+    return await service.get_summary(
+        user_id,
+        period=period,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_operations(
+    service: AsyncOperationsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    format_: ExportFormat = Query(ExportFormat.NDJSON, alias='format')
+):
+    return StreamingResponse(
+        service.iter_export(user_id, format_),
+        media_type=EXPORT_MEDIA_TYPES[format_],
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="operations.{format_.value}"'
+        }
+    )
+
+
+@router.post('/', response_model=OperationSchema)
+async def create_operation(
+    payload: OperationCreateSchema,
+    user_id: int = Depends(strict_authorizer),
+    service: AsyncOperationsService = Depends(),
+    idempotency: AsyncIdempotencyService = Depends(),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
+    if idempotency_key is None:
+        return await service.create_operation(user_id, payload)
+
+    async def handle() -> StoredResponse:
+        operation = await service.create_operation(user_id, payload)
+        return StoredResponse.from_schema(OperationSchema.from_orm(operation))
+
+    return await idempotency.run(
+        user_id,
+        idempotency_key,
+        request_fingerprint('POST /operations/', payload.json().encode()),
+        handle
+    )
+
+
+@router.post('/batch', response_model=List[OperationsBatchResultSchema])
+async def apply_batch(
+    payload: OperationsBatchSchema,
+    user_id: int = Depends(strict_authorizer),
+    service: AsyncOperationsService = Depends()
+):
+    return await service.apply_batch(user_id, payload.items)
+
+
+@router.get('/{operationId}', response_model=OperationSchema)
+async def get_operation(
+    operation_id: int = Path(alias='operationId'),
+    user_id: int = Depends(strict_authorizer),
+    service: AsyncOperationsService = Depends()
+):
+    return await service.get_operation(user_id, operation_id)
+
+
+@router.patch('/{operationId}', response_model=OperationSchema)
+async def update_operation(
+    payload: OperationUpdateSchema,
+    user_id: int = Depends(strict_authorizer),
+    operation_id: int = Path(alias='operationId'),
+    service: AsyncOperationsService = Depends()
+):
+    return await service.update_operation(user_id, operation_id, payload)
+
+
+@router.delete('/{operationId}', status_code=HTTPStatus.NO_CONTENT)
+async def delete_operation(
+    operation_id: int = Path(alias='operationId'),
+    user_id: int = Depends(strict_authorizer),
+    service: AsyncOperationsService = Depends()
+):
+    await service.delete_operation(user_id, operation_id)
+    return Response(status_code=HTTPStatus.NO_CONTENT)
+
+
+@router.post(
+    '/import',
+    response_model=ImportJobSchema,
+    status_code=HTTPStatus.ACCEPTED
+)
+async def import_operations(
+    service: AsyncImportJobsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    body: UploadFile = File(...),
+    idempotency: AsyncIdempotencyService = Depends(),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
+    if idempotency_key is None:
+        return await service.create_job(user_id, body.file)
+
+    async def handle() -> StoredResponse:
+        job = await service.create_job(user_id, body.file)
+        return StoredResponse.from_schema(job, HTTPStatus.ACCEPTED)
+
+    return await idempotency.run(
+        user_id,
+        idempotency_key,
+        await run_in_threadpool(request_fingerprint,
+                                'POST /operations/import', body.file),
+        handle
+    )
+
+
+@router.get('/import/{jobId}', response_model=ImportJobSchema)
+async def get_import_job(
+    job_id: int = Path(alias='jobId'),
+    user_id: int = Depends(strict_authorizer),
+    service: AsyncImportJobsService = Depends()
+):
+    return await service.get_job(user_id, job_id)
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Response
+
+from workshop.etag import etag_matches
+from workshop.services import strict_authorizer
+from workshop.services.aio import AsyncUsersService
+from workshop.schemas import (
+    UserSchema,
+    UserUpdateSchema,
+    SelfUserSchema
+)
+
+
+router = APIRouter(prefix='/users', tags=['Users'])
+
+
+@router.get('/me', response_model=SelfUserSchema)
+async def get_self(
+    service: AsyncUsersService = Depends(),
+    user_id: int = Depends(strict_authorizer)
+):
+    return await service.get_user_with_id(user_id)
+
+
+@router.patch('/me', response_model=SelfUserSchema)
+async def update_self(
+    payload: UserUpdateSchema,
+    service: AsyncUsersService = Depends(),
+    user_id: int = Depends(strict_authorizer)
+):
+    return await service.update_user(user_id, payload)
+
+
+@router.get('/{username}', response_model=UserSchema)
+async def get_user(
+    username: str,
+    service: AsyncUsersService = Depends(),
+    if_none_match: Optional[str] = Header(None)
+):
+    etag, content = await service.get_user_profile(username)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED,
+                        headers={'ETag': etag})
+    return Response(content, media_type='application/json',
+                    headers={'ETag': etag})
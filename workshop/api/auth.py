@@ -3,20 +3,25 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends
 
 from workshop.services import AuthService
+from workshop.services.rate_limit import limit_by_address
 from workshop.schemas import UserCredentials, JsonWebTokens, RefreshToken
 
 
-router = APIRouter(prefix='/auth', tags=['Auth'])
+router = APIRouter(
+    prefix='/auth',
+    tags=['Auth'],
+    dependencies=[Depends(limit_by_address)]
+)
 
 
 @router.post('/sign-up', response_model=JsonWebTokens, status_code=HTTPStatus.CREATED)
-def sign_up(payload: UserCredentials, service: AuthService = Depends()):
-    return service.register_user(payload)
+async def sign_up(payload: UserCredentials, service: AuthService = Depends()):
+    return await service.register_user(payload)
 
 
 @router.post('/sign-in', response_model=JsonWebTokens)
-def sign_in(payload: UserCredentials, service: AuthService = Depends()):
-    return service.authenticate_user(payload)
+async def sign_in(payload: UserCredentials, service: AuthService = Depends()):
+    return await service.authenticate_user(payload)
 
 
 @router.post('/refresh-tokens', response_model=JsonWebTokens)
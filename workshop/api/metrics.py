@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, Union
+
+from fastapi import APIRouter, Response
+
+from workshop.db import get_database
+from workshop.metrics import CONTENT_TYPE, Counter, Gauge, Metric, registry
+from workshop.services.auth import get_access_token_cache
+from workshop.services.operations import get_operations_cache
+from workshop.services.users import get_profile_cache
+
+
+router = APIRouter(tags=['Metrics'])
+
+
+# Stats that only grow; exposed as counters, the others as gauges.
+COUNTED_STATS = frozenset((
+    'hits', 'misses', 'stale', 'evictions', 'errors',
+    'connects', 'checkouts', 'checkins', 'invalidations', 'wait_count',
+    'wait_time_total'
+))
+
+
+def _stats_metrics(
+    prefix: str,
+    documentation: str,
+    label: str,
+    stats: Dict[str, Dict[str, float]]
+) -> Iterable[Metric]:
+    metrics: Dict[str, Union[Counter, Gauge]] = {}
+    for label_value, values in stats.items():
+        for key, value in values.items():
+            metric = metrics.get(key)
+            if metric is None:
+                if key in COUNTED_STATS:
+                    # Counter adds the _total suffix itself.
+                    metric = Counter(f'{prefix}_{key.removesuffix("_total")}',
+                                     f'{documentation} ({key}).', (label,))
+                else:
+                    metric = Gauge(f'{prefix}_{key}',
+                                   f'{documentation} ({key}).', (label,))
+                metrics[key] = metric
+            if isinstance(metric, Counter):
+                # Built at every scrape, so this sets the running total.
+                metric.inc(label_value, amount=value)
+            else:
+                metric.set(label_value, value=value)
+    return metrics.values()
+
+
+def collect_pool_metrics() -> Iterable[Metric]:
+    database = get_database()
+    stats = {'sync': database.pool_metrics.snapshot()}
+    if database.async_pool_metrics.engine is not None:
+        stats['async'] = database.async_pool_metrics.snapshot()
+    for index, metrics in enumerate(database.replica_pool_metrics):
+        stats[f'replica{index}'] = metrics.snapshot()
+    for index, metrics in enumerate(database.async_replica_pool_metrics):
+        stats[f'async_replica{index}'] = metrics.snapshot()
+    if database.read_engines:
+        stats['read'] = database.read_pool_metrics.snapshot()
+    if database.async_read_engines:
+        stats['async_read'] = database.async_read_pool_metrics.snapshot()
+    return _stats_metrics('db_pool', 'Database connection pool', 'engine',
+                         stats)
+
+
+def collect_cache_metrics() -> Iterable[Metric]:
+    return _stats_metrics('cache', 'In-process cache', 'cache',
+                         {'access_token': get_access_token_cache().stats(),
+                          'user_profile': get_profile_cache().stats(),
+                          'user_operations': get_operations_cache().stats()})
+
+
+registry.add_collector(collect_pool_metrics)
+registry.add_collector(collect_cache_metrics)
+
+
+@router.get('/metrics', include_in_schema=False)
+def metrics():
+    """The registry of the worker process that takes the scrape.
+
+    Caches, pools and counters are all per process, and the pre-forking
+    server's workers share one port: with several workers, consecutive
+    scrapes read different workers, so a counter seems to reset whenever
+    the worker changes. Scrape a single-worker server for exact totals.
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,45 +1,168 @@
+from datetime import date, datetime
+from decimal import Decimal
 from http import HTTPStatus
 from typing import List, Optional
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     File,
+    Header,
     Query,
     Path,
     Response,
     UploadFile
 )
+from fastapi.responses import StreamingResponse
 
 from workshop.db.models import OperationType
-from workshop.services import OperationsService, strict_authorizer
+from workshop.services.idempotency import (
+    StoredResponse,
+    request_fingerprint
+)
+from workshop.services.operations import EXPORT_MEDIA_TYPES
+from workshop.services.rate_limit import limit_by_user
+from workshop.services import (
+    IdempotencyService,
+    ImportJobsService,
+    OperationsService,
+    SummaryService,
+    strict_authorizer
+)
 from workshop.schemas import (
+    ExportFormat,
+    ImportJobSchema,
+    OperationChangesSchema,
     OperationSchema,
     OperationCreateSchema,
-    OperationUpdateSchema
+    OperationUpdateSchema,
+    OperationsFilterSchema,
+    OperationsPageSchema,
+    OperationsBatchSchema,
+    OperationsBatchResultSchema,
+    OperationsSummarySchema,
+    SummaryPeriod
 )
 
 
-router = APIRouter(prefix='/operations', tags=['Operations'])
+router = APIRouter(
+    prefix='/operations',
+    tags=['Operations'],
+    dependencies=[Depends(limit_by_user)]
+)
 
 
-@router.get('/', response_model=List[OperationSchema])
+@router.get('/', response_model=OperationsPageSchema)
 def get_operations(
     service: OperationsService = Depends(),
     user_id: int = Depends(strict_authorizer),
-    type_: Optional[OperationType] = Query(None, alias='type')
+    type_: Optional[OperationType] = Query(None, alias='type'),
+    created_from: Optional[datetime] = Query(None, alias='createdFrom'),
+    created_to: Optional[datetime] = Query(None, alias='createdTo'),
+    min_amount: Optional[Decimal] = Query(None, alias='minAmount'),
+    max_amount: Optional[Decimal] = Query(None, alias='maxAmount'),
+    q: Optional[str] = Query(None, max_length=256),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None)
+):
+    filters = OperationsFilterSchema(
+        type=type_,
+        created_from=created_from,
+        created_to=created_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        q=q
+    )
+    etag, content = service.get_operations_json_if_changed(
+        user_id,
+        filters,
+        cursor=cursor,
+        limit=limit,
+        if_none_match=if_none_match
+    )
+    if content is None:
+        return Response(status_code=HTTPStatus.NOT_MODIFIED,
+                        headers={'ETag': etag})
+    return Response(content, media_type='application/json',
+                    headers={'ETag': etag})
+
+
+@router.get('/changes', response_model=OperationChangesSchema)
+def get_changes(
+    service: OperationsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    since: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(1000, ge=1, le=1000)
+):
+    return service.get_changes(
+        user_id,
+        since=since,
+        cursor=cursor,
+        limit=limit
+    )
+
+
+@router.get('/summary', response_model=OperationsSummarySchema)
+def get_summary(
+    service: SummaryService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    period: SummaryPeriod = Query(SummaryPeriod.MONTH),
+    date_from: Optional[date] = Query(None, alias='dateFrom'),
+    date_to: Optional[date] = Query(None, alias='dateTo')
+):
+    return service.get_summary(
+        user_id,
+        period=period,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+
+@router.get('/export', response_class=StreamingResponse)
+def export_operations(
+    service: OperationsService = Depends(),
+    user_id: int = Depends(strict_authorizer),
+    format_: ExportFormat = Query(ExportFormat.NDJSON, alias='format')
 ):
-    return service.get_operations(user_id, type_=type_)
+    return StreamingResponse(
+        service.iter_export(user_id, format_),
+        media_type=EXPORT_MEDIA_TYPES[format_],
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="operations.{format_.value}"'
+        }
+    )
 
 
 @router.post('/', response_model=OperationSchema)
 def create_operation(
     payload: OperationCreateSchema,
     user_id: int = Depends(strict_authorizer),
+    service: OperationsService = Depends(),
+    idempotency: IdempotencyService = Depends(),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
+    if idempotency_key is None:
+        return service.create_operation(user_id, payload)
+    return idempotency.run(
+        user_id,
+        idempotency_key,
+        request_fingerprint('POST /operations/', payload.json().encode()),
+        lambda: StoredResponse.from_schema(OperationSchema.from_orm(
+            service.create_operation(user_id, payload)
+        ))
+    )
+
+
+@router.post('/batch', response_model=List[OperationsBatchResultSchema])
+def apply_batch(
+    payload: OperationsBatchSchema,
+    user_id: int = Depends(strict_authorizer),
     service: OperationsService = Depends()
 ):
-    return service.create_operation(user_id, payload)
+    return service.apply_batch(user_id, payload.items)
 
 
 @router.get('/{operationId}', response_model=OperationSchema)
@@ -71,16 +194,35 @@ def delete_operation(
     return Response(status_code=HTTPStatus.NO_CONTENT)
 
 
-@router.post('/import')
+@router.post(
+    '/import',
+    response_model=ImportJobSchema,
+    status_code=HTTPStatus.ACCEPTED
+)
 def import_operations(
-    background_tasks: BackgroundTasks,
-    service: OperationsService = Depends(),
+    service: ImportJobsService = Depends(),
     user_id: int = Depends(strict_authorizer),
-    body: UploadFile = File(...)
+    body: UploadFile = File(...),
+    idempotency: IdempotencyService = Depends(),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
 ):
-    background_tasks.add_task(
-        service.import_operations,
+    if idempotency_key is None:
+        return service.create_job(user_id, body.file)
+    return idempotency.run(
         user_id,
-        body.file
+        idempotency_key,
+        request_fingerprint('POST /operations/import', body.file),
+        lambda: StoredResponse.from_schema(
+            service.create_job(user_id, body.file),
+            HTTPStatus.ACCEPTED
+        )
     )
-    return Response()
+
+
+@router.get('/import/{jobId}', response_model=ImportJobSchema)
+def get_import_job(
+    job_id: int = Path(alias='jobId'),
+    user_id: int = Depends(strict_authorizer),
+    service: ImportJobsService = Depends()
+):
+    return service.get_job(user_id, job_id)
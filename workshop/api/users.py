@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends
+from http import HTTPStatus
+from typing import Optional
 
+from fastapi import APIRouter, Depends, Header, Response
+
+from workshop.etag import etag_matches
 from workshop.services import strict_authorizer, UsersService
 from workshop.schemas import (
     UserSchema,
@@ -29,5 +33,14 @@ def update_self(
 
 
 @router.get('/{username}', response_model=UserSchema)
-def get_user(username: str, service: UsersService = Depends()):
-    return service.get_user_with_username(username)
+def get_user(
+    username: str,
+    service: UsersService = Depends(),
+    if_none_match: Optional[str] = Header(None)
+):
+    etag, content = service.get_user_profile(username)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED,
+                        headers={'ETag': etag})
+    return Response(content, media_type='application/json',
+                    headers={'ETag': etag})
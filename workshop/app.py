@@ -1,12 +1,79 @@
+from typing import Optional
+
+from anyio.to_thread import current_default_thread_limiter
 from fastapi import FastAPI
 
-from workshop.api import router
-from workshop.config import settings
+from workshop.config import get_settings
+from workshop.db import dispose_database, get_database, is_async_url
+from workshop.middleware import (
+    AdmissionMiddleware,
+    MetricsMiddleware,
+    QueryProfilingMiddleware
+)
+
+
+def set_threadpool_size() -> None:
+    # Sync routes and dependencies share anyio's default thread limiter.
+    limiter = current_default_thread_limiter()
+    limiter.total_tokens = get_settings().server.threadpool_size
+
+
+def default_max_concurrency() -> Optional[int]:
+    """Requests served without waiting for a connection or a thread.
+
+    From the pools of the engines actually built, None (no shedding) when
+    they are unbounded; sync routes also need a thread each.
+    """
+    settings = get_settings()
+    limit = get_database().connection_limit()
+    if limit is not None and not is_async_url(settings.db_url):
+        limit = min(limit, settings.server.threadpool_size)
+    return limit
 
 
 def get_app() -> FastAPI:
+    from workshop.api import get_routers
+    from workshop.api.metrics import router as metrics_router
+    from workshop.services import (
+        get_sweeper,
+        recover_import_jobs,
+        shutdown_import_pool
+    )
+    from workshop.services.passwords import shutdown_password_hasher
+
+    settings = get_settings()
     app = FastAPI()
+    max_concurrency = settings.server.max_concurrency
+    if max_concurrency is None:
+        max_concurrency = default_max_concurrency
+    if max_concurrency != 0:
+        # Inside MetricsMiddleware, so shed requests are counted as 503s.
+        app.add_middleware(
+            AdmissionMiddleware,
+            max_concurrency=max_concurrency,
+            retry_after=settings.server.shed_retry_after.total_seconds()
+        )
+    app.add_middleware(MetricsMiddleware)
+    if settings.profiling.enabled:
+        app.add_middleware(
+            QueryProfilingMiddleware,
+            statement_budget=settings.profiling.statement_budget,
+            keep_slowest=settings.profiling.keep_slowest
+        )
+    # Engines are created while the server starts rather than at import
+    # time or on the first request.
+    app.add_event_handler('startup', get_database)
+    app.add_event_handler('startup', set_threadpool_size)
+    app.add_event_handler('startup', recover_import_jobs)
+    sweeper = get_sweeper()
+    app.add_event_handler('startup', sweeper.start)
+    app.add_event_handler('shutdown', sweeper.shutdown)
+    app.add_event_handler('shutdown', shutdown_import_pool)
+    app.add_event_handler('shutdown', shutdown_password_hasher)
+    app.add_event_handler('shutdown', dispose_database)
 
-    app.include_router(router)
+    for router in get_routers(is_async_url(settings.db_url)):
+        app.include_router(router)
+    app.include_router(metrics_router)
 
     return app
@@ -1,19 +1,241 @@
 from datetime import timedelta
-from pydantic import BaseSettings
+from enum import Enum
+from functools import lru_cache
+import os
+from typing import Any, List, Optional
+
+from pydantic import BaseSettings, Field
 
 
 class AuthSettings(BaseSettings):
     jwt_secret: str = 'secret_key'
     access_token_expires_in: timedelta = timedelta(days=1)
     refresh_token_expires_in: timedelta = timedelta(weeks=2)
+    token_cache_size: int = 10000
+    token_cache_ttl: timedelta = timedelta(minutes=5)
+    scrypt_ln: int = 14
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    password_hash_workers: int = os.cpu_count() or 1
+    password_hash_queue_size: int = 64
+    password_hash_timeout: float = 5.0
+
+
+class PoolSettings(BaseSettings):
+    # Applied to backends with a real connection pool (Postgres, MySQL);
+    # SQLite keeps SQLAlchemy's per-dialect pool unless
+    # SqliteSettings.performance_mode sizes it.
+    size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30.0
+    pre_ping: bool = True
+    recycle: timedelta = timedelta(minutes=30)
+    # Postgres only.
+    statement_timeout: Optional[timedelta] = None
+
+    class Config:
+        env_prefix = 'db_pool_'
+
+
+class ReplicaSettings(BaseSettings):
+    # Read-only copies of db_url using the same driver; read-only service
+    # methods pick one at random, e.g. DB_REPLICA_URLS='["sqlite:///r.db"]'.
+    urls: List[str] = []
+    # After a write, that user's reads stay on the primary for this long.
+    # Pins are kept per process: with several server workers a request
+    # may reach a worker that did not see the write and read a replica
+    # that has not caught up yet.
+    read_your_writes: timedelta = timedelta(seconds=5)
+
+    class Config:
+        env_prefix = 'db_replica_'
+
+
+class SqliteSettings(BaseSettings):
+    # File databases only. Performance mode switches to WAL with the
+    # pragmas below, sends every write through one connection and gives
+    # read-only service methods a pool of their own.
+    performance_mode: bool = False
+    busy_timeout: timedelta = timedelta(seconds=5)
+    cache_size_kib: int = 64 * 1024
+    mmap_size: int = 256 * 1024 * 1024
+    read_pool_size: int = 4
+    # How long a caller waits for the writer or a reader connection.
+    pool_timeout: float = 30.0
+
+    class Config:
+        env_prefix = 'db_sqlite_'
+
+
+class CacheBackendName(str, Enum):
+    MEMORY = 'memory'
+    REDIS = 'redis'
+
+
+class ResponseCacheSettings(BaseSettings):
+    backend: CacheBackendName = CacheBackendName.MEMORY
+    redis_url: str = 'redis://localhost:6379/0'
+    # Entry limit of the in-process backend.
+    size: int = 10000
+    ttl: timedelta = timedelta(minutes=1)
+
+    class Config:
+        env_prefix = 'response_cache_'
+
+
+class OperationsCacheSettings(BaseSettings):
+    # Per-process copy of each user's operations list, updated by this
+    # process' writes; max_bytes=0 disables it. A hit is checked against
+    # the user's latest write and deletion in the database, one indexed
+    # query instead of the page's, at most once per version_check_interval:
+    # writes of other workers and import processes show within that long.
+    # 0 checks every hit.
+    max_bytes: int = 64 * 1024 * 1024
+    shards: int = 16
+    # Users with more operations are always read from the database.
+    max_user_operations: int = 10000
+    # Bounds how long a write stays invisible that committed after a
+    # newer one, so it did not move the latest write time.
+    ttl: timedelta = timedelta(minutes=1)
+    version_check_interval: timedelta = timedelta(seconds=1)
+
+    class Config:
+        env_prefix = 'operations_cache_'
+
+
+class RateLimitSettings(BaseSettings):
+    # Token buckets: a client can send ``burst`` requests at once, then
+    # ``rate`` per second. A rate of 0 turns the group's limit off.
+    # The memory backend counts per process; redis shares the buckets
+    # between workers and hosts.
+    backend: CacheBackendName = CacheBackendName.MEMORY
+    redis_url: str = 'redis://localhost:6379/0'
+    # Buckets kept by the memory backend, least recently used dropped first.
+    max_keys: int = 100000
+    # /auth routes, by client IP.
+    auth_rate: float = 0.2
+    auth_burst: int = 10
+    # /operations routes, by user: GET and HEAD are reads, the rest writes.
+    read_rate: float = 50.0
+    read_burst: int = 200
+    write_rate: float = 10.0
+    write_burst: int = 50
+
+    class Config:
+        env_prefix = 'rate_limit_'
+
+
+class IdempotencySettings(BaseSettings):
+    # Responses to requests with an Idempotency-Key are replayed this long.
+    ttl: timedelta = timedelta(hours=24)
+    # A retry waits this long for the first request with its key to finish
+    # before giving up with 409.
+    wait_timeout: timedelta = timedelta(seconds=10)
+    # A key left unfinished this long (its worker died) can be taken over.
+    lock_timeout: timedelta = timedelta(minutes=1)
+
+    class Config:
+        env_prefix = 'idempotency_'
+
+
+class PurgeSettings(BaseSettings):
+    # Each worker deletes expired idempotency keys and old tombstones in
+    # batches of batch_size every interval; an interval of 0 never does.
+    interval: timedelta = timedelta(minutes=10)
+    batch_size: int = 1000
+    # Deletions stay in GET /operations/changes this long. Older since and
+    # cursor values are answered with 410: the client syncs from scratch.
+    tombstone_retention: timedelta = timedelta(days=30)
+
+    class Config:
+        env_prefix = 'purge_'
+
+
+class ProfilingSettings(BaseSettings):
+    enabled: bool = False
+    statement_budget: int = 20
+    keep_slowest: int = 3
+
+    class Config:
+        env_prefix = 'sql_profiling_'
+
+
+class ServerSettings(BaseSettings):
+    # Used by ``python -m workshop``; see workshop.server.
+    host: str = '127.0.0.1'
+    port: int = 8000
+    # Worker processes; defaults to the number of CPUs.
+    workers: Optional[int] = None
+    # Threads running sync routes and dependencies (anyio's default is 40).
+    threadpool_size: int = 40
+    # Replace a worker after it served this many requests, plus a random
+    # jitter so workers do not restart together; 0 never does.
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    # In-flight requests get this long to finish on shutdown.
+    graceful_timeout: timedelta = timedelta(seconds=30)
+    keep_alive: timedelta = timedelta(seconds=5)
+    backlog: int = 2048
+    access_log: bool = True
+    # Requests a worker serves at once before it answers new ones with 503
+    # and Retry-After. Defaults to the connections the built engines can
+    # hold (for SQLite performance mode the writer plus read_pool_size),
+    # capped at threadpool_size for sync routes, so no admitted request
+    # waits for a connection or a thread; without a bounded pool (SQLite
+    # by default) nothing is shed. 0 turns shedding off.
+    max_concurrency: Optional[int] = None
+    shed_retry_after: timedelta = timedelta(seconds=1)
+    # uvicorn implementations; 'auto' picks uvloop/httptools if installed.
+    loop: str = 'auto'
+    http: str = 'auto'
+
+    class Config:
+        env_prefix = 'server_'
 
 
 class Settings(BaseSettings):
     db_url: str = 'sqlite:///./database.sqlite'
-    auth: AuthSettings = AuthSettings()
+    import_chunk_size: int = 1000
+    import_dir: str = './imports'
+    import_workers: int = 2
+    # A running import that has not committed progress for this long was
+    # interrupted; a starting worker marks it failed. Pending imports are
+    # queued again by every starting worker, and run once.
+    import_job_timeout: timedelta = timedelta(minutes=5)
+    export_chunk_size: int = 1000
+    # Factories, so the nested sections read the environment when Settings
+    # is built rather than when this module is imported.
+    auth: AuthSettings = Field(default_factory=AuthSettings)
+    pool: PoolSettings = Field(default_factory=PoolSettings)
+    replicas: ReplicaSettings = Field(default_factory=ReplicaSettings)
+    sqlite: SqliteSettings = Field(default_factory=SqliteSettings)
+    response_cache: ResponseCacheSettings = Field(
+        default_factory=ResponseCacheSettings
+    )
+    operations_cache: OperationsCacheSettings = Field(
+        default_factory=OperationsCacheSettings
+    )
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    idempotency: IdempotencySettings = Field(
+        default_factory=IdempotencySettings
+    )
+    purge: PurgeSettings = Field(default_factory=PurgeSettings)
+    profiling: ProfilingSettings = Field(default_factory=ProfilingSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Load the settings on first use instead of at import time."""
+    return Settings(
+        _env_file='.env',
+        _env_file_encoding='utf-8'
+    )
 
 
-settings = Settings(
-    _env_file='.env',
-    _env_file_encoding='utf-8'
-)
+def __getattr__(name: str) -> Any:
+    # ``from workshop.config import settings`` keeps working and only
+    # triggers loading when it is executed.
+    if name == 'settings':
+        return get_settings()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1 +1,19 @@
-from .session import engine, get_session
+from typing import Any
+
+from . import session as _session
+from .routing import RoutingSession
+from .session import (
+    Database,
+    dispose_database,
+    get_async_session,
+    get_database,
+    get_session,
+    is_async_url
+)
+from .transaction import async_atomic, atomic, on_commit
+
+
+def __getattr__(name: str) -> Any:
+    if name in _session.DATABASE_ATTRIBUTES:
+        return getattr(get_database(), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
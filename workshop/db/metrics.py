@@ -0,0 +1,89 @@
+from threading import Lock
+import time
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Connection pool counters for one engine.
+
+    Checkout/checkin/connect counts come from pool events; the time spent
+    waiting for a connection is measured by the pool class returned from
+    ``instrument_pool_class``.
+    """
+
+    def __init__(self) -> None:
+        self.engine: Optional[Engine] = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self._lock = Lock()
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def attach(self, engine: Engine) -> None:
+        self.engine = engine
+        event.listen(engine, 'connect',
+                     lambda *_: self._increment('connects'))
+        event.listen(engine, 'checkout',
+                     lambda *_: self._increment('checkouts'))
+        event.listen(engine, 'checkin',
+                     lambda *_: self._increment('checkins'))
+        event.listen(engine, 'invalidate',
+                     lambda *_: self._increment('invalidations'))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'wait_count': self.wait_count,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        # Only QueuePool-style pools track size and overflow.
+        for name in ('size', 'checkedout', 'overflow'):
+            if pool is not None and hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+
+def instrument_pool_class(
+    pool_class: Type[Pool],
+    metrics: PoolMetrics
+) -> Type[Pool]:
+    """Subclass ``pool_class`` so every checkout reports its wait time.
+
+    The metrics live on the class, so they survive ``Pool.recreate()``.
+    """
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return pool_class.connect(self)
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - started_at)
+
+    return type(
+        f'Instrumented{pool_class.__name__}',
+        (pool_class,),
+        {'metrics': metrics, 'connect': connect}
+    )
@@ -0,0 +1,28 @@
+"""Operation keyset index
+
+Revision ID: 3f1c2a7b9d04
+Revises: 6d69e831e141
+Create Date: 2026-10-18 10:12:41.204113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d04'
+down_revision = '6d69e831e141'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_operation_user_id_created_at',
+        'operation',
+        ['user_id', sa.text('created_at DESC'), 'operation_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_operation_user_id_created_at', table_name='operation')
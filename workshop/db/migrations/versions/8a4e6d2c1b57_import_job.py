@@ -0,0 +1,39 @@
+"""Import job
+
+Revision ID: 8a4e6d2c1b57
+Revises: 3f1c2a7b9d04
+Create Date: 2026-10-18 11:03:27.519842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c1b57'
+down_revision = '3f1c2a7b9d04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_job',
+    sa.Column('import_job_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='import_job_status_enum'), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('inserted', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(length=512), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('import_job_id')
+    )
+
+
+def downgrade():
+    op.drop_table('import_job')
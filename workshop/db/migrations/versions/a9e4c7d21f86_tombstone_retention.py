@@ -0,0 +1,29 @@
+"""Tombstone retention
+
+Revision ID: a9e4c7d21f86
+Revises: f2c8a4e71d35
+Create Date: 2026-10-18 23:12:08.417352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9e4c7d21f86'
+down_revision = 'f2c8a4e71d35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_operation_tombstone_deleted_at',
+        'operation_tombstone',
+        ['deleted_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_operation_tombstone_deleted_at',
+                  table_name='operation_tombstone')
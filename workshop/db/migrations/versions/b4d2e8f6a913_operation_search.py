@@ -0,0 +1,70 @@
+"""Operation search indexes
+
+Revision ID: b4d2e8f6a913
+Revises: e7b3f19a0c62
+Create Date: 2026-10-18 16:05:12.518930
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d2e8f6a913'
+down_revision = 'e7b3f19a0c62'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE operation_fts USING fts5("
+    "description, content='operation', content_rowid='operation_id')",
+    "CREATE TRIGGER operation_fts_ai AFTER INSERT ON operation BEGIN "
+    "INSERT INTO operation_fts(rowid, description) "
+    "VALUES (new.operation_id, new.description); END",
+    "CREATE TRIGGER operation_fts_ad AFTER DELETE ON operation BEGIN "
+    "INSERT INTO operation_fts(operation_fts, rowid, description) "
+    "VALUES ('delete', old.operation_id, old.description); END",
+    "CREATE TRIGGER operation_fts_au AFTER UPDATE OF description "
+    "ON operation BEGIN "
+    "INSERT INTO operation_fts(operation_fts, rowid, description) "
+    "VALUES ('delete', old.operation_id, old.description); "
+    "INSERT INTO operation_fts(rowid, description) "
+    "VALUES (new.operation_id, new.description); END",
+    "INSERT INTO operation_fts(operation_fts) VALUES ('rebuild')"
+)
+
+SQLITE_DOWNGRADE = (
+    'DROP TRIGGER IF EXISTS operation_fts_au',
+    'DROP TRIGGER IF EXISTS operation_fts_ad',
+    'DROP TRIGGER IF EXISTS operation_fts_ai',
+    'DROP TABLE IF EXISTS operation_fts'
+)
+
+
+def upgrade():
+    op.create_index(
+        'ix_operation_user_id_amount',
+        'operation',
+        ['user_id', 'amount']
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_operation_description_tsv ON operation "
+            "USING gin (to_tsvector('simple', coalesce(description, '')))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.drop_index('ix_operation_description_tsv', table_name='operation')
+
+    op.drop_index('ix_operation_user_id_amount', table_name='operation')
@@ -0,0 +1,38 @@
+"""Operation rollup
+
+Revision ID: c52d9e0f7a13
+Revises: 8a4e6d2c1b57
+Create Date: 2026-10-18 12:41:05.870214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d9e0f7a13'
+down_revision = '8a4e6d2c1b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('operation_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('income', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('outcome', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.execute(
+        "INSERT INTO operation_rollup (user_id, day, income, outcome) "
+        "SELECT user_id, date(created_at), "
+        "SUM(CASE WHEN type = 'INCOME' THEN amount ELSE 0 END), "
+        "SUM(CASE WHEN type = 'OUTCOME' THEN amount ELSE 0 END) "
+        "FROM operation GROUP BY user_id, date(created_at)"
+    )
+
+
+def downgrade():
+    op.drop_table('operation_rollup')
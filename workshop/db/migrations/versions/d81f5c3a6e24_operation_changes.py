@@ -0,0 +1,44 @@
+"""Operation changes
+
+Revision ID: d81f5c3a6e24
+Revises: b4d2e8f6a913
+Create Date: 2026-10-18 17:21:44.093615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f5c3a6e24'
+down_revision = 'b4d2e8f6a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('operation_tombstone',
+    sa.Column('tombstone_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('operation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('tombstone_id')
+    )
+    op.create_index(
+        'ix_operation_tombstone_user_id_deleted_at',
+        'operation_tombstone',
+        ['user_id', 'deleted_at', 'operation_id']
+    )
+    op.create_index(
+        'ix_operation_user_id_updated_at',
+        'operation',
+        ['user_id', 'updated_at', 'operation_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_operation_user_id_updated_at', table_name='operation')
+    op.drop_index('ix_operation_tombstone_user_id_deleted_at',
+                  table_name='operation_tombstone')
+    op.drop_table('operation_tombstone')
@@ -0,0 +1,32 @@
+"""Widen password hash
+
+Revision ID: e7b3f19a0c62
+Revises: c52d9e0f7a13
+Create Date: 2026-10-18 13:27:44.301958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3f19a0c62'
+down_revision = 'c52d9e0f7a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password_hash',
+                              existing_type=sa.String(length=32),
+                              type_=sa.String(length=256),
+                              existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password_hash',
+                              existing_type=sa.String(length=256),
+                              type_=sa.String(length=32),
+                              existing_nullable=False)
@@ -0,0 +1,43 @@
+"""Idempotency key
+
+Revision ID: f2c8a4e71d35
+Revises: d81f5c3a6e24
+Create Date: 2026-10-18 21:04:17.558206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a4e71d35'
+down_revision = 'd81f5c3a6e24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_key',
+    sa.Column('idempotency_key_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.SmallInteger(), nullable=True),
+    sa.Column('response', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('idempotency_key_id'),
+    sa.UniqueConstraint('user_id', 'key')
+    )
+    op.create_index(
+        'ix_idempotency_key_expires_at',
+        'idempotency_key',
+        ['expires_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_key_expires_at',
+                  table_name='idempotency_key')
+    op.drop_table('idempotency_key')
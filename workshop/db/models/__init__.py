@@ -1,3 +1,7 @@
 from .base import Base
+from .idempotency_key import IdempotencyKey
+from .import_job import ImportJob, ImportJobStatus
 from .operation import Operation, OperationType
+from .operation_rollup import OperationRollup
+from .operation_tombstone import OperationTombstone
 from .user import User
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from .base import Base
+from .user import User
+
+
+class IdempotencyKey(Base):
+    """The response to a request sent with an Idempotency-Key header.
+
+    ``status_code`` is NULL while the first request with the key runs.
+    """
+
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        sa.UniqueConstraint('user_id', 'key'),
+    )
+
+    id = sa.Column('idempotency_key_id', sa.Integer,
+                   autoincrement=True, primary_key=True)
+    user_id = sa.Column(sa.Integer, sa.ForeignKey(User.id), nullable=False)
+    key = sa.Column(sa.String(255), nullable=False)
+    # SHA-256 of the route and body, so a key cannot be reused for another
+    # request.
+    fingerprint = sa.Column(sa.String(64), nullable=False)
+    status_code = sa.Column(sa.SmallInteger)
+    response = sa.Column(sa.LargeBinary)
+    created_at = sa.Column(sa.DateTime(timezone=True),
+                           nullable=False, default=datetime.utcnow)
+    expires_at = sa.Column(sa.DateTime(timezone=True), nullable=False,
+                           index=True)
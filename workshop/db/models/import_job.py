@@ -0,0 +1,41 @@
+from datetime import datetime
+from enum import Enum
+
+import sqlalchemy as sa
+
+from .base import Base
+from .user import User
+
+
+class ImportJobStatus(str, Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+ImportJobStatusEnum = sa.Enum(
+    ImportJobStatus,
+    name='import_job_status_enum'
+)
+
+
+class ImportJob(Base):
+    __tablename__ = 'import_job'
+
+    id = sa.Column('import_job_id', sa.Integer,
+                   autoincrement=True, primary_key=True)
+    created_at = sa.Column(sa.DateTime(timezone=True),
+                           nullable=False, default=datetime.utcnow)
+    updated_at = sa.Column(sa.DateTime(timezone=True), nullable=False,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = sa.Column(sa.DateTime(timezone=True))
+    finished_at = sa.Column(sa.DateTime(timezone=True))
+    status = sa.Column(ImportJobStatusEnum, nullable=False,
+                       default=ImportJobStatus.PENDING)
+    file_path = sa.Column(sa.String(512), nullable=False)
+    processed = sa.Column(sa.Integer, nullable=False, default=0)
+    inserted = sa.Column(sa.Integer, nullable=False, default=0)
+    rejected = sa.Column(sa.Integer, nullable=False, default=0)
+    error = sa.Column(sa.String(512))
+    user_id = sa.Column(sa.Integer, sa.ForeignKey(User.id), nullable=False)
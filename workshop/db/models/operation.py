@@ -31,3 +31,58 @@ class Operation(Base):
     type = sa.Column(OperationTypeEnum, nullable=False)
     description = sa.Column(sa.String(256))
     user_id = sa.Column(sa.Integer, sa.ForeignKey(User.id), nullable=False)
+
+
+sa.Index(
+    'ix_operation_user_id_created_at',
+    Operation.user_id,
+    Operation.created_at.desc(),
+    Operation.id
+)
+sa.Index('ix_operation_user_id_amount', Operation.user_id, Operation.amount)
+sa.Index(
+    'ix_operation_user_id_updated_at',
+    Operation.user_id,
+    Operation.updated_at,
+    Operation.id
+)
+
+
+# Description search index. SQLite gets an external-content FTS5 table kept
+# in step by triggers, Postgres an expression GIN index over a tsvector;
+# other backends fall back to a LIKE scan. Same DDL as migration b4d2e8f6a913.
+for statement in (
+    "CREATE VIRTUAL TABLE operation_fts USING fts5("
+    "description, content='operation', content_rowid='operation_id')",
+    "CREATE TRIGGER operation_fts_ai AFTER INSERT ON operation BEGIN "
+    "INSERT INTO operation_fts(rowid, description) "
+    "VALUES (new.operation_id, new.description); END",
+    "CREATE TRIGGER operation_fts_ad AFTER DELETE ON operation BEGIN "
+    "INSERT INTO operation_fts(operation_fts, rowid, description) "
+    "VALUES ('delete', old.operation_id, old.description); END",
+    "CREATE TRIGGER operation_fts_au AFTER UPDATE OF description "
+    "ON operation BEGIN "
+    "INSERT INTO operation_fts(operation_fts, rowid, description) "
+    "VALUES ('delete', old.operation_id, old.description); "
+    "INSERT INTO operation_fts(rowid, description) "
+    "VALUES (new.operation_id, new.description); END"
+):
+    sa.event.listen(
+        Operation.__table__,
+        'after_create',
+        sa.DDL(statement).execute_if(dialect='sqlite')
+    )
+
+sa.event.listen(
+    Operation.__table__,
+    'before_drop',
+    sa.DDL('DROP TABLE IF EXISTS operation_fts').execute_if(dialect='sqlite')
+)
+sa.event.listen(
+    Operation.__table__,
+    'after_create',
+    sa.DDL(
+        "CREATE INDEX ix_operation_description_tsv ON operation USING gin "
+        "(to_tsvector('simple', coalesce(description, '')))"
+    ).execute_if(dialect='postgresql')
+)
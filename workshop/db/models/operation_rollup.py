@@ -0,0 +1,15 @@
+import sqlalchemy as sa
+
+from .base import Base
+from .user import User
+
+
+class OperationRollup(Base):
+    """Per-user, per-day income/outcome totals kept in step with operations."""
+
+    __tablename__ = 'operation_rollup'
+
+    user_id = sa.Column(sa.Integer, sa.ForeignKey(User.id), primary_key=True)
+    day = sa.Column(sa.Date, primary_key=True)
+    income = sa.Column(sa.Numeric(14, 2), nullable=False, default=0)
+    outcome = sa.Column(sa.Numeric(14, 2), nullable=False, default=0)
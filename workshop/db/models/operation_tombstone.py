@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from .base import Base
+from .user import User
+
+
+class OperationTombstone(Base):
+    """Left behind by a deleted operation for GET /operations/changes."""
+
+    __tablename__ = 'operation_tombstone'
+
+    id = sa.Column('tombstone_id', sa.Integer,
+                   autoincrement=True, primary_key=True)
+    operation_id = sa.Column(sa.Integer, nullable=False)
+    user_id = sa.Column(sa.Integer, sa.ForeignKey(User.id), nullable=False)
+    # Indexed on its own as well, for purging old tombstones.
+    deleted_at = sa.Column(sa.DateTime(timezone=True), nullable=False,
+                           default=datetime.utcnow, index=True)
+
+
+sa.Index(
+    'ix_operation_tombstone_user_id_deleted_at',
+    OperationTombstone.user_id,
+    OperationTombstone.deleted_at,
+    OperationTombstone.operation_id
+)
@@ -14,4 +14,4 @@ class User(Base):
                            default=datetime.utcnow, onupdate=datetime.utcnow)
     email = sa.Column(sa.String(64), nullable=False, unique=True)
     username = sa.Column(sa.String(64), nullable=False, unique=True)
-    password_hash = sa.Column(sa.String(32), nullable=False)
+    password_hash = sa.Column(sa.String(256), nullable=False)
@@ -0,0 +1,62 @@
+from contextvars import ContextVar
+import heapq
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryProfile:
+    """Statements executed while serving one request."""
+
+    def __init__(self, keep_slowest: int) -> None:
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_time = 0.0
+        self._slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, (duration, statement))
+        elif self._slowest and duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (duration, statement))
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return sorted(self._slowest, reverse=True)
+
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    'current_profile',
+    default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany) -> None:
+    if current_profile.get() is not None:
+        conn.info.setdefault('query_started_at', []).append(
+            time.perf_counter()
+        )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany) -> None:
+    profile = current_profile.get()
+    if profile is None or not conn.info.get('query_started_at'):
+        return
+    started_at = conn.info['query_started_at'].pop()
+    profile.record(statement, time.perf_counter() - started_at)
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Record every statement run on ``engine`` into the current profile.
+
+    Sync routes run in a threadpool with a copy of the request's context,
+    so the profile set by the middleware is visible to them as well.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+import random
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+class RoutingSession(Session):
+    """Session that can send the reads of a block to a replica.
+
+    Inside ``reading()`` statements go to one replica picked at random;
+    flushes and DML always go to the primary bind. ``wrote`` records
+    whether anything was sent to the primary as a write, so callers can
+    pin the user to the primary afterwards.
+
+    An explicit ``begin()`` announces a transaction that writes: its
+    connection is opened right away with ``write_options`` as execution
+    options. Transactions the session begins on its own do not get them.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        replicas: Sequence[Engine] = (),
+        write_options: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.write_options = write_options or {}
+        self.wrote = False
+        self._replica: Optional[Engine] = None
+
+    def begin(self, *args: Any, **kwargs: Any):
+        transaction = super().begin(*args, **kwargs)
+        # Flushes begin subtransactions, which share the connection.
+        if self.write_options and transaction.parent is None:
+            self.connection(execution_options=self.write_options)
+        return transaction
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        if not self.replicas or self._replica is not None:
+            yield
+            return
+        self._replica = random.choice(self.replicas)
+        try:
+            yield
+        finally:
+            self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.wrote = True
+        elif self._replica is not None:
+            return self._replica
+        return super().get_bind(mapper, clause, **kwargs)
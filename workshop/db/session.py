@@ -1,25 +1,289 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session as Session_
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from workshop.config import Settings, get_settings
+
+from .metrics import PoolMetrics, instrument_pool_class
+from .profiling import install_query_profiler
+from .routing import RoutingSession
+from .sqlite import IMMEDIATE, install_pragmas, uses_performance_mode
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.ext.asyncio import AsyncSession as AsyncSession_
+
+
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql'
+}
+
+
+def is_async_url(url: str) -> bool:
+    url_ = make_url(url)
+    return ASYNC_DRIVERS.get(url_.get_backend_name()) == url_.get_driver_name()
+
+
+def to_sync_url(url: str) -> str:
+    url_ = make_url(url)
+    if not is_async_url(url):
+        return url
+    return str(url_.set(drivername=url_.get_backend_name()))
+
+
+def get_engine_options(
+    url: str,
+    metrics: PoolMetrics,
+    readonly: bool = False
+) -> Dict[str, Any]:
+    url_ = make_url(url)
+    backend = url_.get_backend_name()
+    pool_class = url_.get_dialect().get_pool_class(url_)
+    options: Dict[str, Any] = {
+        'poolclass': instrument_pool_class(pool_class, metrics)
+    }
+
+    if backend == 'sqlite':
+        options['connect_args'] = {'check_same_thread': False}
+        sqlite = get_settings().sqlite
+        if uses_performance_mode(url, sqlite):
+            # One writer connection, so concurrent writers queue on the
+            # pool instead of failing with "database is locked"; readonly
+            # engines get read_pool_size connections.
+            pool_class = (
+                AsyncAdaptedQueuePool if is_async_url(url) else QueuePool
+            )
+            options.update(
+                poolclass=instrument_pool_class(pool_class, metrics),
+                pool_size=sqlite.read_pool_size if readonly else 1,
+                max_overflow=0,
+                pool_timeout=sqlite.pool_timeout
+            )
+        return options
+
+    pool = get_settings().pool
+    options.update(
+        pool_size=pool.size,
+        max_overflow=pool.max_overflow,
+        pool_timeout=pool.timeout,
+        pool_pre_ping=pool.pre_ping,
+        pool_recycle=int(pool.recycle.total_seconds())
+    )
+
+    if backend == 'postgresql' and pool.statement_timeout is not None:
+        timeout = int(pool.statement_timeout.total_seconds() * 1000)
+        if url_.get_driver_name() == 'asyncpg':
+            options['connect_args'] = {
+                'server_settings': {'statement_timeout': str(timeout)}
+            }
+        else:
+            options['connect_args'] = {
+                'options': f'-c statement_timeout={timeout}'
+            }
+
+    return options
+
+
+def create_sync_engine(
+    url: str,
+    metrics: PoolMetrics,
+    readonly: bool = False
+) -> Engine:
+    url = to_sync_url(url)
+    engine_ = create_engine(url, **get_engine_options(url, metrics, readonly))
+    metrics.attach(engine_)
+    if uses_performance_mode(url, get_settings().sqlite):
+        install_pragmas(engine_, get_settings().sqlite, writer=not readonly)
+    if get_settings().profiling.enabled:
+        install_query_profiler(engine_)
+    return engine_
+
+
+def create_async_engine_(
+    url: str,
+    metrics: PoolMetrics,
+    readonly: bool = False
+) -> 'AsyncEngine':
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine_ = create_async_engine(
+        url,
+        **get_engine_options(url, metrics, readonly)
+    )
+    metrics.attach(engine_.sync_engine)
+    if uses_performance_mode(url, get_settings().sqlite):
+        install_pragmas(engine_.sync_engine, get_settings().sqlite,
+                        writer=not readonly)
+    if get_settings().profiling.enabled:
+        install_query_profiler(engine_.sync_engine)
+    return engine_
+
 
-from workshop.config import settings
+class Database:
+    """Engines and session factories for the configured URLs.
 
+    Built by ``get_database()`` on first use (normally the app's startup
+    handler), so importing the application does not create engines.
+    """
 
-engine = create_engine(
-    settings.db_url,
-    connect_args={'check_same_thread': False}
-)
+    def __init__(self, settings: Settings) -> None:
+        self.pool_metrics = PoolMetrics()
+        self.engine = create_sync_engine(settings.db_url, self.pool_metrics)
 
-Session = sessionmaker(
-    engine,
-    autocommit=False,
-    autoflush=False
-)
+        self.replica_pool_metrics = [
+            PoolMetrics() for _ in settings.replicas.urls
+        ]
+        self.replica_engines = [
+            create_sync_engine(url, metrics, readonly=True)
+            for url, metrics in zip(settings.replicas.urls,
+                                    self.replica_pool_metrics)
+        ]
+
+        # SQLite performance mode: read-only service methods use a pool of
+        # their own on the same file, the writer stays free for writes.
+        self.read_pool_metrics = PoolMetrics()
+        self.read_engines: List[Engine] = []
+        # Only transactions begun explicitly take the write lock up front.
+        self.write_options: Dict[str, Any] = {}
+        if uses_performance_mode(settings.db_url, settings.sqlite):
+            self.read_engines = [create_sync_engine(
+                settings.db_url, self.read_pool_metrics, readonly=True
+            )]
+            self.write_options = {IMMEDIATE: True}
+
+        self.Session = sessionmaker(
+            self.engine,
+            class_=RoutingSession,
+            replicas=self.replica_engines or self.read_engines,
+            write_options=self.write_options,
+            autocommit=False,
+            autoflush=False
+        )
+
+        # The async engine is only built when db_url names an async driver,
+        # so the sync deployment does not need aiosqlite/asyncpg installed.
+        self.async_pool_metrics = PoolMetrics()
+        self.async_replica_pool_metrics: List[PoolMetrics] = []
+        self.async_engine: Optional['AsyncEngine'] = None
+        self.async_replica_engines: List['AsyncEngine'] = []
+        self.async_read_pool_metrics = PoolMetrics()
+        self.async_read_engines: List['AsyncEngine'] = []
+        self.AsyncSession = None
+        if is_async_url(settings.db_url):
+            self._init_async(settings)
+
+    def _init_async(self, settings: Settings) -> None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        self.async_engine = create_async_engine_(settings.db_url,
+                                                 self.async_pool_metrics)
+        self.async_replica_pool_metrics = [
+            PoolMetrics() for _ in settings.replicas.urls
+        ]
+        self.async_replica_engines = [
+            create_async_engine_(url, metrics, readonly=True)
+            for url, metrics in zip(settings.replicas.urls,
+                                    self.async_replica_pool_metrics)
+        ]
+        if uses_performance_mode(settings.db_url, settings.sqlite):
+            self.async_read_engines = [create_async_engine_(
+                settings.db_url, self.async_read_pool_metrics, readonly=True
+            )]
+        self.AsyncSession = sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,
+            replicas=[
+                replica.sync_engine for replica in (
+                    self.async_replica_engines or self.async_read_engines
+                )
+            ],
+            write_options=self.write_options,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False
+        )
+
+    def connection_limit(self) -> Optional[int]:
+        """Connections request sessions can hold at once; None if unbounded.
+
+        Counts the engines requests use: the async ones when db_url is
+        async, as the sync engine then only serves imports and startup.
+        """
+        if self.async_engine is not None:
+            engines = [engine_.sync_engine for engine_ in (
+                self.async_engine,
+                *self.async_replica_engines,
+                *self.async_read_engines
+            )]
+        else:
+            engines = [self.engine, *self.replica_engines, *self.read_engines]
+        limit = 0
+        for engine_ in engines:
+            pool = engine_.pool
+            # NullPool (SQLite files by default) opens a connection for
+            # every checkout; QueuePool with max_overflow=-1 too.
+            if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+                return None
+            limit += pool.size() + pool._max_overflow
+        return limit
+
+    async def dispose(self) -> None:
+        for engine_ in (self.engine, *self.replica_engines,
+                        *self.read_engines):
+            engine_.dispose()
+        for async_engine_ in (self.async_engine, *self.async_replica_engines,
+                              *self.async_read_engines):
+            if async_engine_ is not None:
+                await async_engine_.dispose()
+
+
+@lru_cache()
+def get_database() -> Database:
+    return Database(get_settings())
+
+
+async def dispose_database() -> None:
+    if get_database.cache_info().currsize:
+        await get_database().dispose()
+        get_database.cache_clear()
+
+
+# Names that used to be module globals are still importable; they now
+# resolve to the lazily built Database.
+DATABASE_ATTRIBUTES = {
+    'engine', 'Session', 'pool_metrics', 'replica_engines',
+    'replica_pool_metrics', 'async_engine', 'AsyncSession',
+    'async_pool_metrics', 'async_replica_engines',
+    'async_replica_pool_metrics', 'read_engines', 'read_pool_metrics',
+    'async_read_engines', 'async_read_pool_metrics'
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in DATABASE_ATTRIBUTES:
+        return getattr(get_database(), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def get_session() -> Session_:
-    session: Session_ = Session()
+    session: Session_ = get_database().Session()
     try:
         yield session
     finally:
         session.close()
     return session
+
+
+async def get_async_session() -> 'AsyncSession_':
+    session: AsyncSession_ = get_database().AsyncSession()
+    try:
+        yield session
+    finally:
+        await session.close()
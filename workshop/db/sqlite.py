@@ -0,0 +1,68 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from workshop.config import SqliteSettings
+
+
+# Execution option that makes the writer begin with BEGIN IMMEDIATE.
+IMMEDIATE = 'sqlite_immediate'
+
+def is_file_database(url: str) -> bool:
+    url_ = make_url(url)
+    return (
+        url_.get_backend_name() == 'sqlite'
+        and url_.database not in (None, '', ':memory:')
+        and url_.query.get('mode') != 'memory'
+    )
+
+
+def uses_performance_mode(url: str, sqlite: SqliteSettings) -> bool:
+    return sqlite.performance_mode and is_file_database(url)
+
+
+def install_pragmas(
+    engine: Engine,
+    sqlite: SqliteSettings,
+    *,
+    writer: bool
+) -> None:
+    """Tune every new connection of a performance-mode engine.
+
+    WAL lets the readers run next to the writer. Writer transactions on a
+    connection with the ``IMMEDIATE`` execution option start with ``BEGIN
+    IMMEDIATE``: they take the write lock up front, so one that read first
+    cannot fail to upgrade because another process (e.g. an import worker)
+    committed in between. The others are deferred and only read until
+    they write, so a plain lookup does not hold the write lock.
+    """
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA busy_timeout='
+        f'{int(sqlite.busy_timeout.total_seconds() * 1000)}',
+        f'PRAGMA cache_size=-{sqlite.cache_size_kib}',
+        f'PRAGMA mmap_size={sqlite.mmap_size}',
+        'PRAGMA temp_store=MEMORY'
+    ]
+    if not writer:
+        pragmas.append('PRAGMA query_only=ON')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, _):
+        if writer:
+            # The driver must not open transactions itself; see begin().
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    if writer:
+        @event.listens_for(engine, 'begin')
+        def begin(connection):
+            if connection.get_execution_options().get(IMMEDIATE):
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+            else:
+                connection.exec_driver_sql('BEGIN')
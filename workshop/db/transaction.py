@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# session.info key of the callbacks waiting for the outermost block.
+ON_COMMIT = 'workshop.on_commit'
+
+
+@contextmanager
+def atomic(session: Session, begin: bool = True) -> Iterator[None]:
+    """Commit the writes of the block, and of the blocks inside it, at once.
+
+    Used where a service would use ``session.begin()``. A nested block
+    joins the outer one, so a caller can make several service writes, and
+    its own, one transaction. With ``begin=False`` the outermost block
+    leaves beginning to the first write inside it.
+    """
+    if begin and not session.in_transaction():
+        session.begin()
+    if ON_COMMIT in session.info:
+        yield
+        return
+
+    callbacks: List[Callable[[], None]] = []
+    session.info[ON_COMMIT] = callbacks
+    try:
+        yield
+        if session.in_transaction():
+            session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        del session.info[ON_COMMIT]
+    for callback in callbacks:
+        callback()
+
+
+@asynccontextmanager
+async def async_atomic(session: 'AsyncSession') -> AsyncIterator[None]:
+    """``atomic(begin=False)`` for an AsyncSession.
+
+    Service writes run through ``AsyncSession.run_sync`` inside the block
+    join it, their ``atomic`` blocks begin the transaction.
+    """
+    info = session.sync_session.info
+    if ON_COMMIT in info:
+        yield
+        return
+
+    callbacks: List[Callable[[], None]] = []
+    info[ON_COMMIT] = callbacks
+    try:
+        yield
+        if session.in_transaction():
+            await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        del info[ON_COMMIT]
+    for callback in callbacks:
+        callback()
+
+
+def on_commit(session: Session, callback: Callable[[], None]) -> None:
+    """Call ``callback`` once the enclosing ``atomic`` block committed.
+
+    For side effects that must not outlive a rollback: cache updates,
+    queueing work for other processes. Called at once outside a block.
+    """
+    callbacks = session.info.get(ON_COMMIT)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
@@ -0,0 +1,20 @@
+import hashlib
+from typing import Any, Optional
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values the representation depends on."""
+    raw = '\x1f'.join(str(part) for part in parts)
+    return '"{}"'.format(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(
+        candidate.strip().removeprefix('W/') == etag.removeprefix('W/')
+        for candidate in if_none_match.split(',')
+    )
@@ -0,0 +1,335 @@
+"""Minimal Prometheus-compatible metrics.
+
+Only what the app needs: labelled counters, gauges and histograms, plus
+collectors for values that are read at scrape time (pool, caches). Output
+follows the text exposition format, version 0.0.4.
+"""
+from bisect import bisect_left
+import functools
+import inspect
+from threading import Lock
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+SIZE_BUCKETS = (
+    128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(Metric):
+    type_ = 'counter'
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}_total', self._labels(labels), value
+
+
+class Gauge(Metric):
+    type_ = 'gauge'
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, self._labels(labels), value
+
+
+class Histogram(Metric):
+    type_ = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (+Inf last), sum.
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = (
+                    [0] * (len(self.buckets) + 1), [0.0]
+                )
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            ]
+        for labels, counts, total in values:
+            labels_ = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       {**labels_, 'le': _format_value(float(bound))},
+                       cumulative)
+            yield f'{self.name}_sum', labels_, total
+            yield f'{self.name}_count', labels_, cumulative
+
+
+Collector = Callable[[], Iterable[Metric]]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable building metrics at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_}')
+            for name, labels, value in metric.samples():
+                lines.append(
+                    f'{name}{_format_labels(labels)} {_format_value(value)}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+class _RouteStats:
+    __slots__ = ('statuses', 'durations', 'duration_sum', 'sizes', 'size_sum')
+
+    def __init__(self) -> None:
+        self.statuses: Dict[int, int] = {}
+        self.durations = [0] * (len(DEFAULT_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.sizes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+
+class HttpMetrics:
+    """Per-route request count, latency, response size and in-flight gauge.
+
+    Every request is recorded with a single lock acquisition and dict
+    lookup; the Prometheus families are only built at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+        self._lock = Lock()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        size: int
+    ) -> None:
+        key = method, route
+        duration_index = bisect_left(DEFAULT_BUCKETS, duration)
+        size_index = bisect_left(SIZE_BUCKETS, size)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = _RouteStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.durations[duration_index] += 1
+            stats.duration_sum += duration
+            stats.sizes[size_index] += 1
+            stats.size_sum += size
+
+    def collect(self) -> Iterable[Metric]:
+        requests = Counter(
+            'http_requests',
+            'HTTP requests by route and status code.',
+            ('method', 'route', 'status')
+        )
+        durations = Histogram(
+            'http_request_duration_seconds',
+            'HTTP request latency by route.',
+            ('method', 'route')
+        )
+        sizes = Histogram(
+            'http_response_size_bytes',
+            'HTTP response body size by route.',
+            ('method', 'route'),
+            buckets=SIZE_BUCKETS
+        )
+        in_flight = Gauge(
+            'http_requests_in_flight',
+            'HTTP requests currently being served.'
+        )
+        in_flight.set(value=self.in_flight)
+
+        with self._lock:
+            for key, stats in self._routes.items():
+                for status, count in stats.statuses.items():
+                    requests.inc(*key, str(status), amount=count)
+                durations._values[key] = (
+                    list(stats.durations), [stats.duration_sum]
+                )
+                sizes._values[key] = list(stats.sizes), [stats.size_sum]
+        return requests, durations, sizes, in_flight
+
+
+registry = Registry()
+
+http_metrics = HttpMetrics()
+registry.add_collector(http_metrics.collect)
+
+service_method_duration = registry.histogram(
+    'service_method_duration_seconds',
+    'Service method latency.',
+    ('service', 'method')
+)
+
+
+def _timed(service: str, method: str, fn: Callable) -> Callable:
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                service_method_duration.observe(
+                    service, method,
+                    value=time.perf_counter() - started_at
+                )
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            service_method_duration.observe(
+                service, method,
+                value=time.perf_counter() - started_at
+            )
+    return wrapper
+
+
+def instrument_service(cls: type) -> type:
+    """Class decorator timing every public method of a service.
+
+    Generator methods are left alone: their body runs after the call
+    returns, so a wrapper would only time generator creation. Coroutine
+    methods are timed until they return.
+    """
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+        if isinstance(attribute, (classmethod, staticmethod)):
+            fn = attribute.__func__
+            if not inspect.isgeneratorfunction(fn):
+                setattr(cls, name,
+                        type(attribute)(_timed(cls.__name__, name, fn)))
+        elif (
+            inspect.isfunction(attribute)
+            and not inspect.isgeneratorfunction(attribute)
+        ):
+            setattr(cls, name, _timed(cls.__name__, name, attribute))
+    return cls
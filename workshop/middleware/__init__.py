@@ -0,0 +1,3 @@
+from .admission import AdmissionMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import QueryProfilingMiddleware
@@ -0,0 +1,101 @@
+import json
+from http import HTTPStatus
+import math
+from typing import Callable, Optional, Sequence, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from workshop.metrics import registry
+
+
+shed_requests = registry.counter(
+    'http_requests_shed',
+    'Requests answered with 503 because the worker was at max_concurrency.'
+)
+
+SHED_BODY = json.dumps(
+    {'detail': HTTPStatus.SERVICE_UNAVAILABLE.phrase}
+).encode()
+
+
+class AdmissionMiddleware:
+    """Answers 503 with Retry-After once ``max_concurrency`` requests run.
+
+    Rejecting at the door costs nothing, while a request let in would wait
+    for a thread and a database connection behind the others and time out
+    anyway. A request counts until its response is sent: the session
+    cleanup FastAPI runs afterwards is not something a client waits for.
+    The count is per process and kept on the event loop, so no lock is
+    needed. ``exempt_paths`` (the metrics endpoint) are always served.
+
+    ``max_concurrency`` may be a callable, called on the first request,
+    once the engines exist; when it returns None nothing is shed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: Union[int, Callable[[], Optional[int]]],
+        retry_after: float,
+        exempt_paths: Sequence[str] = ('/metrics',)
+    ) -> None:
+        self.app = app
+        self._get_max_concurrency: Optional[Callable[[], Optional[int]]]
+        self.max_concurrency: Optional[int]
+        if callable(max_concurrency):
+            self._get_max_concurrency = max_concurrency
+            self.max_concurrency = None
+        else:
+            self._get_max_concurrency = None
+            self.max_concurrency = max_concurrency
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+        self._headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(SHED_BODY)).encode()),
+            (b'retry-after', str(math.ceil(retry_after)).encode())
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self._get_max_concurrency is not None:
+            self.max_concurrency = self._get_max_concurrency()
+            self._get_max_concurrency = None
+        if self.max_concurrency is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_concurrency:
+            shed_requests.inc()
+            await send({
+                'type': 'http.response.start',
+                'status': HTTPStatus.SERVICE_UNAVAILABLE.value,
+                'headers': self._headers
+            })
+            await send({'type': 'http.response.body', 'body': SHED_BODY})
+            return
+
+        self.in_flight += 1
+        answered = False
+
+        def release() -> None:
+            nonlocal answered
+            if not answered:
+                answered = True
+                self.in_flight -= 1
+
+        async def send_wrapper(message: Message) -> None:
+            if (
+                message['type'] == 'http.response.body'
+                and not message.get('more_body', False)
+            ):
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
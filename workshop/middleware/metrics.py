@@ -0,0 +1,65 @@
+import time
+from typing import Callable, Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from workshop.metrics import http_metrics
+
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class MetricsMiddleware:
+    """Records per-route count, latency, response size and in-flight gauge.
+
+    Plain ASGI rather than BaseHTTPMiddleware, to keep per-request overhead
+    to a few microseconds. Routes are labelled by their path template,
+    resolved from the endpoint the router stored in the scope.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._route_names: Dict[Callable, str] = {}
+
+    def _route_name(self, scope: Scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        name = self._route_names.get(endpoint)
+        if name is None:
+            for route in scope['app'].routes:
+                if getattr(route, 'endpoint', None) is endpoint:
+                    name = route.path
+                    break
+            else:
+                name = UNMATCHED_ROUTE
+            self._route_names[endpoint] = name
+        return name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        # Only touched from the event loop thread, so no lock is needed.
+        http_metrics.in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started_at
+            http_metrics.in_flight -= 1
+            http_metrics.observe(method, self._route_name(scope), status,
+                                 duration, size)
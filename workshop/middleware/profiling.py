@@ -0,0 +1,78 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from workshop.db.profiling import QueryProfile, current_profile
+
+
+logger = logging.getLogger(__name__)
+
+
+def _server_timing(profile: QueryProfile) -> str:
+    entries = [
+        f'db;dur={profile.total_time * 1000:.2f};'
+        f'desc="{profile.count} statements"'
+    ]
+    for index, (duration, statement) in enumerate(profile.slowest, 1):
+        description = ' '.join(statement.split())[:80].replace('"', "'")
+        description = description.encode('ascii', 'replace').decode('ascii')
+        entries.append(
+            f'db-slow-{index};dur={duration * 1000:.2f};desc="{description}"'
+        )
+    return ', '.join(entries)
+
+
+class QueryProfilingMiddleware:
+    """Reports per-request SQL statistics.
+
+    Adds a ``Server-Timing`` header with the statement count, total DB time
+    and the slowest statements, and logs a warning when a request runs more
+    statements than ``statement_budget``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        statement_budget: int,
+        keep_slowest: int
+    ) -> None:
+        self.app = app
+        self.statement_budget = statement_budget
+        self.keep_slowest = keep_slowest
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(self.keep_slowest)
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', _server_timing(profile))
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            if profile.count > self.statement_budget:
+                logger.warning(
+                    '%s %s ran %d SQL statements (budget %d) in %.1fms, '
+                    'request took %.1fms; slowest: %s',
+                    scope['method'],
+                    scope['path'],
+                    profile.count,
+                    self.statement_budget,
+                    profile.total_time * 1000,
+                    (time.perf_counter() - started_at) * 1000,
+                    '; '.join(
+                        f'{duration * 1000:.1f}ms {statement}'
+                        for duration, statement in profile.slowest
+                    )
+                )
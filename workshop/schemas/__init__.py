@@ -4,10 +4,26 @@ from .auth import (
     AccessToken,
     RefreshToken
 )
+from .import_jobs import ImportJobSchema
 from .operations import (
+    BatchAction,
+    ExportFormat,
+    OperationChangesSchema,
     OperationSchema,
     OperationCreateSchema,
-    OperationUpdateSchema
+    OperationUpdateSchema,
+    OperationsFilterSchema,
+    OperationsPageSchema,
+    OperationsBatchItemSchema,
+    OperationsBatchSchema,
+    OperationsBatchResultSchema,
+    OperationsImportChunkSchema,
+    OperationsImportReportSchema
+)
+from .summary import (
+    SummaryPeriod,
+    SummaryBucketSchema,
+    OperationsSummarySchema
 )
 from .user import (
     UserSchema, 
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from workshop.db.models import ImportJobStatus
+
+from .base import APISchema
+
+
+class ImportJobSchema(APISchema):
+    id: int
+    status: ImportJobStatus
+    processed: int
+    inserted: int
+    rejected: int
+    throughput: Optional[float]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -1,14 +1,26 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 from decimal import Decimal
+from enum import Enum
 
-from pydantic import Field
+from pydantic import Field, conlist
 
 from workshop.db.models import OperationType
 
 from .base import APISchema
 
 
+class ExportFormat(str, Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+class BatchAction(str, Enum):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+
 class OperationBaseSchema(APISchema):
     amount: Decimal
     type: OperationType
@@ -28,3 +40,73 @@ class OperationSchema(OperationBaseSchema):
     id: int
     created_at: datetime
     updated_at: datetime
+
+
+class OperationsFilterSchema(APISchema):
+    type: Optional[OperationType]
+    created_from: Optional[datetime]
+    created_to: Optional[datetime]
+    min_amount: Optional[Decimal]
+    max_amount: Optional[Decimal]
+    q: Optional[str] = Field(max_length=256)
+
+
+class OperationsPageSchema(APISchema):
+    items: List[OperationSchema]
+    next_cursor: Optional[str]
+
+
+class OperationChangesSchema(APISchema):
+    items: List[OperationSchema] = []
+    deleted: List[int] = []
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+class OperationsBatchCreateSchema(APISchema):
+    action: Literal[BatchAction.CREATE]
+    data: OperationCreateSchema
+
+
+class OperationsBatchUpdateSchema(APISchema):
+    action: Literal[BatchAction.UPDATE]
+    id: int
+    data: OperationUpdateSchema
+
+
+class OperationsBatchDeleteSchema(APISchema):
+    action: Literal[BatchAction.DELETE]
+    id: int
+
+
+OperationsBatchItemSchema = Annotated[
+    Union[
+        OperationsBatchCreateSchema,
+        OperationsBatchUpdateSchema,
+        OperationsBatchDeleteSchema
+    ],
+    Field(discriminator='action')
+]
+
+
+class OperationsBatchSchema(APISchema):
+    items: conlist(OperationsBatchItemSchema, min_items=1, max_items=1000)
+
+
+class OperationsBatchResultSchema(APISchema):
+    action: BatchAction
+    status: int
+    id: Optional[int]
+    operation: Optional[OperationSchema]
+
+
+class OperationsImportChunkSchema(APISchema):
+    chunk: int
+    inserted: int
+    rejected: int
+
+
+class OperationsImportReportSchema(APISchema):
+    inserted: int = 0
+    rejected: int = 0
+    chunks: List[OperationsImportChunkSchema] = []
@@ -0,0 +1,27 @@
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import List
+
+from .base import APISchema
+
+
+class SummaryPeriod(str, Enum):
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+
+class SummaryBucketSchema(APISchema):
+    start: date
+    income: Decimal = Decimal(0)
+    outcome: Decimal = Decimal(0)
+    balance: Decimal = Decimal(0)
+
+
+class OperationsSummarySchema(APISchema):
+    period: SummaryPeriod
+    income: Decimal = Decimal(0)
+    outcome: Decimal = Decimal(0)
+    balance: Decimal = Decimal(0)
+    buckets: List[SummaryBucketSchema] = []
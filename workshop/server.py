@@ -0,0 +1,204 @@
+"""Pre-forking server: ``python -m workshop``.
+
+The master process builds the application and binds the socket once, then
+forks the workers, so they share the imported code copy-on-write and all
+accept on the same socket. Each worker is a plain uvicorn server.
+
+The master restarts workers that exit, whether they crashed or were
+recycled after ``max_requests``. On SIGTERM or SIGINT it asks every worker
+to stop and kills those still busy after ``graceful_timeout``. Workers run
+in their own process group, so a Ctrl+C reaches them only through the
+master, and stop by themselves if the master goes away.
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+from workshop.app import get_app
+from workshop.config import ServerSettings, get_settings
+
+
+logger = logging.getLogger('uvicorn.error')
+
+# A worker that dies sooner than this after starting is restarted with a
+# delay, so a broken deployment does not turn into a fork loop.
+MIN_WORKER_LIFETIME = 1.0
+
+
+class Master:
+    def __init__(self, app: FastAPI, server_settings: ServerSettings) -> None:
+        self.app = app
+        self.settings = server_settings
+        self.workers_count = server_settings.workers or cpu_count()
+        self.workers: Dict[int, float] = {}
+        self.stopping = False
+        self.socket: Optional[socket.socket] = None
+
+    def worker_config(self) -> uvicorn.Config:
+        max_requests = None
+        if self.settings.max_requests > 0:
+            max_requests = self.settings.max_requests + random.randint(
+                0, self.settings.max_requests_jitter
+            )
+        return uvicorn.Config(
+            self.app,
+            host=self.settings.host,
+            port=self.settings.port,
+            loop=self.settings.loop,
+            http=self.settings.http,
+            backlog=self.settings.backlog,
+            timeout_keep_alive=int(self.settings.keep_alive.total_seconds()),
+            limit_max_requests=max_requests,
+            access_log=self.settings.access_log,
+            lifespan='on'
+        )
+
+    def run(self) -> None:
+        self.socket = self.worker_config().bind_socket()
+        # Objects created so far are shared with the workers; keep the
+        # collector from touching (and so copying) their pages.
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        logger.info('Starting %d workers', self.workers_count)
+
+        try:
+            while not self.stopping:
+                self.reap()
+                while len(self.workers) < self.workers_count:
+                    self.spawn()
+                time.sleep(0.1)
+        finally:
+            self.stop()
+
+    def handle_stop(self, signum: int, frame) -> None:
+        self.stopping = True
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+
+        # Worker: uvicorn installs its own handlers for graceful shutdown.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.setpgid(0, 0)
+        random.seed()
+        watch_master(os.getppid())
+        status = 0
+        try:
+            uvicorn.Server(self.worker_config()).run(sockets=[self.socket])
+        except SystemExit as error:
+            status = error.code if isinstance(error.code, int) else 1
+        except BaseException:
+            logger.exception('Worker %d failed', os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started_at = self.workers.pop(pid, None)
+            if started_at is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info('Worker %d exited, restarting', pid)
+            else:
+                logger.warning('Worker %d exited with %d, restarting',
+                               pid, code)
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+
+    def stop(self) -> None:
+        logger.info('Stopping workers')
+        for pid in self.workers:
+            self.signal_worker(pid, signal.SIGTERM)
+        timeout = self.settings.graceful_timeout.total_seconds()
+        deadline = time.monotonic() + timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning('Worker %d did not stop in time, killing it', pid)
+            self.signal_worker(pid, signal.SIGKILL)
+        while self.workers:
+            pid, _ = os.waitpid(-1, 0)
+            self.workers.pop(pid, None)
+        if self.socket is not None:
+            self.socket.close()
+
+    @staticmethod
+    def signal_worker(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def cpu_count() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def watch_master(master_pid: int) -> None:
+    """Shut the worker down gracefully once it is orphaned."""
+    def watch() -> None:
+        while os.getppid() == master_pid:
+            time.sleep(1)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name='watch-master', daemon=True).start()
+
+
+def parse_args(server_settings: ServerSettings) -> ServerSettings:
+    parser = argparse.ArgumentParser(prog='python -m workshop')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threadpool-size', type=int)
+    parser.add_argument('--max-requests', type=int)
+    parser.add_argument('--max-requests-jitter', type=int)
+    args = parser.parse_args()
+    overrides = {
+        name: value for name, value in vars(args).items() if value is not None
+    }
+    return server_settings.copy(update=overrides)
+
+
+def main() -> None:
+    settings = get_settings()
+    settings.server = parse_args(settings.server)
+
+    # Built once here, so workers start with the application loaded.
+    app = get_app()
+
+    if not hasattr(os, 'fork'):
+        logger.warning('os.fork is unavailable, serving from one process')
+        uvicorn.run(app, host=settings.server.host,
+                    port=settings.server.port)
+        return
+
+    master = Master(app, settings.server)
+    if master.workers_count > 1 and settings.replicas.urls:
+        logger.warning('Read-your-writes pins are per worker; a user may '
+                       'read a lagging replica right after writing')
+    master.run()
@@ -1,3 +1,11 @@
 from .auth import AuthService, strict_authorizer, unstrict_authorizer
+from .idempotency import IdempotencyService
+from .import_jobs import (
+    ImportJobsService,
+    recover_import_jobs,
+    shutdown_import_pool
+)
 from .operations import OperationsService
+from .summary import SummaryService
+from .sweeper import get_sweeper
 from .users import UsersService
@@ -0,0 +1,6 @@
+from .auth import AsyncAuthService
+from .idempotency import AsyncIdempotencyService
+from .import_jobs import AsyncImportJobsService
+from .operations import AsyncOperationsService
+from .summary import AsyncSummaryService
+from .users import AsyncUsersService
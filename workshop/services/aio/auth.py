@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from workshop.schemas import JsonWebTokens, RefreshToken, UserCredentials
+
+from ..auth import AuthService
+from ..passwords import get_password_hasher, needs_rehash
+from .base import AsyncService
+
+
+class AsyncAuthService(AsyncService):
+    sync_service = AuthService
+
+    async def register_user(
+        self,
+        credentials: UserCredentials
+    ) -> JsonWebTokens:
+        password_hash = await get_password_hasher().hash_async(
+            credentials.password.get_secret_value()
+        )
+        return await self._run(
+            AuthService.create_user,
+            credentials.email,
+            password_hash
+        )
+
+    async def authenticate_user(
+        self,
+        credentials: UserCredentials
+    ) -> JsonWebTokens:
+        user = await self._run(
+            AuthService.get_user_with_email,
+            credentials.email
+        )
+        # See AuthService._get_user_and_close.
+        await self.session.close()
+        password = credentials.password.get_secret_value()
+        if (
+            not user
+            or not await get_password_hasher().verify_async(
+                password,
+                user.password_hash
+            )
+        ):
+            raise HTTPException(HTTPStatus.BAD_REQUEST, 'Invalid credentials')
+        if needs_rehash(user.password_hash):
+            password_hash = await get_password_hasher().hash_async(password)
+            await self._run(
+                AuthService.update_password_hash,
+                user,
+                password_hash
+            )
+        return AuthService.create_json_web_tokens(user)
+
+    async def refresh_tokens(self, payload: RefreshToken) -> JsonWebTokens:
+        return await self._run(AuthService.refresh_tokens, payload)
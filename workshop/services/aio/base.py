@@ -0,0 +1,31 @@
+from typing import Any, Callable, Type, TypeVar
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from workshop.db import get_async_session
+
+
+T = TypeVar('T')
+
+
+class AsyncService:
+    """Runs a sync service's methods on an AsyncSession.
+
+    ``AsyncSession.run_sync`` hands the sync service a Session facade whose
+    I/O is awaited on the async driver, so the business logic lives in one
+    place and no threadpool slot is taken.
+    """
+
+    sync_service: Type[Any]
+
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_async_session)
+    ) -> None:
+        self.session = session
+
+    async def _run(self, method: Callable[..., T], *args, **kwargs) -> T:
+        return await self.session.run_sync(
+            lambda session: method(self.sync_service(session), *args, **kwargs)
+        )
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from fastapi import Response
+
+from workshop.db import async_atomic
+
+from ..idempotency import IdempotencyService, StoredResponse, wait_delays
+from .base import AsyncService
+
+
+class AsyncIdempotencyService(AsyncService):
+    sync_service = IdempotencyService
+
+    async def run(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        handle: Callable[[], Awaitable[StoredResponse]]
+    ) -> Response:
+        delays = wait_delays()
+        while True:
+            owned, stored = await self._run(IdempotencyService.claim,
+                                            user_id, key, fingerprint)
+            if owned:
+                break
+            if stored is not None:
+                return stored.to_response(replayed=True)
+            await asyncio.sleep(next(delays))
+
+        try:
+            async with async_atomic(self.session):
+                response = await handle()
+                await self._run(IdempotencyService.complete,
+                                user_id, key, response)
+        except BaseException:
+            await self._run(IdempotencyService.release, user_id, key)
+            raise
+        return response.to_response()
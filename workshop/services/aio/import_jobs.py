@@ -0,0 +1,24 @@
+from typing import BinaryIO
+
+from starlette.concurrency import run_in_threadpool
+
+from workshop.schemas import ImportJobSchema
+
+from ..import_jobs import ImportJobsService, spool_upload
+from .base import AsyncService
+
+
+class AsyncImportJobsService(AsyncService):
+    sync_service = ImportJobsService
+
+    async def create_job(
+        self,
+        user_id: int,
+        file: BinaryIO
+    ) -> ImportJobSchema:
+        file_path = await run_in_threadpool(spool_upload, file)
+        return await self._run(ImportJobsService.register_job,
+                               user_id, file_path)
+
+    async def get_job(self, user_id: int, job_id: int) -> ImportJobSchema:
+        return await self._run(ImportJobsService.get_job, user_id, job_id)
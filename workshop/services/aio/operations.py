@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from workshop.db.models import Operation
+from workshop.config import get_settings
+from workshop.schemas import (
+    ExportFormat,
+    OperationChangesSchema,
+    OperationSchema,
+    OperationCreateSchema,
+    OperationUpdateSchema,
+    OperationsFilterSchema,
+    OperationsPageSchema,
+    OperationsBatchItemSchema,
+    OperationsBatchResultSchema
+)
+
+from ..operations import (
+    OperationsService,
+    encode_export_rows,
+    export_header,
+    export_statement
+)
+from ..routing import reading_for
+from .base import AsyncService
+
+
+class AsyncOperationsService(AsyncService):
+    sync_service = OperationsService
+
+    async def get_operations(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> OperationsPageSchema:
+        return await self._run(
+            OperationsService.get_operations,
+            user_id,
+            filters,
+            cursor=cursor,
+            limit=limit
+        )
+
+    async def get_operations_json(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> bytes:
+        return await self._run(
+            OperationsService.get_operations_json,
+            user_id,
+            filters,
+            cursor=cursor,
+            limit=limit
+        )
+
+    async def get_operations_json_if_changed(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        if_none_match: Optional[str] = None
+    ) -> Tuple[str, Optional[bytes]]:
+        return await self._run(
+            OperationsService.get_operations_json_if_changed,
+            user_id,
+            filters,
+            cursor=cursor,
+            limit=limit,
+            if_none_match=if_none_match
+        )
+
+    async def get_changes(
+        self,
+        user_id: int,
+        *,
+        since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 1000
+    ) -> OperationChangesSchema:
+        return await self._run(
+            OperationsService.get_changes,
+            user_id,
+            since=since,
+            cursor=cursor,
+            limit=limit
+        )
+
+    async def iter_export(
+        self,
+        user_id: int,
+        format_: ExportFormat
+    ) -> AsyncIterator[bytes]:
+        yield export_header(format_)
+        chunk_size = get_settings().export_chunk_size
+        with reading_for(self.session.sync_session, user_id):
+            result = await self.session.stream(export_statement(user_id))
+            async for rows in result.partitions(chunk_size):
+                yield encode_export_rows(rows, format_)
+
+    async def create_operation(
+        self,
+        user_id: int,
+        payload: OperationCreateSchema
+    ) -> Operation:
+        return await self._run(
+            OperationsService.create_operation,
+            user_id,
+            payload
+        )
+
+    async def apply_batch(
+        self,
+        user_id: int,
+        items: Sequence[OperationsBatchItemSchema]
+    ) -> List[OperationsBatchResultSchema]:
+        return await self._run(OperationsService.apply_batch, user_id, items)
+
+    async def get_operation(
+        self,
+        user_id: int,
+        operation_id: int
+    ) -> OperationSchema:
+        return await self._run(
+            OperationsService.get_operation,
+            user_id,
+            operation_id
+        )
+
+    async def update_operation(
+        self,
+        user_id: int,
+        operation_id: int,
+        payload: OperationUpdateSchema
+    ) -> OperationSchema:
+        return await self._run(
+            OperationsService.update_operation,
+            user_id,
+            operation_id,
+            payload
+        )
+
+    async def delete_operation(self, user_id: int, operation_id: int) -> None:
+        await self._run(
+            OperationsService.delete_operation,
+            user_id,
+            operation_id
+        )
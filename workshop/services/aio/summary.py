@@ -0,0 +1,27 @@
+from datetime import date
+from typing import Optional
+
+from workshop.schemas import OperationsSummarySchema, SummaryPeriod
+
+from ..summary import SummaryService
+from .base import AsyncService
+
+
+class AsyncSummaryService(AsyncService):
+    sync_service = SummaryService
+
+    async def get_summary(
+        self,
+        user_id: int,
+        *,
+        period: SummaryPeriod = SummaryPeriod.MONTH,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> OperationsSummarySchema:
+        return await self._run(
+            SummaryService.get_summary,
+            user_id,
+            period=period,
+            date_from=date_from,
+            date_to=date_to
+        )
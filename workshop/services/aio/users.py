@@ -0,0 +1,27 @@
+from typing import Tuple
+
+from workshop.db.models import User
+from workshop.schemas import SelfUserSchema, UserUpdateSchema
+
+from ..users import UsersService
+from .base import AsyncService
+
+
+class AsyncUsersService(AsyncService):
+    sync_service = UsersService
+
+    async def get_user_with_id(self, user_id: int) -> User:
+        return await self._run(UsersService.get_user_with_id, user_id)
+
+    async def get_user_with_username(self, username: str) -> User:
+        return await self._run(UsersService.get_user_with_username, username)
+
+    async def get_user_profile(self, username: str) -> Tuple[str, bytes]:
+        return await self._run(UsersService.get_user_profile, username)
+
+    async def update_user(
+        self,
+        user_id: int,
+        payload: UserUpdateSchema
+    ) -> SelfUserSchema:
+        return await self._run(UsersService.update_user, user_id, payload)
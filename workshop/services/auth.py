@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
-import hashlib
+from functools import lru_cache
 from http import HTTPStatus
-import secrets
+import math
+import time
 from typing import NewType, Optional
 from uuid import uuid1
 
@@ -14,16 +15,23 @@ from fastapi.security import (
 import jwt
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from workshop.config import settings
+from workshop.config import get_settings
 from workshop.db import get_session
 from workshop.db.models import User
+from workshop.metrics import instrument_service
 from workshop.schemas import (
     JsonWebTokens,
     UserCredentials,
     RefreshToken
 )
 
+from .cache import TTLCache
+from .passwords import get_password_hasher, needs_rehash
+from .routing import read_only, route_reads
+from .users import invalidate_profile
+
 
 class TokenType(str, Enum):
     ACCESS = 'access'
@@ -33,46 +41,69 @@ class TokenType(str, Enum):
 UserId = NewType('UserId', int)
 
 
+# Verified access tokens, so repeated requests with the same bearer token
+# skip the HMAC check and JSON parsing. Entries never outlive the token.
+@lru_cache()
+def get_access_token_cache() -> TTLCache[str, UserId]:
+    auth = get_settings().auth
+    return TTLCache(
+        auth.token_cache_size,
+        auth.token_cache_ttl.total_seconds()
+    )
+
+
+@instrument_service
+@route_reads
 class AuthService:
     def __init__(self, session: Session = Depends(get_session)) -> None:
         self.session = session
 
+    # Awaited, so a request waiting for the hasher pool does not hold a
+    # threadpool thread; the database work runs in the threadpool.
     @classmethod
-    def hash_password(cls, password: str) -> str:
-        return hashlib.md5(password.encode('utf-8')).hexdigest()
+    async def hash_password(cls, password: str) -> str:
+        return await get_password_hasher().hash_async(password)
 
     @classmethod
-    def verify_password(cls, password: str, password_hash: str) -> bool:
-        return secrets.compare_digest(cls.hash_password(password), password_hash)
+    async def verify_password(cls, password: str, password_hash: str) -> bool:
+        return await get_password_hasher().verify_async(password,
+                                                        password_hash)
 
     @classmethod
     def create_access_token(cls, user: User) -> str:
+        auth = get_settings().auth
         current_time = datetime.utcnow()
         payload = {
             'user_id': user.id,
             'iat': current_time,
-            'exp': current_time + settings.auth.access_token_expires_in,
+            'exp': current_time + auth.access_token_expires_in,
             'type': TokenType.ACCESS
         }
-        return jwt.encode(payload, settings.auth.jwt_secret, 'HS256')
+        return jwt.encode(payload, auth.jwt_secret, 'HS256')
 
     @classmethod
     def create_refresh_token(cls, user: User) -> str:
+        auth = get_settings().auth
         current_time = datetime.utcnow()
         payload = {
             'user_id': user.id,
             'iat': current_time,
-            'exp': current_time + settings.auth.refresh_token_expires_in,
+            'exp': current_time + auth.refresh_token_expires_in,
             'type': TokenType.REFRESH
         }
-        return jwt.encode(payload, settings.auth.jwt_secret, 'HS256')
+        return jwt.encode(payload, auth.jwt_secret, 'HS256')
 
     @classmethod
     def validate_access_token(cls, access_token: str) -> UserId:
+        access_token_cache = get_access_token_cache()
+        user_id = access_token_cache.get(access_token)
+        if user_id is not None:
+            return user_id
+
         try:
             token_payload = jwt.decode(
                 access_token,
-                settings.auth.jwt_secret,
+                get_settings().auth.jwt_secret,
                 ['HS256']
             )
         except jwt.PyJWTError:
@@ -82,16 +113,23 @@ class AuthService:
             raise HTTPException(HTTPStatus.UNAUTHORIZED)
 
         try:
-            return token_payload['user_id']
+            user_id = token_payload['user_id']
         except KeyError:
             raise HTTPException(HTTPStatus.UNAUTHORIZED)
 
+        access_token_cache.set(
+            access_token,
+            user_id,
+            ttl=token_payload.get('exp', math.inf) - time.time()
+        )
+        return user_id
+
     @classmethod
     def validate_refresh_token(cls, refresh_token: str) -> UserId:
         try:
             token_payload = jwt.decode(
                 refresh_token,
-                settings.auth.jwt_secret,
+                get_settings().auth.jwt_secret,
                 ['HS256']
             )
         except jwt.PyJWTError:
@@ -112,14 +150,11 @@ class AuthService:
             refresh_token=cls.create_refresh_token(user)
         )
 
-    def register_user(self, credentials: UserCredentials) -> JsonWebTokens:
+    def create_user(self, email: str, password_hash: str) -> JsonWebTokens:
         with self.session.begin():
             username = str(uuid1())
-            password_hash = self.hash_password(
-                credentials.password.get_secret_value()
-            )
             user = User(
-                email=credentials.email,
+                email=email,
                 username=username,
                 password_hash=password_hash
             )
@@ -133,19 +168,53 @@ class AuthService:
 
             return self.create_json_web_tokens(user)
 
-    def authenticate_user(self, credentials: UserCredentials) -> JsonWebTokens:
-        q = self.session.query(User).filter_by(email=credentials.email)
-        user: Optional[User] = q.scalar()
+    async def register_user(
+        self,
+        credentials: UserCredentials
+    ) -> JsonWebTokens:
+        password_hash = await self.hash_password(
+            credentials.password.get_secret_value()
+        )
+        return await run_in_threadpool(self.create_user, credentials.email,
+                                       password_hash)
+
+    def get_user_with_email(self, email: str) -> Optional[User]:
+        return self.session.query(User).filter_by(email=email).scalar()
+
+    def _get_user_and_close(self, email: str) -> Optional[User]:
+        user = self.get_user_with_email(email)
+        # Hand the connection back before the slow password check; with the
+        # SQLite single writer it would otherwise stall every write. The
+        # user stays usable detached and is re-added if rehashed.
+        self.session.close()
+        return user
+
+    def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password_hash = password_hash
+        self.session.add(user)
+        self.session.commit()
+        # updated_at moved, so the cached profile body and ETag are stale.
+        invalidate_profile(user.id)
+
+    async def authenticate_user(
+        self,
+        credentials: UserCredentials
+    ) -> JsonWebTokens:
+        user = await run_in_threadpool(self._get_user_and_close,
+                                       credentials.email)
+        password = credentials.password.get_secret_value()
         if (
             not user
-            or not self.verify_password(
-                credentials.password.get_secret_value(),
-                user.password_hash
-            )
+            or not await self.verify_password(password, user.password_hash)
         ):
             raise HTTPException(HTTPStatus.BAD_REQUEST, 'Invalid credentials')
+        if needs_rehash(user.password_hash):
+            password_hash = await self.hash_password(password)
+            await run_in_threadpool(self.update_password_hash, user,
+                                    password_hash)
         return self.create_json_web_tokens(user)
 
+    @read_only
     def refresh_tokens(self, payload: RefreshToken) -> JsonWebTokens:
         user_id = self.validate_refresh_token(payload.refresh_token)
         user = self.session.query(User).get(user_id)
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import logging
+from threading import Lock
+import time
+from typing import Dict, Generic, Hashable, Optional, Protocol, Tuple, TypeVar
+
+from workshop.config import CacheBackendName, ResponseCacheSettings
+
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    ``maxsize=0`` disables the cache: every lookup is a miss and nothing
+    is stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[K, Tuple[float, V]]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` can only shorten the configured TTL."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = time.monotonic() + ttl, value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries)
+        }
+
+
+class CacheBackend(Protocol):
+    """What the response caches need from a store of ``bytes`` values.
+
+    ``TTLCache`` is the in-process implementation; ``RedisCache`` shares
+    entries between workers and hosts.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+class RedisCache:
+    """``CacheBackend`` on Redis; needs the optional ``redis`` package.
+
+    Redis errors are logged and treated as misses, so an unavailable cache
+    slows requests down instead of failing them.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = '') -> None:
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError(
+                'The redis cache backend needs the redis package'
+            ) from error
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._error = redis.RedisError
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self._client.get(self.prefix + key)
+        except self._error:
+            self._fail('get')
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        try:
+            self._client.set(self.prefix + key, value, px=int(ttl * 1000))
+        except self._error:
+            self._fail('set')
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + key)
+        except self._error:
+            self._fail('delete')
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors
+        }
+
+    def _fail(self, command: str) -> None:
+        self.errors += 1
+        logger.warning('Redis cache %s failed', command, exc_info=True)
+
+
+def create_cache_backend(
+    cache_settings: ResponseCacheSettings,
+    prefix: str
+) -> CacheBackend:
+    ttl = cache_settings.ttl.total_seconds()
+    if cache_settings.backend == CacheBackendName.REDIS:
+        return RedisCache(cache_settings.redis_url, ttl, prefix)
+    return TTLCache(cache_settings.size, ttl)
@@ -0,0 +1,232 @@
+from datetime import datetime
+import hashlib
+from http import HTTPStatus
+import time
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union
+)
+
+from fastapi import Depends, HTTPException, Response
+from pydantic import BaseModel
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from workshop.config import get_settings
+from workshop.db import atomic, get_session
+from workshop.db.models import IdempotencyKey
+from workshop.metrics import instrument_service
+
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    content: bytes
+
+    @classmethod
+    def from_schema(
+        cls,
+        schema: BaseModel,
+        status_code: int = HTTPStatus.OK
+    ) -> 'StoredResponse':
+        return cls(int(status_code), schema.json(by_alias=True).encode())
+
+    def to_response(self, replayed: bool = False) -> Response:
+        headers = {REPLAYED_HEADER: 'true'} if replayed else None
+        return Response(self.content, self.status_code,
+                        headers=headers, media_type='application/json')
+
+
+def request_fingerprint(route: str, body: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 of the route and body; a file is read and rewound."""
+    digest = hashlib.sha256(route.encode())
+    digest.update(b'\0')
+    if isinstance(body, bytes):
+        digest.update(body)
+    else:
+        for chunk in iter(lambda: body.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        body.seek(0)
+    return digest.hexdigest()
+
+
+def wait_delays() -> Iterator[float]:
+    """Pauses between checks on a key in use, then 409 at wait_timeout."""
+    deadline = (time.monotonic()
+                + get_settings().idempotency.wait_timeout.total_seconds())
+    delay = 0.01
+    while time.monotonic() + delay < deadline:
+        yield delay
+        delay = min(delay * 2, 0.25)
+    raise HTTPException(
+        HTTPStatus.CONFLICT,
+        'A request with this Idempotency-Key is still in progress'
+    )
+
+
+@instrument_service
+class IdempotencyService:
+    """Runs a request once per (user, Idempotency-Key).
+
+    The first request inserts the key, then runs and stores its response
+    in one transaction with its writes; the unique constraint makes
+    concurrent duplicates find the key instead, and they poll until the
+    response is stored, then replay it. A request that fails releases its
+    key, so the client's retry runs it again. One that crashed before
+    committing left nothing behind but its key, which a retry takes over
+    after ``lock_timeout``.
+    """
+
+    def __init__(self, session: Session = Depends(get_session)) -> None:
+        self.session = session
+
+    def claim(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str
+    ) -> Tuple[bool, Optional[StoredResponse]]:
+        """Reserve ``key`` for this request.
+
+        Returns ``(True, None)`` when the caller should handle the request,
+        ``(False, response)`` when it already has a response to replay, and
+        ``(False, None)`` while another request holds the key.
+        """
+        now = datetime.utcnow()
+        idempotency = get_settings().idempotency
+        try:
+            with self.session.begin():
+                self.session.execute(
+                    sa.delete(IdempotencyKey)
+                    .where(IdempotencyKey.user_id == user_id)
+                    .where(IdempotencyKey.key == key)
+                    .where(IdempotencyKey.expires_at <= now)
+                )
+                self.session.add(IdempotencyKey(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + idempotency.ttl
+                ))
+            return True, None
+        except IntegrityError:
+            pass
+
+        # Compared in SQL, where created_at has the type it was stored with.
+        abandoned = IdempotencyKey.created_at <= now - idempotency.lock_timeout
+        # A plain read, so waiting on a key does not take the write lock.
+        row = self.session.query(
+            IdempotencyKey.id,
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response,
+            abandoned
+        ).filter_by(
+            user_id=user_id,
+            key=key
+        ).first()
+        self.session.rollback()
+        if row is None:
+            # Released in the meantime; the next attempt inserts it.
+            return False, None
+        row_id, row_fingerprint, status_code, content, stale = row
+        if row_fingerprint != fingerprint:
+            raise HTTPException(
+                HTTPStatus.UNPROCESSABLE_ENTITY,
+                'Idempotency-Key was already used for another request'
+            )
+        if status_code is not None:
+            return False, StoredResponse(status_code, content)
+        if not stale:
+            return False, None
+        # The request holding the key never finished; take it over, unless
+        # another request did since the read above.
+        with self.session.begin():
+            taken = self.session.execute(
+                sa.update(IdempotencyKey)
+                .where(IdempotencyKey.id == row_id)
+                .where(IdempotencyKey.status_code.is_(None))
+                .where(abandoned)
+                .values(created_at=now)
+            ).rowcount
+            return taken == 1, None
+
+    def complete(
+        self,
+        user_id: int,
+        key: str,
+        response: StoredResponse
+    ) -> None:
+        """Store the response, in the transaction of the request's writes."""
+        ttl = get_settings().idempotency.ttl
+        self.session.execute(
+            sa.update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id)
+            .where(IdempotencyKey.key == key)
+            .values(
+                status_code=response.status_code,
+                response=response.content,
+                expires_at=datetime.utcnow() + ttl
+            )
+        )
+
+    def release(self, user_id: int, key: str) -> None:
+        with self.session.begin():
+            self.session.execute(
+                sa.delete(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id)
+                .where(IdempotencyKey.key == key)
+                .where(IdempotencyKey.status_code.is_(None))
+            )
+
+    def run(
+        self,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        handle: Callable[[], StoredResponse]
+    ) -> Response:
+        delays = wait_delays()
+        while True:
+            owned, stored = self.claim(user_id, key, fingerprint)
+            if owned:
+                break
+            if stored is not None:
+                return stored.to_response(replayed=True)
+            time.sleep(next(delays))
+
+        try:
+            # The service writes in handle() join this transaction.
+            with atomic(self.session, begin=False):
+                response = handle()
+                self.complete(user_id, key, response)
+        except BaseException:
+            self.release(user_id, key)
+            raise
+        return response.to_response()
+
+    def purge_expired(self, batch_size: int) -> int:
+        """Delete up to ``batch_size`` expired keys; return how many."""
+        with self.session.begin():
+            ids = self.session.execute(
+                sa.select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+            ).scalars().all()
+            if ids:
+                self.session.execute(
+                    sa.delete(IdempotencyKey)
+                    .where(IdempotencyKey.id.in_(ids))
+                )
+            return len(ids)
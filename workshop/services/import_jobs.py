@@ -0,0 +1,265 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from workshop.config import get_settings
+from workshop.db import atomic, get_database, get_session, on_commit
+from workshop.db.models import ImportJob, ImportJobStatus
+from workshop.schemas import ImportJobSchema
+
+from .operations import (
+    OperationsService,
+    get_operations_cache,
+    to_naive_utc
+)
+from .routing import read_only, route_reads
+
+
+logger = logging.getLogger(__name__)
+
+# What a client sees of a failed import; the cause is only logged.
+FAILED_ERROR = 'The import failed'
+INTERRUPTED_ERROR = 'The import was interrupted'
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Jobs submitted to the pool and not finished yet, by id.
+_queued: Dict[int, Future] = {}
+
+
+def get_import_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked workers, so they never inherit the
+        # API process' pooled connections or threads.
+        _pool = ProcessPoolExecutor(
+            max_workers=get_settings().import_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def shutdown_import_pool() -> None:
+    """Wait for the running imports; drop the queued ones.
+
+    Dropped jobs stay pending, and the next worker to start queues them
+    again (see ``recover_import_jobs``).
+    """
+    global _pool
+    if _pool is None:
+        return
+    # Cancelled futures leave _queued as they are cancelled.
+    queued = dict(_queued)
+    _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    cancelled = sorted(
+        job_id for job_id, future in queued.items() if future.cancelled()
+    )
+    if cancelled:
+        logger.info('Left import jobs %s pending for the next start',
+                    ', '.join(map(str, cancelled)))
+
+
+def spool_upload(file: BinaryIO) -> str:
+    import_dir = get_settings().import_dir
+    os.makedirs(import_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=import_dir,
+        suffix='.csv',
+        delete=False
+    ) as spooled:
+        shutil.copyfileobj(file, spooled)
+        return spooled.name
+
+
+def submit_import_job(user_id: int, job_id: int) -> None:
+    future = get_import_pool().submit(run_import_job, job_id)
+    _queued[job_id] = future
+
+    def done(_: Future) -> None:
+        _queued.pop(job_id, None)
+        # The worker process writes behind this process' operations cache.
+        get_operations_cache().invalidate(user_id)
+
+    future.add_done_callback(done)
+
+
+def recover_import_jobs() -> None:
+    """Fail interrupted imports and queue the pending ones again.
+
+    Runs as every worker starts. Queueing a job another worker has queued
+    too is harmless: only the first to start it runs it.
+    """
+    interrupted_before = (datetime.utcnow()
+                          - get_settings().import_job_timeout)
+    with get_database().Session() as session:
+        service = ImportJobsService(session)
+        failed = service.fail_interrupted_jobs(interrupted_before)
+        pending = service.pending_jobs()
+    if failed:
+        logger.warning('Marked %d interrupted import jobs failed', failed)
+    for user_id, job_id in pending:
+        submit_import_job(user_id, job_id)
+    if pending:
+        logger.info('Queued %d pending import jobs', len(pending))
+
+
+def run_import_job(job_id: int) -> None:
+    """Entry point executed inside an import worker process."""
+    session = get_database().Session()
+    try:
+        ImportJobsService(session).run_job(job_id)
+    finally:
+        session.close()
+
+
+@route_reads
+class ImportJobsService:
+    def __init__(self, session: Session = Depends(get_session)) -> None:
+        self.session = session
+
+    @classmethod
+    def _to_schema(cls, job: ImportJob) -> ImportJobSchema:
+        throughput = None
+        if job.started_at is not None:
+            # Naive on SQLite, aware on Postgres (timestamptz).
+            finished_at = to_naive_utc(job.finished_at or datetime.utcnow())
+            elapsed = (finished_at
+                       - to_naive_utc(job.started_at)).total_seconds()
+            throughput = job.processed / elapsed if elapsed > 0 else None
+        return ImportJobSchema(
+            id=job.id,
+            status=job.status,
+            processed=job.processed,
+            inserted=job.inserted,
+            rejected=job.rejected,
+            throughput=throughput,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at
+        )
+
+    def register_job(self, user_id: int, file_path: str) -> ImportJobSchema:
+        """Insert the job; it is queued once the transaction commits."""
+        with atomic(self.session):
+            job = ImportJob(user_id=user_id, file_path=file_path)
+            self.session.add(job)
+            self.session.flush()
+            job_id = job.id
+            on_commit(self.session,
+                      lambda: submit_import_job(user_id, job_id))
+            return self._to_schema(job)
+
+    def create_job(self, user_id: int, file: BinaryIO) -> ImportJobSchema:
+        return self.register_job(user_id, spool_upload(file))
+
+    @read_only
+    def get_job(self, user_id: int, job_id: int) -> ImportJobSchema:
+        job = self.session.query(ImportJob).filter_by(
+            id=job_id,
+            user_id=user_id
+        ).scalar()
+        if not job:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+        return self._to_schema(job)
+
+    def pending_jobs(self) -> List[Tuple[int, int]]:
+        """``(user_id, job_id)`` of the jobs not started yet."""
+        return [
+            (user_id, job_id) for user_id, job_id in self.session.query(
+                ImportJob.user_id,
+                ImportJob.id
+            ).filter_by(
+                status=ImportJobStatus.PENDING
+            ).order_by(ImportJob.id)
+        ]
+
+    def fail_interrupted_jobs(self, interrupted_before: datetime) -> int:
+        """Fail running jobs last updated before ``interrupted_before``."""
+        with self.session.begin():
+            interrupted = (
+                sa.select(ImportJob.id, ImportJob.file_path)
+                .where(ImportJob.status == ImportJobStatus.RUNNING)
+                .where(ImportJob.updated_at <= interrupted_before)
+            )
+            failed_count = 0
+            for job_id, file_path in self.session.execute(interrupted).all():
+                # Unless it made progress since the read above.
+                failed = self.session.execute(
+                    sa.update(ImportJob)
+                    .where(ImportJob.id == job_id)
+                    .where(ImportJob.status == ImportJobStatus.RUNNING)
+                    .where(ImportJob.updated_at <= interrupted_before)
+                    .values(status=ImportJobStatus.FAILED,
+                            finished_at=datetime.utcnow(),
+                            error=INTERRUPTED_ERROR)
+                ).rowcount
+                if failed:
+                    failed_count += 1
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+            return failed_count
+
+    def _update_job(self, job_id: int, **values) -> None:
+        with self.session.begin():
+            self.session.execute(
+                sa.update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(**values)
+            )
+
+    def _start_job(self, job_id: int) -> Optional[Tuple[int, str]]:
+        """Mark the job running; ``None`` if another worker started it."""
+        with self.session.begin():
+            started = self.session.execute(
+                sa.update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .where(ImportJob.status == ImportJobStatus.PENDING)
+                .values(status=ImportJobStatus.RUNNING,
+                        started_at=datetime.utcnow())
+            ).rowcount
+            if not started:
+                return None
+            return self.session.query(
+                ImportJob.user_id,
+                ImportJob.file_path
+            ).filter_by(id=job_id).one()
+
+    def run_job(self, job_id: int) -> None:
+        job = self._start_job(job_id)
+        if job is None:
+            return
+        user_id, file_path = job
+
+        operations = OperationsService(self.session)
+        try:
+            with open(file_path, 'rb') as file:
+                for chunk in operations.iter_import_chunks(user_id, file):
+                    self._update_job(
+                        job_id,
+                        processed=ImportJob.processed + chunk.inserted
+                        + chunk.rejected,
+                        inserted=ImportJob.inserted + chunk.inserted,
+                        rejected=ImportJob.rejected + chunk.rejected
+                    )
+        except Exception:
+            logger.exception('Import job %d failed', job_id)
+            self._update_job(job_id, status=ImportJobStatus.FAILED,
+                             finished_at=datetime.utcnow(),
+                             error=FAILED_ERROR)
+            raise
+        else:
+            self._update_job(job_id, status=ImportJobStatus.DONE,
+                             finished_at=datetime.utcnow())
+        finally:
+            os.remove(file_path)
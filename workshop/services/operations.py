@@ -1,99 +1,957 @@
+import base64
+from collections import defaultdict
 import csv
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
 from http import HTTPStatus
-from typing import BinaryIO, List, Optional
+import io
+from itertools import islice
+import json
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple
+)
 
 from fastapi import Depends, HTTPException
 from pydantic import ValidationError
+import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
-from workshop.db import get_session
-from workshop.db.models import Operation, OperationType
-from workshop.schemas import OperationCreateSchema, OperationUpdateSchema
+from workshop.config import get_settings
+from workshop.db import atomic, get_session, on_commit
+from workshop.db.models import Operation, OperationTombstone, OperationType
+from workshop.etag import etag_matches, make_etag
+from workshop.metrics import instrument_service
+from workshop.schemas import (
+    BatchAction,
+    ExportFormat,
+    OperationChangesSchema,
+    OperationSchema,
+    OperationCreateSchema,
+    OperationUpdateSchema,
+    OperationsFilterSchema,
+    OperationsPageSchema,
+    OperationsBatchItemSchema,
+    OperationsBatchResultSchema,
+    OperationsImportChunkSchema,
+    OperationsImportReportSchema
+)
+from workshop.schemas.encoders import RowEncoder
 
+from .operations_cache import (
+    OperationRecord,
+    OperationsCache,
+    UserOperations,
+    to_record
+)
+from .routing import read_only, reading_for, route_reads
+from .summary import RollupDeltasBuilder, apply_rollup_deltas
 
+
+def encode_keyset(timestamp: datetime, operation_id: int) -> str:
+    raw = f'{timestamp.isoformat()}|{operation_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def encode_cursor(operation: Operation) -> str:
+    return encode_keyset(operation.created_at, operation.id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, operation_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(operation_id)
+    except ValueError:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, 'Invalid cursor')
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Bring a filter bound to the naive UTC ``created_at`` is stored in."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+operation_fts = sa.table(
+    'operation_fts',
+    sa.column('rowid'),
+    sa.column('operation_fts')
+)
+
+
+def description_search(q: str, dialect: str) -> sa.sql.ColumnElement:
+    """Match every word of ``q`` against the operation description.
+
+    Uses the full-text index created for the backend (see
+    ``workshop.db.models.operation``) and a LIKE scan where there is none.
+    """
+    words = q.split()
+    if dialect == 'sqlite':
+        # Each word becomes a quoted prefix token, so FTS5 query syntax
+        # coming from the client is matched literally.
+        match = ' '.join(
+            '"{}"*'.format(word.replace('"', '""')) for word in words
+        )
+        return Operation.id.in_(
+            sa.select(operation_fts.c.rowid).where(
+                operation_fts.c.operation_fts.op('MATCH')(match)
+            )
+        )
+    if dialect == 'postgresql':
+        # Must stay identical to the ix_operation_description_tsv expression.
+        document = sa.func.to_tsvector(
+            sa.literal_column("'simple'"),
+            sa.func.coalesce(Operation.description, sa.literal_column("''"))
+        )
+        return document.op('@@')(sa.func.plainto_tsquery(
+            sa.literal_column("'simple'"),
+            ' '.join(words)
+        ))
+    return sa.and_(*(
+        Operation.description.ilike(
+            '%{}%'.format(
+                word.replace('\\', '\\\\')
+                .replace('%', '\\%')
+                .replace('_', '\\_')
+            ),
+            escape='\\'
+        )
+        for word in words
+    ))
+
+
+# Order matches ix_operation_user_id_created_at, so every page is a single
+# index range scan starting right after the cursor.
+PAGE_ORDER = (Operation.created_at.desc(), Operation.id)
+
+operation_encoder = RowEncoder(OperationSchema, OperationSchema.__fields__)
+OPERATION_COLUMNS = [
+    Operation.__mapper__.columns[name] for name in operation_encoder.fields
+]
+ITEMS_KEY = OperationsPageSchema.__fields__['items'].alias
+NEXT_CURSOR_KEY = OperationsPageSchema.__fields__['next_cursor'].alias
+
+# Each user's operations for list and detail reads; the write methods below
+# update it after they commit.
+@lru_cache()
+def get_operations_cache() -> OperationsCache:
+    return OperationsCache.from_settings(get_settings().operations_cache)
+
+
+def searches(filters: Optional[OperationsFilterSchema]) -> bool:
+    """Whether ``filters`` needs the description index, i.e. the database."""
+    return (
+        filters is not None
+        and filters.q is not None
+        and bool(filters.q.strip())
+    )
+
+
+def add_tombstones(
+    session: Session,
+    user_id: int,
+    operation_ids: Iterable[int],
+    deleted_at: Optional[datetime] = None
+) -> None:
+    """Record deletions for the changes feed, in the caller's transaction."""
+    deleted_at = deleted_at or datetime.utcnow()
+    session.execute(sa.insert(OperationTombstone), [
+        {'operation_id': operation_id, 'user_id': user_id,
+         'deleted_at': deleted_at}
+        for operation_id in operation_ids
+    ])
+
+
+def tombstones_horizon() -> datetime:
+    """Deletions before this time may have been purged."""
+    return datetime.utcnow() - get_settings().purge.tombstone_retention
+
+
+def check_horizon(changed_after: datetime) -> None:
+    if changed_after < tombstones_horizon():
+        raise HTTPException(
+            HTTPStatus.GONE,
+            'Deletions this old are no longer kept, sync from scratch'
+        )
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: 'application/x-ndjson',
+    ExportFormat.CSV: 'text/csv'
+}
+
+
+def export_statement(user_id: int) -> sa.sql.Select:
+    return sa.select(
+        *(getattr(Operation, name) for name in operation_encoder.fields)
+    ).where(
+        Operation.user_id == user_id
+    ).order_by(*PAGE_ORDER).execution_options(stream_results=True)
+
+
+def export_header(format_: ExportFormat) -> bytes:
+    if format_ == ExportFormat.CSV:
+        return (','.join(operation_encoder.fields) + '\r\n').encode('utf-8')
+    return b''
+
+
+def encode_export_rows(
+    rows: Sequence[Sequence[Any]],
+    format_: ExportFormat
+) -> bytes:
+    """Encode one partition of export rows.
+
+    The CSV columns use field names, so the file can be fed back to
+    ``POST /operations/import`` (extra columns are ignored there).
+    """
+    if format_ == ExportFormat.NDJSON:
+        return ''.join(
+            operation_encoder.encode(row) + '\n' for row in rows
+        ).encode('utf-8')
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            value.value if isinstance(value, OperationType) else value
+            for value in row
+        )
+    return buffer.getvalue().encode('utf-8')
+
+
+@instrument_service
+@route_reads
 class OperationsService:
     def __init__(self, session: Session = Depends(get_session)) -> None:
         self.session = session
 
+    @read_only
     def get_operations(
         self,
         user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
         *,
-        type_: Optional[OperationType] = None
-    ) -> List[Operation]:
-        q = self.session.query(Operation).order_by(
-            Operation.created_at.desc()
-        ).filter_by(
-            user_id=user_id
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> OperationsPageSchema:
+        operations = self._cached_page(
+            None if searches(filters) else self._cached_operations(user_id),
+            filters,
+            cursor,
+            limit
         )
+        if operations is None:
+            operations = self.session.query(Operation).filter(
+                *self._page_criteria(user_id, filters, cursor)
+            ).order_by(*PAGE_ORDER).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(operations) > limit:
+            operations = operations[:limit]
+            next_cursor = encode_cursor(operations[-1])
+        return OperationsPageSchema(items=operations, next_cursor=next_cursor)
+
+    @read_only
+    def get_operations_json(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> bytes:
+        """Same page as ``get_operations``, already encoded as JSON.
+
+        Selects only the schema's columns as Core rows and encodes them with
+        a precomputed RowEncoder, skipping ORM identity-map loads, pydantic
+        validation and ``jsonable_encoder``.
+        """
+        return self._operations_json(
+            user_id,
+            filters,
+            cursor,
+            limit,
+            None if searches(filters) else self._cached_operations(user_id)
+        )
+
+    def _operations_json(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema],
+        cursor: Optional[str],
+        limit: int,
+        entry: Optional[UserOperations]
+    ) -> bytes:
+        rows = self._cached_page(entry, filters, cursor, limit)
+        if rows is None:
+            statement = sa.select(
+                *(getattr(Operation, name)
+                  for name in operation_encoder.fields)
+            ).where(
+                *self._page_criteria(user_id, filters, cursor)
+            ).order_by(*PAGE_ORDER).limit(limit + 1)
+            rows = self.session.execute(statement).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1])
+        return (
+            f'{{"{ITEMS_KEY}":{operation_encoder.encode_many(rows)},'
+            f'"{NEXT_CURSOR_KEY}":{json.dumps(next_cursor)}}}'
+        ).encode('utf-8')
+
+    @read_only
+    def get_operations_json_if_changed(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        if_none_match: Optional[str] = None
+    ) -> Tuple[str, Optional[bytes]]:
+        """``get_operations_json`` behind an ``If-None-Match`` check.
+
+        The ETag covers the user's latest write and the page parameters.
+        On a match the page is not read and the body is None.
+        """
+        entry = self._cached_operations(user_id)
+        etag = make_etag(
+            *(
+                entry.version if entry is not None
+                else self._operations_version(user_id)
+            ),
+            filters.json() if filters is not None else None,
+            cursor,
+            limit
+        )
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, self._operations_json(
+            user_id,
+            filters,
+            cursor,
+            limit,
+            None if searches(filters) else entry
+        )
+
+    def _cached_operations(self, user_id: int) -> Optional[UserOperations]:
+        return get_operations_cache().get(
+            user_id,
+            lambda max_operations: self._load_operations(user_id,
+                                                         max_operations),
+            lambda: self._operations_version(user_id)
+        )
+
+    def _load_operations(
+        self,
+        user_id: int,
+        max_operations: int
+    ) -> Optional[UserOperations]:
+        rows = self.session.execute(
+            sa.select(*OPERATION_COLUMNS).where(
+                Operation.user_id == user_id
+            ).order_by(*PAGE_ORDER).limit(max_operations + 1)
+        ).all()
+        if len(rows) > max_operations:
+            return None
+        deleted_at = self.session.execute(
+            sa.select(sa.func.max(OperationTombstone.deleted_at)).where(
+                OperationTombstone.user_id == user_id
+            )
+        ).scalar()
+        return UserOperations.build(map(OperationRecord._make, rows),
+                                    deleted_at)
+
+    @staticmethod
+    def _cached_page(
+        entry: Optional[UserOperations],
+        filters: Optional[OperationsFilterSchema],
+        cursor: Optional[str],
+        limit: int
+    ) -> Optional[List[OperationRecord]]:
+        """``limit + 1`` records from the cache, None without an entry."""
+        if entry is None:
+            return None
+        after = decode_cursor(cursor) if cursor is not None else None
+        return entry.page(filters, after, limit + 1)
+
+    def _operations_version(
+        self,
+        user_id: int
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        # Two max() lookups served from the (user_id, updated_at) and
+        # (user_id, deleted_at) indexes, in one round trip.
+        return tuple(self.session.execute(sa.select(
+            sa.select(sa.func.max(Operation.updated_at)).where(
+                Operation.user_id == user_id
+            ).scalar_subquery(),
+            sa.select(sa.func.max(OperationTombstone.deleted_at)).where(
+                OperationTombstone.user_id == user_id
+            ).scalar_subquery()
+        )).one())
+
+    @read_only
+    def get_changes(
+        self,
+        user_id: int,
+        *,
+        since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 1000
+    ) -> OperationChangesSchema:
+        """Operations written and ids deleted after ``since`` or ``cursor``.
+
+        Both come from one stream ordered by (changed_at, operation_id).
+        ``next_cursor`` is the position after the page. Clients keep it and
+        send it back later to fetch only what changed since. Positions
+        older than ``tombstone_retention`` get 410, as deletions after them
+        may have been purged.
+        """
+        table = Operation.__table__
+        updated = sa.select(
+            *OPERATION_COLUMNS,
+            table.c.updated_at.label('changed_at'),
+            sa.literal(False).label('deleted')
+        ).where(Operation.user_id == user_id)
+        deleted = sa.select(
+            *(
+                OperationTombstone.operation_id
+                if column is table.c.operation_id
+                else sa.cast(sa.null(), column.type).label(column.name)
+                for column in OPERATION_COLUMNS
+            ),
+            OperationTombstone.deleted_at.label('changed_at'),
+            sa.literal(True).label('deleted')
+        ).where(OperationTombstone.user_id == user_id)
+
+        if cursor is not None:
+            after_at, after_id = decode_cursor(cursor)
+            # Aware when the column came back aware (Postgres timestamptz)
+            # or a client sent an offset.
+            after_at = to_naive_utc(after_at)
+            check_horizon(after_at)
+            updated = updated.where(sa.or_(
+                Operation.updated_at > after_at,
+                sa.and_(Operation.updated_at == after_at,
+                        Operation.id > after_id)
+            ))
+            deleted = deleted.where(sa.or_(
+                OperationTombstone.deleted_at > after_at,
+                sa.and_(OperationTombstone.deleted_at == after_at,
+                        OperationTombstone.operation_id > after_id)
+            ))
+        elif since is not None:
+            since = to_naive_utc(since)
+            check_horizon(since)
+            updated = updated.where(Operation.updated_at > since)
+            deleted = deleted.where(OperationTombstone.deleted_at > since)
+
+        # Each branch is cut to one page along its own index before the
+        # merge, so a page never sorts more than 2 * (limit + 1) rows.
+        updated = updated.order_by(
+            table.c.updated_at, table.c.operation_id
+        ).limit(limit + 1).subquery()
+        deleted = deleted.order_by(
+            OperationTombstone.deleted_at, OperationTombstone.operation_id
+        ).limit(limit + 1).subquery()
+        changes = sa.union_all(
+            sa.select(updated), sa.select(deleted)
+        ).subquery()
+        rows = self.session.execute(
+            sa.select(changes).order_by(
+                changes.c.changed_at,
+                changes.c.operation_id
+            ).limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        page = OperationChangesSchema(has_more=has_more, next_cursor=cursor)
+        if rows:
+            page.next_cursor = encode_keyset(rows[-1].changed_at,
+                                             rows[-1].operation_id)
+        elif cursor is None and since is not None:
+            page.next_cursor = encode_keyset(since, 0)
+        for row in rows:
+            if row.deleted:
+                page.deleted.append(row.operation_id)
+            else:
+                page.items.append(OperationSchema(
+                    **dict(zip(operation_encoder.fields, row))
+                ))
+        return page
+
+    def purge_tombstones(self, batch_size: int) -> int:
+        """Delete up to ``batch_size`` tombstones past the retention."""
+        with self.session.begin():
+            ids = self.session.execute(
+                sa.select(OperationTombstone.id)
+                .where(OperationTombstone.deleted_at < tombstones_horizon())
+                .limit(batch_size)
+            ).scalars().all()
+            if ids:
+                self.session.execute(
+                    sa.delete(OperationTombstone)
+                    .where(OperationTombstone.id.in_(ids))
+                )
+            return len(ids)
 
-        if type_ is not None:
-            q = q.filter_by(type=type_)
+    def iter_export(
+        self,
+        user_id: int,
+        format_: ExportFormat
+    ) -> Iterator[bytes]:
+        """Stream every operation of the user from a server-side cursor.
+
+        Rows are fetched and encoded ``Settings.export_chunk_size`` at a
+        time, so memory does not grow with the number of operations.
+        """
+        yield export_header(format_)
+        # Generators are not routed by route_reads; read explicitly so a
+        # long export does not hold the SQLite writer connection.
+        with reading_for(self.session, user_id):
+            result = self.session.execute(export_statement(user_id))
+            for rows in result.partitions(get_settings().export_chunk_size):
+                yield encode_export_rows(rows, format_)
+
+    def _page_criteria(
+        self,
+        user_id: int,
+        filters: Optional[OperationsFilterSchema],
+        cursor: Optional[str]
+    ) -> List[sa.sql.ColumnElement]:
+        criteria = [Operation.user_id == user_id]
 
-        return q.all()
+        if filters is not None:
+            criteria.extend(self._filter_criteria(filters))
+
+        if cursor is not None:
+            created_at, operation_id = decode_cursor(cursor)
+            criteria.append(sa.or_(
+                Operation.created_at < created_at,
+                sa.and_(
+                    Operation.created_at == created_at,
+                    Operation.id > operation_id
+                )
+            ))
+
+        return criteria
+
+    def _filter_criteria(
+        self,
+        filters: OperationsFilterSchema
+    ) -> List[sa.sql.ColumnElement]:
+        criteria = []
+
+        if filters.type is not None:
+            criteria.append(Operation.type == filters.type)
+        if filters.created_from is not None:
+            criteria.append(
+                Operation.created_at >= to_naive_utc(filters.created_from)
+            )
+        if filters.created_to is not None:
+            criteria.append(
+                Operation.created_at <= to_naive_utc(filters.created_to)
+            )
+        if filters.min_amount is not None:
+            criteria.append(Operation.amount >= filters.min_amount)
+        if filters.max_amount is not None:
+            criteria.append(Operation.amount <= filters.max_amount)
+        if filters.q is not None and filters.q.strip():
+            dialect = self.session.get_bind().dialect.name
+            criteria.append(description_search(filters.q, dialect))
+
+        return criteria
 
     def create_operation(
         self,
         user_id: int,
         payload: OperationCreateSchema
     ) -> Operation:
-        with self.session.begin():
+        with atomic(self.session):
             operation = Operation(
                 user_id=user_id,
                 **payload.dict()
             )
             self.session.add(operation)
             self.session.flush()
-            return operation
+            apply_rollup_deltas(self.session, RollupDeltasBuilder().add(
+                user_id,
+                operation.created_at.date(),
+                operation.type,
+                operation.amount
+            ).deltas)
+            record = to_record(operation)
+            on_commit(self.session, lambda: get_operations_cache().update(
+                user_id,
+                put=[record]
+            ))
+        return operation
+
+    @read_only
+    def get_operation(
+        self,
+        user_id: int,
+        operation_id: int
+    ) -> OperationSchema:
+        entry = self._cached_operations(user_id)
+        if entry is not None:
+            record = entry.by_id.get(operation_id)
+            if record is None:
+                raise HTTPException(HTTPStatus.NOT_FOUND)
+            return OperationSchema(**record._asdict())
 
-    def get_operation(self, user_id: int, operation_id: int) -> Operation:
         operation = self.session.query(Operation).filter_by(
             id=operation_id,
             user_id=user_id
         ).scalar()
         if not operation:
             raise HTTPException(HTTPStatus.NOT_FOUND)
-        return operation
+        return OperationSchema.from_orm(operation)
 
     def update_operation(
         self,
         user_id: int,
-        operation_id: int, 
+        operation_id: int,
         payload: OperationUpdateSchema
-    ) -> Operation:
+    ) -> OperationSchema:
+        """Patch an operation with one ``UPDATE ... RETURNING``.
+
+        When amount or type change, the pre-update values for the rollup
+        come from a locked ``old`` row joined into the same statement.
+        """
+        values = payload.dict(exclude_unset=True)
+        values['updated_at'] = datetime.utcnow()
+        table = Operation.__table__
+        where = (table.c.operation_id == operation_id,
+                 table.c.user_id == user_id)
+        rollup_changed = not values.keys().isdisjoint({'amount', 'type'})
+
         with self.session.begin():
-            operation = self.get_operation(user_id, operation_id)
-            for field, value in payload.dict(exclude_unset=True).items():
-                setattr(operation, field, value)
-            self.session.add(operation)
-            self.session.flush()
-            return operation
+            if self._supports_returning():
+                operation = self._update_operation_returning(
+                    user_id, where, values, rollup_changed
+                )
+            else:
+                operation = self._update_operation_fallback(
+                    user_id, where, values, rollup_changed
+                )
+        get_operations_cache().update(user_id, put=[to_record(operation)])
+        return operation
+
+    def _update_operation_returning(
+        self,
+        user_id: int,
+        where: Sequence[sa.sql.ColumnElement],
+        values: Dict[str, Any],
+        rollup_changed: bool
+    ) -> OperationSchema:
+        table = Operation.__table__
+        statement = sa.update(table).values(values)
+        if rollup_changed:
+            old = sa.select(
+                table.c.operation_id, table.c.amount, table.c.type
+            ).where(*where).with_for_update().subquery('old')
+            statement = statement.where(
+                table.c.operation_id == old.c.operation_id
+            ).returning(*OPERATION_COLUMNS, old.c.amount, old.c.type)
+        else:
+            statement = statement.where(*where).returning(*OPERATION_COLUMNS)
+
+        row = self.session.execute(statement).first()
+        if row is None:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+        operation = dict(zip(operation_encoder.fields, row))
+        if rollup_changed:
+            old_amount, old_type = row[len(OPERATION_COLUMNS):]
+            self._apply_update_deltas(user_id, operation, old_amount, old_type)
+        return OperationSchema(**operation)
+
+    def _update_operation_fallback(
+        self,
+        user_id: int,
+        where: Sequence[sa.sql.ColumnElement],
+        values: Dict[str, Any],
+        rollup_changed: bool
+    ) -> OperationSchema:
+        # SQLAlchemy 1.4 cannot emit RETURNING for SQLite, so the row is read
+        # with a Core SELECT first; still no ORM load or flush.
+        row = self.session.execute(
+            sa.select(*OPERATION_COLUMNS).where(*where)
+        ).first()
+        result = self.session.execute(
+            sa.update(Operation.__table__).where(*where).values(values)
+        )
+        if row is None or result.rowcount == 0:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+        operation = dict(zip(operation_encoder.fields, row))
+        old_amount, old_type = operation['amount'], operation['type']
+        operation.update(values)
+        if rollup_changed:
+            self._apply_update_deltas(user_id, operation, old_amount, old_type)
+        return OperationSchema(**operation)
+
+    def _apply_update_deltas(
+        self,
+        user_id: int,
+        operation: Dict[str, Any],
+        old_amount: Decimal,
+        old_type: OperationType
+    ) -> None:
+        day = operation['created_at'].date()
+        apply_rollup_deltas(self.session, RollupDeltasBuilder().add(
+            user_id, day, old_type, old_amount, sign=-1
+        ).add(
+            user_id, day, operation['type'], operation['amount']
+        ).deltas)
 
     def delete_operation(
         self,
         user_id: int,
         operation_id: int
     ) -> None:
+        table = Operation.__table__
+        where = (table.c.operation_id == operation_id,
+                 table.c.user_id == user_id)
+        rollup_columns = (table.c.created_at, table.c.type, table.c.amount)
+        deleted_at = datetime.utcnow()
+
         with self.session.begin():
-            operation = self.get_operation(user_id, operation_id)
-            self.session.delete(operation)
-            self.session.flush()
+            if self._supports_returning():
+                row = self.session.execute(
+                    sa.delete(table).where(*where).returning(*rollup_columns)
+                ).first()
+            else:
+                row = self.session.execute(
+                    sa.select(*rollup_columns).where(*where)
+                ).first()
+                result = self.session.execute(sa.delete(table).where(*where))
+                if result.rowcount == 0:
+                    row = None
+            if row is None:
+                raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    def import_operations(self, user_id: int, file: BinaryIO) -> None:
-        try:
-            parsed_operations = [
-                OperationCreateSchema.parse_obj(record)
-                for record in csv.DictReader(
-                    map(lambda line: line.decode('utf-8'), file), 
-                    skipinitialspace=True
-                )
-            ]
-        except ValidationError:
-            return
+            created_at, type_, amount = row
+            add_tombstones(self.session, user_id, [operation_id], deleted_at)
+            apply_rollup_deltas(self.session, RollupDeltasBuilder().add(
+                user_id,
+                created_at.date(),
+                type_,
+                amount,
+                sign=-1
+            ).deltas)
+        get_operations_cache().update(user_id, removed=[operation_id],
+                                      deleted_at=deleted_at)
+
+    def _supports_returning(self) -> bool:
+        return self.session.get_bind().dialect.full_returning
+
+    def apply_batch(
+        self,
+        user_id: int,
+        items: Sequence[OperationsBatchItemSchema]
+    ) -> List[OperationsBatchResultSchema]:
+        """Apply create/update/delete actions in order, in one transaction.
+
+        Rows referenced by updates and deletes are read with one SELECT and
+        the actions are replayed in memory, so each id is written once: one
+        DELETE for every deleted id, one UPDATE per distinct set of changes
+        and a single flush for the new rows. An action on a missing
+        operation gets a 404 result instead of failing the batch.
+        """
+        now = datetime.utcnow()
+        results: List[OperationsBatchResultSchema] = []
+        created: List[Tuple[OperationsBatchResultSchema, Operation]] = []
+        changes: Dict[int, Dict[str, Any]] = {}
+        deleted = set()
+        deltas = RollupDeltasBuilder()
 
         with self.session.begin():
-            self.session.add_all([
-                Operation(user_id=user_id, **payload.dict())
-                for payload in parsed_operations
-            ])
+            rows = self._load_batch_rows(user_id, {
+                item.id for item in items
+                if item.action != BatchAction.CREATE
+            })
+
+            for item in items:
+                result = OperationsBatchResultSchema(
+                    action=item.action,
+                    status=HTTPStatus.OK,
+                    id=getattr(item, 'id', None)
+                )
+                results.append(result)
+
+                if item.action == BatchAction.CREATE:
+                    operation = Operation(
+                        user_id=user_id,
+                        created_at=now,
+                        updated_at=now,
+                        **item.data.dict()
+                    )
+                    self.session.add(operation)
+                    created.append((result, operation))
+                    deltas.add(user_id, now.date(),
+                               operation.type, operation.amount)
+                    continue
+
+                row = rows.get(item.id)
+                if row is None:
+                    result.status = HTTPStatus.NOT_FOUND
+                    continue
+
+                deltas.add(user_id, row['created_at'].date(),
+                           row['type'], row['amount'], sign=-1)
+                if item.action == BatchAction.DELETE:
+                    del rows[item.id]
+                    changes.pop(item.id, None)
+                    deleted.add(item.id)
+                    result.status = HTTPStatus.NO_CONTENT
+                    continue
+
+                update = item.data.dict(exclude_unset=True)
+                row.update(update, updated_at=now)
+                changes.setdefault(item.id, {}).update(update)
+                deltas.add(user_id, row['created_at'].date(),
+                           row['type'], row['amount'])
+                result.operation = OperationSchema(**row)
+
+            self._write_batch(user_id, now, changes, deleted)
             self.session.flush()
+            apply_rollup_deltas(self.session, deltas.deltas)
+
+            for result, operation in created:
+                result.id = operation.id
+                result.operation = OperationSchema.from_orm(operation)
+
+        get_operations_cache().update(
+            user_id,
+            put=[
+                to_record(result.operation) for result in results
+                if result.operation is not None
+                and result.operation.id not in deleted
+            ],
+            removed=list(deleted),
+            deleted_at=now if deleted else None
+        )
+        return results
+
+    def _load_batch_rows(
+        self,
+        user_id: int,
+        operation_ids: Set[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        if not operation_ids:
+            return {}
+        statement = sa.select(
+            *(getattr(Operation, name) for name in operation_encoder.fields)
+        ).where(
+            Operation.user_id == user_id,
+            Operation.id.in_(operation_ids)
+        ).with_for_update()
+        return {
+            row.id: dict(zip(operation_encoder.fields, row))
+            for row in self.session.execute(statement)
+        }
+
+    def _write_batch(
+        self,
+        user_id: int,
+        now: datetime,
+        changes: Dict[int, Dict[str, Any]],
+        deleted: Set[int]
+    ) -> None:
+        table = Operation.__table__
+
+        if deleted:
+            self.session.execute(sa.delete(table).where(
+                table.c.user_id == user_id,
+                table.c.operation_id.in_(deleted)
+            ))
+            add_tombstones(self.session, user_id, deleted, now)
+
+        groups: Dict[tuple, List[int]] = defaultdict(list)
+        for operation_id, update in changes.items():
+            groups[tuple(sorted(update.items()))].append(operation_id)
+        for update, operation_ids in groups.items():
+            self.session.execute(sa.update(table).where(
+                table.c.user_id == user_id,
+                table.c.operation_id.in_(operation_ids)
+            ).values(dict(update, updated_at=now)))
+
+    def iter_import_chunks(
+        self,
+        user_id: int,
+        file: BinaryIO
+    ) -> Iterator[OperationsImportChunkSchema]:
+        """Stream the CSV in fixed-size chunks, one Core executemany each.
+
+        Only the current chunk is held in memory and no ORM objects are
+        built, so memory stays flat regardless of the file size. Every chunk
+        is committed separately and invalid rows are counted, not fatal.
+        """
+        records = csv.DictReader(
+            map(lambda line: line.decode('utf-8'), file),
+            skipinitialspace=True
+        )
+        statement = sa.insert(Operation)
+        chunk_number = 0
+        while True:
+            chunk = list(islice(records, get_settings().import_chunk_size))
+            if not chunk:
+                return
+
+            # A shared created_at per chunk keeps the rollup delta to a
+            # single (user, day) bucket.
+            created_at = datetime.utcnow()
+            deltas = RollupDeltasBuilder()
+            rows = []
+            for record in chunk:
+                try:
+                    payload = OperationCreateSchema.parse_obj(record)
+                except ValidationError:
+                    continue
+                rows.append({
+                    'user_id': user_id,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    **payload.dict()
+                })
+                deltas.add(user_id, created_at.date(),
+                           payload.type, payload.amount)
+
+            if rows:
+                with self.session.begin():
+                    self.session.execute(statement, rows)
+                    apply_rollup_deltas(self.session, deltas.deltas)
+                # executemany does not return the new ids; reload instead.
+                get_operations_cache().invalidate(user_id)
+
+            yield OperationsImportChunkSchema(
+                chunk=chunk_number,
+                inserted=len(rows),
+                rejected=len(chunk) - len(rows)
+            )
+            chunk_number += 1
+
+    def import_operations(
+        self,
+        user_id: int,
+        file: BinaryIO
+    ) -> OperationsImportReportSchema:
+        report = OperationsImportReportSchema()
+        for chunk in self.iter_import_chunks(user_id, file):
+            report.inserted += chunk.inserted
+            report.rejected += chunk.rejected
+            report.chunks.append(chunk)
+        return report
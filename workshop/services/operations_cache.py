@@ -0,0 +1,416 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+from workshop.config import OperationsCacheSettings
+from workshop.schemas import OperationSchema, OperationsFilterSchema
+
+
+# One operation as a plain tuple, in the field order RowEncoder encodes.
+OperationRecord = namedtuple(
+    'OperationRecord',
+    tuple(OperationSchema.__fields__)
+)
+
+Version = Tuple[Optional[datetime], Optional[datetime]]
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Estimated footprint of a record with its position key and id index slot
+# (the description is added by length), and of an empty entry.
+RECORD_BYTES = 480
+ENTRY_BYTES = 512
+
+
+def timestamp_key(value: datetime) -> int:
+    """Microseconds since the epoch, comparing naive UTC and aware values."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def version_key(version: Version) -> Tuple[Optional[int], ...]:
+    return tuple(
+        None if value is None else timestamp_key(value) for value in version
+    )
+
+
+def record_key(created_at: datetime, operation_id: int) -> Tuple[int, int]:
+    """Sort key matching PAGE_ORDER: newest first, then by id."""
+    return -timestamp_key(created_at), operation_id
+
+
+def to_record(operation: Any) -> OperationRecord:
+    """Record from anything with the schema's attributes (ORM row, schema)."""
+    return OperationRecord._make(
+        getattr(operation, name) for name in OperationRecord._fields
+    )
+
+
+def record_size(record: OperationRecord) -> int:
+    return RECORD_BYTES + len(record.description or '')
+
+
+def latest(*values: Optional[datetime]) -> Optional[datetime]:
+    present = [value for value in values if value is not None]
+    return max(present, key=timestamp_key, default=None)
+
+
+class UserOperations:
+    """Every operation of one user, in page order.
+
+    An entry is never changed in place: writes build a new one and swap it
+    into the cache, so a reader can page through an entry without a lock.
+    ``updated_at`` and ``deleted_at`` are the latest write and tombstone,
+    the same version ``OperationsService`` reads from the database.
+    """
+
+    __slots__ = ('records', 'keys', 'by_id', 'updated_at', 'deleted_at',
+                 'size')
+
+    def __init__(
+        self,
+        records: List[OperationRecord],
+        keys: List[Tuple[int, int]],
+        by_id: Dict[int, OperationRecord],
+        updated_at: Optional[datetime],
+        deleted_at: Optional[datetime],
+        size: int
+    ) -> None:
+        self.records = records
+        self.keys = keys
+        self.by_id = by_id
+        self.updated_at = updated_at
+        self.deleted_at = deleted_at
+        self.size = size
+
+    @classmethod
+    def build(
+        cls,
+        records: Iterable[OperationRecord],
+        deleted_at: Optional[datetime]
+    ) -> 'UserOperations':
+        records = sorted(records,
+                         key=lambda record: record_key(record.created_at,
+                                                       record.id))
+        return cls(
+            records,
+            [record_key(record.created_at, record.id) for record in records],
+            {record.id: record for record in records},
+            latest(*(record.updated_at for record in records)),
+            deleted_at,
+            ENTRY_BYTES + sum(map(record_size, records))
+        )
+
+    @property
+    def version(self) -> Version:
+        return self.updated_at, self.deleted_at
+
+    def page(
+        self,
+        filters: Optional[OperationsFilterSchema],
+        after: Optional[Tuple[datetime, int]],
+        count: int
+    ) -> List[OperationRecord]:
+        """Up to ``count`` records past the ``after`` keyset.
+
+        Like ``OperationsService._page_criteria``, without the description
+        search, which only the database can answer.
+        """
+        start, end = 0, len(self.records)
+        if after is not None:
+            start = bisect_right(self.keys, record_key(*after))
+
+        predicates: List[Callable[[OperationRecord], bool]] = []
+        if filters is not None:
+            # created_at bounds are ranges of the sort key.
+            if filters.created_to is not None:
+                start = max(start, bisect_left(
+                    self.keys, (-timestamp_key(filters.created_to),)
+                ))
+            if filters.created_from is not None:
+                end = bisect_left(
+                    self.keys, (-timestamp_key(filters.created_from) + 1,)
+                )
+            if filters.type is not None:
+                predicates.append(lambda record: record.type == filters.type)
+            if filters.min_amount is not None:
+                predicates.append(
+                    lambda record: record.amount >= filters.min_amount
+                )
+            if filters.max_amount is not None:
+                predicates.append(
+                    lambda record: record.amount <= filters.max_amount
+                )
+
+        page = []
+        for index in range(start, end):
+            record = self.records[index]
+            if all(predicate(record) for predicate in predicates):
+                page.append(record)
+                if len(page) == count:
+                    break
+        return page
+
+    def with_changes(
+        self,
+        put: Iterable[OperationRecord] = (),
+        removed: Iterable[int] = (),
+        deleted_at: Optional[datetime] = None
+    ) -> 'UserOperations':
+        """A copy with records upserted by id and ids removed."""
+        records = list(self.records)
+        keys = list(self.keys)
+        by_id = dict(self.by_id)
+        size, updated_at = self.size, self.updated_at
+
+        def drop(operation_id: int) -> Optional[OperationRecord]:
+            nonlocal size
+            old = by_id.pop(operation_id, None)
+            if old is not None:
+                index = bisect_left(keys, record_key(old.created_at, old.id))
+                del records[index]
+                del keys[index]
+                size -= record_size(old)
+            return old
+
+        if any([drop(operation_id) for operation_id in removed]):
+            updated_at = latest(*(record.updated_at for record in records))
+
+        for record in put:
+            old = by_id.get(record.id)
+            # Two writers can reach the cache out of commit order; keep
+            # whichever version of the row is newer.
+            if old is not None and (
+                timestamp_key(old.updated_at)
+                > timestamp_key(record.updated_at)
+            ):
+                continue
+            drop(record.id)
+            key = record_key(record.created_at, record.id)
+            index = bisect_left(keys, key)
+            records.insert(index, record)
+            keys.insert(index, key)
+            by_id[record.id] = record
+            size += record_size(record)
+            updated_at = latest(updated_at, record.updated_at)
+
+        return UserOperations(records, keys, by_id, updated_at,
+                              latest(self.deleted_at, deleted_at), size)
+
+
+# (expires_at, entry); a None entry marks a user with too many operations
+# to cache.
+CachedEntry = Tuple[float, Optional[UserOperations]]
+
+
+class _Shard:
+    __slots__ = ('lock', 'entries', 'verified_until', 'bytes', 'writes',
+                 'hits', 'misses', 'stale', 'evictions')
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.entries: 'OrderedDict[int, CachedEntry]' = OrderedDict()
+        # Until when (monotonic) a hit is served without checking its
+        # version again.
+        self.verified_until: Dict[int, float] = {}
+        self.bytes = 0
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+
+class OperationsCache:
+    """Per-user operation lists, sharded by user id and bounded by memory.
+
+    Each shard has its own lock and LRU order and gets an equal part of
+    ``max_bytes``, measured with the estimates above. Writers apply their
+    changes after committing (write-through). A load that raced with a
+    write to its shard is returned but not stored, so a list read before
+    a commit never replaces one that already has it. Writes of other
+    processes are caught by comparing a hit's version with the database,
+    at most once per ``version_check_interval`` for each user.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        shards: int,
+        max_user_operations: int,
+        ttl: float,
+        version_check_interval: float = 0.0
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_user_operations = max_user_operations
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.shard_bytes = max_bytes // max(shards, 1)
+        self._shards = [_Shard() for _ in range(max(shards, 1))]
+
+    @classmethod
+    def from_settings(
+        cls,
+        cache_settings: OperationsCacheSettings
+    ) -> 'OperationsCache':
+        return cls(
+            cache_settings.max_bytes,
+            cache_settings.shards,
+            cache_settings.max_user_operations,
+            cache_settings.ttl.total_seconds(),
+            cache_settings.version_check_interval.total_seconds()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.shard_bytes > 0 and self.ttl > 0
+
+    def _shard(self, user_id: int) -> _Shard:
+        return self._shards[user_id % len(self._shards)]
+
+    def get(
+        self,
+        user_id: int,
+        load: Callable[[int], Optional[UserOperations]],
+        version: Optional[Callable[[], Version]] = None
+    ) -> Optional[UserOperations]:
+        """The user's entry, calling ``load(max_user_operations)`` on a miss.
+
+        ``load`` returns None when the user has more operations than that;
+        so does this method, and the caller reads from the database. With
+        ``version``, a hit is only served while its version matches what
+        ``version()`` returns; otherwise it counts as stale and is loaded
+        again. A match is trusted for ``version_check_interval``.
+        """
+        if not self.enabled:
+            return None
+        shard = self._shard(user_id)
+        now = time.monotonic()
+        with shard.lock:
+            cached = shard.entries.get(user_id)
+            writes = shard.writes
+            if cached is None or cached[0] <= now:
+                shard.misses += 1
+                cached = None
+            elif (
+                cached[1] is None
+                or version is None
+                or shard.verified_until.get(user_id, 0.0) > now
+            ):
+                shard.entries.move_to_end(user_id)
+                shard.hits += 1
+                return cached[1]
+
+        if cached is not None:
+            # Checked outside the lock, it is a database round trip.
+            current = version_key(version()) == version_key(cached[1].version)
+            with shard.lock:
+                if current:
+                    shard.hits += 1
+                    if shard.entries.get(user_id) is cached:
+                        shard.entries.move_to_end(user_id)
+                        self._verified(shard, user_id)
+                    return cached[1]
+                shard.stale += 1
+
+        entry = load(self.max_user_operations)
+        with shard.lock:
+            if shard.writes == writes:
+                self._store(shard, user_id, entry,
+                            time.monotonic() + self.ttl)
+                self._verified(shard, user_id)
+        return entry
+
+    def update(
+        self,
+        user_id: int,
+        put: Sequence[OperationRecord] = (),
+        removed: Sequence[int] = (),
+        deleted_at: Optional[datetime] = None
+    ) -> None:
+        """Apply a committed write to the user's entry, if one is cached."""
+        shard = self._shard(user_id)
+        with shard.lock:
+            shard.writes += 1
+            cached = shard.entries.get(user_id)
+            if cached is None or cached[1] is None:
+                return
+            expires_at, entry = cached
+            entry = entry.with_changes(put, removed, deleted_at)
+            if len(entry.records) > self.max_user_operations:
+                entry = None
+            self._store(shard, user_id, entry, expires_at)
+
+    def invalidate(self, user_id: int) -> None:
+        shard = self._shard(user_id)
+        with shard.lock:
+            shard.writes += 1
+            self._remove(shard, user_id)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.writes += 1
+                shard.entries.clear()
+                shard.verified_until.clear()
+                shard.bytes = 0
+
+    def _verified(self, shard: _Shard, user_id: int) -> None:
+        if self.version_check_interval > 0:
+            shard.verified_until[user_id] = (time.monotonic()
+                                             + self.version_check_interval)
+
+    def _remove(self, shard: _Shard, user_id: int) -> None:
+        shard.verified_until.pop(user_id, None)
+        cached = shard.entries.pop(user_id, None)
+        if cached is not None:
+            shard.bytes -= self._size(cached[1])
+
+    def _store(
+        self,
+        shard: _Shard,
+        user_id: int,
+        entry: Optional[UserOperations],
+        expires_at: float
+    ) -> None:
+        self._remove(shard, user_id)
+        shard.entries[user_id] = expires_at, entry
+        shard.bytes += self._size(entry)
+        while shard.bytes > self.shard_bytes and shard.entries:
+            evicted_id, (_, evicted) = shard.entries.popitem(last=False)
+            shard.verified_until.pop(evicted_id, None)
+            shard.bytes -= self._size(evicted)
+            shard.evictions += 1
+
+    @staticmethod
+    def _size(entry: Optional[UserOperations]) -> int:
+        return ENTRY_BYTES if entry is None else entry.size
+
+    def stats(self) -> Dict[str, float]:
+        totals = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0,
+                  'size': 0, 'bytes': 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['stale'] += shard.stale
+                totals['evictions'] += shard.evictions
+                totals['size'] += len(shard.entries)
+                totals['bytes'] += shard.bytes
+        lookups = totals['hits'] + totals['misses'] + totals['stale']
+        return dict(totals,
+                    hit_rate=totals['hits'] / lookups if lookups else 0.0)
@@ -0,0 +1,179 @@
+import asyncio
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+from http import HTTPStatus
+import secrets
+from threading import BoundedSemaphore
+from typing import Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from workshop.config import get_settings
+
+
+T = TypeVar('T')
+
+SCRYPT_ALGORITHM = 'scrypt'
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, ln: int, r: int, p: int) -> bytes:
+    n = 1 << ln
+    return hashlib.scrypt(
+        password.encode('utf-8'),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * r * (n + p),
+        dklen=32
+    )
+
+
+def _parse_params(params: str) -> Dict[str, int]:
+    return {
+        key: int(value)
+        for key, value in (param.split('=') for param in params.split(','))
+    }
+
+
+def hash_password(password: str) -> str:
+    """Hash with the configured scrypt cost.
+
+    The result is ``scrypt$ln=<log2 n>,r=<r>,p=<p>$<salt>$<hash>`` so the
+    cost can be raised later without invalidating stored hashes.
+    """
+    auth = get_settings().auth
+    ln, r, p = auth.scrypt_ln, auth.scrypt_r, auth.scrypt_p
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, ln, r, p)
+    return (
+        f'{SCRYPT_ALGORITHM}$ln={ln},r={r},p={p}'
+        f'${_b64encode(salt)}${_b64encode(digest)}'
+    )
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    if '$' not in password_hash:
+        # Legacy unsalted MD5 hex digest.
+        legacy_hash = hashlib.md5(password.encode('utf-8')).hexdigest()
+        return secrets.compare_digest(legacy_hash, password_hash)
+
+    try:
+        algorithm, params, salt, digest = password_hash.split('$')
+        params_ = _parse_params(params)
+        if algorithm != SCRYPT_ALGORITHM:
+            return False
+        expected = _scrypt(password, _b64decode(salt), params_['ln'],
+                           params_['r'], params_['p'])
+    except (KeyError, ValueError):
+        return False
+    return secrets.compare_digest(expected, _b64decode(digest))
+
+
+def needs_rehash(password_hash: str) -> bool:
+    auth = get_settings().auth
+    current_params = (
+        f'ln={auth.scrypt_ln},'
+        f'r={auth.scrypt_r},'
+        f'p={auth.scrypt_p}'
+    )
+    return not password_hash.startswith(
+        f'{SCRYPT_ALGORITHM}${current_params}$'
+    )
+
+
+class PasswordHasher:
+    """Runs the KDF on a dedicated, bounded thread pool.
+
+    hashlib.scrypt releases the GIL, so ``workers`` threads use that many
+    cores. At most ``workers + queue_size`` calls may be in flight; beyond
+    that callers wait up to ``timeout`` seconds for a slot and then get a
+    503, instead of piling up on the request threadpool.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(workers + queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix='password-hasher'
+            )
+        return self._executor
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HTTPException(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                'Too many concurrent sign-ins',
+                headers={'Retry-After': '1'}
+            )
+
+    async def _acquire_async(self) -> None:
+        # Only fall back to a blocking wait, off the event loop, when the
+        # pool is saturated.
+        if not self._slots.acquire(blocking=False):
+            await run_in_threadpool(self._acquire)
+
+    def _start(self, fn: Callable[..., T], *args) -> 'Future[T]':
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        self._acquire()
+        return self._start(hash_password, password).result()
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        self._acquire()
+        return self._start(verify_password, password, password_hash).result()
+
+    async def hash_async(self, password: str) -> str:
+        await self._acquire_async()
+        return await asyncio.wrap_future(self._start(hash_password, password))
+
+    async def verify_async(self, password: str, password_hash: str) -> bool:
+        await self._acquire_async()
+        return await asyncio.wrap_future(
+            self._start(verify_password, password, password_hash)
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    auth = get_settings().auth
+    return PasswordHasher(
+        auth.password_hash_workers,
+        auth.password_hash_queue_size,
+        auth.password_hash_timeout
+    )
+
+
+def shutdown_password_hasher() -> None:
+    if get_password_hasher.cache_info().currsize:
+        get_password_hasher().shutdown()
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from enum import Enum
+from functools import lru_cache
+from http import HTTPStatus
+import logging
+import math
+from threading import Lock
+import time
+from typing import Dict, Protocol, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from workshop.config import CacheBackendName, RateLimitSettings, get_settings
+from workshop.metrics import registry
+
+from .auth import UserId, strict_authorizer
+
+
+logger = logging.getLogger(__name__)
+
+
+class RouteGroup(str, Enum):
+    AUTH = 'auth'
+    READ = 'read'
+    WRITE = 'write'
+
+
+# (rate per second, burst)
+Limit = Tuple[float, int]
+
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+rate_limited_requests = registry.counter(
+    'http_requests_rate_limited',
+    'Requests rejected with 429 by route group.',
+    ('group',)
+)
+
+
+class BucketStore(Protocol):
+    """Where the token buckets live.
+
+    ``take`` spends a token of the bucket under ``key`` and returns 0, or
+    returns how many seconds remain until one is available. ``blocking``
+    stores do network I/O and are called from the threadpool.
+    """
+
+    blocking: bool
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        ...
+
+
+class MemoryBucketStore:
+    """In-process buckets; each worker enforces the limits on its own.
+
+    Only the ``max_keys`` most recently used buckets are kept. A dropped
+    bucket comes back full, which is what it would have refilled to unless
+    its client was still busy.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = tokens, now
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take in one round trip. Redis' clock is used so every
+# worker agrees on the time; the bucket expires once it would be full.
+TAKE_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens),
+           'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000))
+return tostring(wait)
+'''
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker; needs the optional ``redis`` package.
+
+    Like ``RedisCache``, errors are logged and the request is let through:
+    an unavailable store turns the limits off instead of the API.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = '') -> None:
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError(
+                'The redis rate limit backend needs the redis package'
+            ) from error
+
+        self.prefix = prefix
+        self.errors = 0
+        self._error = redis.RedisError
+        self._take = redis.Redis.from_url(url).register_script(TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            return float(self._take(keys=[self.prefix + key],
+                                    args=[rate, burst]))
+        except self._error:
+            self.errors += 1
+            logger.warning('Redis rate limit check failed', exc_info=True)
+            return 0.0
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store: BucketStore,
+        limits: Dict[RouteGroup, Limit]
+    ) -> None:
+        self.store = store
+        # Groups with a rate of 0 are not limited.
+        self.limits = {
+            group: limit for group, limit in limits.items() if limit[0] > 0
+        }
+
+    @classmethod
+    def from_settings(
+        cls,
+        rate_limit_settings: RateLimitSettings
+    ) -> 'RateLimiter':
+        if rate_limit_settings.backend == CacheBackendName.REDIS:
+            store = RedisBucketStore(rate_limit_settings.redis_url,
+                                     'workshop:rate:')
+        else:
+            store = MemoryBucketStore(rate_limit_settings.max_keys)
+        return cls(store, {
+            RouteGroup.AUTH: (rate_limit_settings.auth_rate,
+                              rate_limit_settings.auth_burst),
+            RouteGroup.READ: (rate_limit_settings.read_rate,
+                              rate_limit_settings.read_burst),
+            RouteGroup.WRITE: (rate_limit_settings.write_rate,
+                               rate_limit_settings.write_burst)
+        })
+
+    async def check(self, group: RouteGroup, client: str) -> None:
+        """Raise 429 with Retry-After if ``client`` is over the limit."""
+        limit = self.limits.get(group)
+        if limit is None:
+            return
+        key = f'{group.value}:{client}'
+        if self.store.blocking:
+            wait = await run_in_threadpool(self.store.take, key, *limit)
+        else:
+            wait = self.store.take(key, *limit)
+        if wait > 0:
+            rate_limited_requests.inc(group.value)
+            raise HTTPException(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(math.ceil(wait))}
+            )
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter.from_settings(get_settings().rate_limit)
+
+
+def client_address(request: Request) -> str:
+    return request.client.host if request.client else 'unknown'
+
+
+async def limit_by_address(request: Request) -> None:
+    await get_rate_limiter().check(RouteGroup.AUTH, client_address(request))
+
+
+async def limit_by_user(
+    request: Request,
+    user_id: UserId = Depends(strict_authorizer)
+) -> None:
+    group = (RouteGroup.READ if request.method in READ_METHODS
+             else RouteGroup.WRITE)
+    await get_rate_limiter().check(group, str(user_id))
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+import functools
+import inspect
+from typing import Callable, Iterator, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from workshop.config import get_settings
+from workshop.db import RoutingSession
+
+from .cache import TTLCache
+
+
+F = TypeVar('F', bound=Callable)
+
+
+# Users that wrote recently, per process: their reads skip the replicas
+# until the entry expires.
+@functools.lru_cache()
+def get_pinned_users() -> TTLCache[int, bool]:
+    return TTLCache(
+        maxsize=100_000,
+        ttl=get_settings().replicas.read_your_writes.total_seconds()
+    )
+
+
+@contextmanager
+def reading_for(session: Session, user_id: Optional[int]) -> Iterator[None]:
+    """``session.reading()``, unless ``user_id`` is pinned to the primary."""
+    if (
+        not isinstance(session, RoutingSession)
+        or (user_id is not None and get_pinned_users().get(user_id))
+    ):
+        yield
+        return
+    with session.reading():
+        yield
+
+
+def read_only(method: F) -> F:
+    """Mark a service method whose queries may be served by a replica."""
+    method.__read_only__ = True
+    return method
+
+
+def _routed(method: Callable) -> Callable:
+    is_read_only = getattr(method, '__read_only__', False)
+    signature = inspect.signature(method)
+    takes_user = 'user_id' in signature.parameters
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        session = self.session
+        if not isinstance(session, RoutingSession) or not session.replicas:
+            return method(self, *args, **kwargs)
+
+        user_id = None
+        if takes_user:
+            user_id = signature.bind(self, *args, **kwargs).arguments.get(
+                'user_id'
+            )
+
+        if is_read_only:
+            with reading_for(session, user_id):
+                return method(self, *args, **kwargs)
+
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            # The SQLite read pool shares the primary's file, so it never
+            # lags behind and nobody needs pinning.
+            if (
+                user_id is not None
+                and session.wrote
+                and get_settings().replicas.urls
+            ):
+                get_pinned_users().set(user_id, True)
+
+    return wrapper
+
+
+def route_reads(cls: type) -> type:
+    """Class decorator sending ``read_only`` methods to the replicas.
+
+    Other public methods pin their ``user_id`` to the primary for
+    ``Settings.replicas.read_your_writes`` once they have written. Without
+    replica URLs, ``read_only`` methods go to the SQLite read pool in
+    performance mode. Sessions without replicas or a read pool run the
+    methods unchanged; that is decided per call, from the session, so
+    importing a service does not load the settings. Coroutine methods are
+    left alone; the sync methods they call are routed.
+    """
+    for name, attribute in list(vars(cls).items()):
+        if (
+            not name.startswith('_')
+            and inspect.isfunction(attribute)
+            and not inspect.isgeneratorfunction(attribute)
+            and not inspect.iscoroutinefunction(attribute)
+        ):
+            setattr(cls, name, _routed(attribute))
+    return cls
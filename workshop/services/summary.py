@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Depends
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from workshop.db import get_session
+from workshop.db.models import OperationRollup, OperationType
+from workshop.schemas import (
+    OperationsSummarySchema,
+    SummaryBucketSchema,
+    SummaryPeriod
+)
+
+from .routing import read_only, route_reads
+
+
+RollupDeltas = Dict[Tuple[int, date], Tuple[Decimal, Decimal]]
+
+
+class RollupDeltasBuilder:
+    """Accumulates signed (income, outcome) changes per (user, day)."""
+
+    def __init__(self) -> None:
+        self.deltas: RollupDeltas = defaultdict(
+            lambda: (Decimal(0), Decimal(0))
+        )
+
+    def add(
+        self,
+        user_id: int,
+        day: date,
+        type_: OperationType,
+        amount: Decimal,
+        sign: int = 1
+    ) -> 'RollupDeltasBuilder':
+        income, outcome = self.deltas[user_id, day]
+        amount = Decimal(amount) * sign
+        if type_ == OperationType.INCOME:
+            income += amount
+        else:
+            outcome += amount
+        self.deltas[user_id, day] = income, outcome
+        return self
+
+
+def apply_rollup_deltas(session: Session, deltas: RollupDeltas) -> None:
+    """Upsert rollup deltas; must be called inside the caller's transaction."""
+    rows = [
+        {'user_id': user_id, 'day': day, 'income': income, 'outcome': outcome}
+        for (user_id, day), (income, outcome) in deltas.items()
+        if income or outcome
+    ]
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        insert = (sqlite if dialect == 'sqlite' else postgresql).insert
+        statement = insert(OperationRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=[OperationRollup.user_id, OperationRollup.day],
+            set_={
+                'income': OperationRollup.income + statement.excluded.income,
+                'outcome': OperationRollup.outcome + statement.excluded.outcome
+            }
+        )
+        session.execute(statement, rows)
+        return
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(OperationRollup)
+        statement = statement.on_duplicate_key_update(
+            income=OperationRollup.income + statement.inserted.income,
+            outcome=OperationRollup.outcome + statement.inserted.outcome
+        )
+        session.execute(statement, rows)
+        return
+
+    for row in rows:
+        _update_or_insert_rollup(session, row)
+
+
+def _update_or_insert_rollup(session: Session, row: Dict[str, Any]) -> None:
+    update = (
+        sa.update(OperationRollup)
+        .where(OperationRollup.user_id == row['user_id'],
+               OperationRollup.day == row['day'])
+        .values(income=OperationRollup.income + row['income'],
+                outcome=OperationRollup.outcome + row['outcome'])
+    )
+    if session.execute(update).rowcount:
+        return
+    try:
+        # In a savepoint, so losing the race below keeps the transaction.
+        with session.begin_nested():
+            session.execute(sa.insert(OperationRollup), row)
+    except IntegrityError:
+        # A concurrent transaction inserted the row between the UPDATE and
+        # the INSERT; it is there to update now.
+        session.execute(update)
+
+
+def bucket_start(day: date, period: SummaryPeriod) -> date:
+    if period == SummaryPeriod.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == SummaryPeriod.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+@route_reads
+class SummaryService:
+    def __init__(self, session: Session = Depends(get_session)) -> None:
+        self.session = session
+
+    def _iter_rollups(
+        self,
+        user_id: int,
+        date_from: Optional[date],
+        date_to: Optional[date]
+    ) -> Iterable[OperationRollup]:
+        q = self.session.query(OperationRollup).filter_by(
+            user_id=user_id
+        ).order_by(OperationRollup.day)
+        if date_from is not None:
+            q = q.filter(OperationRollup.day >= date_from)
+        if date_to is not None:
+            q = q.filter(OperationRollup.day <= date_to)
+        return q
+
+    @read_only
+    def get_summary(
+        self,
+        user_id: int,
+        *,
+        period: SummaryPeriod = SummaryPeriod.MONTH,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> OperationsSummarySchema:
+        summary = OperationsSummarySchema(period=period)
+        buckets: Dict[date, SummaryBucketSchema] = {}
+        for rollup in self._iter_rollups(user_id, date_from, date_to):
+            start = bucket_start(rollup.day, period)
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = SummaryBucketSchema(start=start)
+                summary.buckets.append(bucket)
+            bucket.income += rollup.income
+            bucket.outcome += rollup.outcome
+            bucket.balance = bucket.income - bucket.outcome
+            summary.income += rollup.income
+            summary.outcome += rollup.outcome
+        summary.balance = summary.income - summary.outcome
+        return summary
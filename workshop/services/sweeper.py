@@ -0,0 +1,89 @@
+from functools import lru_cache
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from workshop.config import get_settings
+from workshop.db import get_database
+
+from .idempotency import IdempotencyService
+from .operations import OperationsService
+
+
+logger = logging.getLogger(__name__)
+
+# Deletes up to a batch of rows in its own transaction; returns how many.
+Purge = Callable[[Session, int], int]
+
+
+class Sweeper:
+    """Runs the ``purges`` from a daemon thread every ``interval``.
+
+    Each purge is repeated until it deletes less than a batch, and each
+    batch is its own short transaction, so the sweep never holds the write
+    lock for long.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        purges: Dict[str, Purge]
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purges = purges
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='sweeper',
+            daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def sweep(self, name: str) -> int:
+        purge = self.purges[name]
+        purged = 0
+        while True:
+            with get_database().Session() as session:
+                deleted = purge(session, self.batch_size)
+            purged += deleted
+            if deleted < self.batch_size:
+                return purged
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            for name in self.purges:
+                try:
+                    purged = self.sweep(name)
+                except Exception:
+                    logger.exception('Purging %s failed', name)
+                else:
+                    if purged:
+                        logger.info('Purged %d %s', purged, name)
+
+
+@lru_cache()
+def get_sweeper() -> Sweeper:
+    purge = get_settings().purge
+    return Sweeper(purge.interval.total_seconds(), purge.batch_size, {
+        'expired idempotency keys': lambda session, batch_size:
+            IdempotencyService(session).purge_expired(batch_size),
+        'old tombstones': lambda session, batch_size:
+            OperationsService(session).purge_tombstones(batch_size)
+    })
@@ -1,24 +1,60 @@
+from datetime import datetime
+from functools import lru_cache
 from http import HTTPStatus
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import Depends, HTTPException
+import sqlalchemy as sa
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, defer
+from sqlalchemy.orm import Session
 
+from workshop.config import get_settings
 from workshop.db import get_session
 from workshop.db.models import User
-from workshop.schemas import UserUpdateSchema
+from workshop.etag import make_etag
+from workshop.metrics import instrument_service
+from workshop.schemas import SelfUserSchema, UserSchema, UserUpdateSchema
 
+from .cache import CacheBackend, create_cache_backend
+from .routing import read_only, route_reads
 
+
+USER_COLUMNS = [
+    User.__mapper__.columns[name] for name in SelfUserSchema.__fields__
+]
+
+# Public profiles as served by GET /users/{username}: ``profile:<username>``
+# holds the ETag and JSON body, ``username:<user_id>`` the username the
+# profile was cached under, so a rename can drop the old entry.
+@lru_cache()
+def get_profile_cache() -> CacheBackend:
+    return create_cache_backend(get_settings().response_cache, 'workshop:')
+
+
+def invalidate_profile(user_id: int, username: Optional[str] = None) -> None:
+    profile_cache = get_profile_cache()
+    cached_username = profile_cache.get(f'username:{user_id}')
+    if cached_username is not None:
+        profile_cache.delete(f'profile:{cached_username.decode("utf-8")}')
+    if username is not None:
+        profile_cache.delete(f'profile:{username}')
+    profile_cache.delete(f'username:{user_id}')
+
+
+@instrument_service
+@route_reads
 class UsersService:
     def __init__(self, session: Session = Depends(get_session)) -> None:
         self.session = session
 
+    @read_only
     def get_user_with_id(self, user_id: int) -> User:
         user = self.session.query(User).get(user_id)
         if not user:
             raise HTTPException(HTTPStatus.NOT_FOUND)
         return user
 
+    @read_only
     def get_user_with_username(
         self,
         username: str
@@ -29,41 +65,76 @@ class UsersService:
             raise HTTPException(HTTPStatus.NOT_FOUND)
         return user
 
-    def _update_user_email(self, user: User, email: str) -> None:
-        with self.session.begin_nested():
-            user.email = email
-            self.session.add(user)
-            try:
-                self.session.flush()
-            except IntegrityError:
-                raise HTTPException(HTTPStatus.BAD_REQUEST,
-                                    'Email is already in use')
-
-    def _update_user_username(self, user: User, username: str) -> None:
-        with self.session.begin_nested():
-            user.username = username
-            self.session.add(user)
-            try:
-                self.session.flush()
-            except IntegrityError:
-                raise HTTPException(HTTPStatus.BAD_REQUEST,
-                                    'Username is already in use')
-
-    def update_user(self, user_id: int, payload: UserUpdateSchema) -> User:
-        with self.session.begin():
-            user = self.get_user_with_id(user_id)
-
-            patch_payload = payload.dict(exclude_unset=True,
-                                         exclude={'username', 'email'})
-            for field, value in patch_payload.items():
-                setattr(user, field, value)
-            self.session.add(user)
-            self.session.flush()
-
-            if payload.email is not None:
-                self._update_user_email(user, payload.email)
-
-            if payload.username is not None:
-                self._update_user_username(user, payload.username)
-
-            return user
+    @read_only
+    def get_user_profile(self, username: str) -> Tuple[str, bytes]:
+        """Public profile as ``(ETag, JSON body)``, through the cache."""
+        profile_cache = get_profile_cache()
+        cached = profile_cache.get(f'profile:{username}')
+        if cached is not None:
+            etag, _, body = cached.partition(b'\n')
+            return etag.decode('ascii'), body
+
+        user = self.get_user_with_username(username)
+        etag = make_etag(user.id, user.updated_at.isoformat())
+        body = UserSchema.from_orm(user).json(by_alias=True).encode('utf-8')
+        profile_cache.set(f'profile:{username}',
+                          etag.encode('ascii') + b'\n' + body)
+        profile_cache.set(f'username:{user.id}', username.encode('utf-8'))
+        return etag, body
+
+    def update_user(
+        self,
+        user_id: int,
+        payload: UserUpdateSchema
+    ) -> SelfUserSchema:
+        """Patch the user with one ``UPDATE ... RETURNING``.
+
+        Unique violations are told apart only after the statement fails,
+        so the common path needs no SELECT and no SAVEPOINTs.
+        """
+        values = {
+            field: value
+            for field, value in payload.dict(exclude_unset=True).items()
+            if value is not None
+        }
+        values['updated_at'] = datetime.utcnow()
+        table = User.__table__
+        statement = sa.update(table).where(
+            table.c.user_id == user_id
+        ).values(values)
+
+        try:
+            with self.session.begin():
+                if self.session.get_bind().dialect.full_returning:
+                    row = self.session.execute(
+                        statement.returning(*USER_COLUMNS)
+                    ).first()
+                else:
+                    # SQLAlchemy 1.4 cannot emit RETURNING for SQLite.
+                    result = self.session.execute(statement)
+                    row = result.rowcount and self.session.execute(
+                        sa.select(*USER_COLUMNS).where(
+                            table.c.user_id == user_id
+                        )
+                    ).first()
+        except IntegrityError as error:
+            raise self._conflict(user_id, values) from error
+
+        if not row:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+        user = SelfUserSchema(**dict(zip(SelfUserSchema.__fields__, row)))
+        invalidate_profile(user_id, user.username)
+        return user
+
+    def _conflict(self, user_id: int, values: Dict[str, Any]) -> Exception:
+        for field, detail in (('email', 'Email is already in use'),
+                              ('username', 'Username is already in use')):
+            if field not in values:
+                continue
+            taken = self.session.query(User.id).filter(
+                getattr(User, field) == values[field],
+                User.id != user_id
+            ).first()
+            if taken:
+                return HTTPException(HTTPStatus.BAD_REQUEST, detail)
+        return HTTPException(HTTPStatus.CONFLICT)